@@ -1,8 +1,11 @@
-import requests
-from bs4 import BeautifulSoup
-import json
-import time
-import random
+import argparse
+from contextlib import closing
+from html_backends import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS, check_parser_backend, parse_html
+from hybrid_conjugation import VerificationReport, add_hybrid_arguments, load_verb_dictionary, plan_hybrid, report_path_for
+from http_fetch import add_fetch_arguments, fetcher_from_args, is_transient_error, is_transient_status
+from rate_control import add_rate_arguments, retrying_fetcher_from_args
+from scrape_journal import ScrapeJournal, list_fingerprint
+from scrape_pipeline import FetchJob, add_pipeline_arguments, pipeline_from_args
 
 # --- 1. 精心准备的高频词例句 (可扩充) ---
 CURATED_EXAMPLES = {
@@ -81,28 +84,31 @@ HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
-def parse_verb_page(verb, soup):
+VERB_PAGE_SUBTREES = ('div.concept_light-representation', 'div.concept_light-tag', 'div#inflections')
+
+def parse_verb_page(verb, doc):
+    """doc is a parsed page from html_backends.parse_html()."""
     print(f"  - Parsing page for {verb}...")
-    main_section = soup.find('div', class_='concept_light-representation')
+    main_section = doc.select_one('div.concept_light-representation')
     if not main_section:
         print(f"    - Could not find main content for {verb}. Skipping.")
         return None
 
-    furigana_tag = main_section.find('span', class_='furigana')
+    furigana_tag = main_section.select_one('span.furigana')
     if not furigana_tag:
         print(f"    - Could not find furigana for {verb}. Skipping.")
         return None
-    furigana_spans = furigana_tag.find_all('span')
+    furigana_spans = furigana_tag.select('span')
     reading = ''.join([span.text for span in furigana_spans])
 
-    meaning_div = main_section.find('div', class_='meaning-wrapper')
+    meaning_div = main_section.select_one('div.meaning-wrapper')
     if not meaning_div:
         print(f"    - Could not find meaning for {verb}. Skipping.")
         return None
-    meanings = [m.text.strip() for m in meaning_div.find_all('span', class_='meaning-meaning')]
+    meanings = [m.text.strip() for m in meaning_div.select('span.meaning-meaning')]
     meaning = '; '.join(meanings)
 
-    tags = soup.find_all('div', class_='concept_light-tag')
+    tags = doc.select('div.concept_light-tag')
     jlpt_level = "Unknown"
     group = "Unknown"
     for tag in tags:
@@ -120,11 +126,11 @@ def parse_verb_page(verb, soup):
                 group = 'kuru'
 
     forms = {}
-    inflection_table = soup.find('div', id='inflections')
+    inflection_table = doc.select_one('div#inflections')
     if inflection_table:
-        rows = inflection_table.find_all('tr')
+        rows = inflection_table.select('tr')
         for row in rows:
-            cells = row.find_all('td')
+            cells = row.select('td')
             if len(cells) == 2:
                 form_name_raw = cells[0].text.strip().lower().replace('-', ' ').replace(' ', '_')
                 form_name = f"{form_name_raw}_form"
@@ -146,44 +152,121 @@ def parse_verb_page(verb, soup):
     }
     return verb_data
 
+def parse_verb_content(content, verb, parser=DEFAULT_PARSER_BACKEND):
+    """Pipeline parse stage: raw page bytes -> verb record or None."""
+    return parse_verb_page(verb, parse_html(content, parser, only=VERB_PAGE_SUBTREES))
+
 def main():
+    parser = argparse.ArgumentParser(description="Scrape verb pages from Jisho.org into verbs_full.json.")
+    parser.add_argument("--base-url", default="https://jisho.org",
+                        help="Site to crawl (e.g. a local fixture server)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Discard the journal of an interrupted run instead of resuming it")
+    parser.add_argument("--parser", choices=PARSER_BACKENDS, default=DEFAULT_PARSER_BACKEND,
+                        help="HTML parser backend")
+    add_hybrid_arguments(parser)
+    add_fetch_arguments(parser)
+    add_pipeline_arguments(parser)
+    add_rate_arguments(parser, rate=0.5)
+    args = parser.parse_args()
+    check_parser_backend(args.parser)
+
     print("--- Starting Advanced Japanese Verb Scraper ---")
-    
-    all_verbs_data = []
-    scraped_verbs = set()
 
-    for verb in VERB_LIST:
+    output_filename = 'verbs_full.json'
+    meta = {"base_url": args.base_url, "verbs": list_fingerprint(VERB_LIST)}
+    # 混合模式: 本地生成活用, 只抓取抽样核对的动词和词典中没有的动词
+    local_records, verify = {}, set()
+    if args.hybrid:
+        dictionary = load_verb_dictionary(args.dictionary)
+        local_records, verify = plan_hybrid(VERB_LIST, dictionary, CURATED_EXAMPLES, args.sample, args.seed)
+        meta.update({"hybrid": True, "dictionary": list_fingerprint(sorted(local_records)), "sample": args.sample,
+                     "seed": args.seed})
+        print(f"Hybrid mode: {len(local_records)} of {len(set(VERB_LIST))} verbs generated locally, "
+              f"{len(verify)} of them verified on Jisho.")
+    journal = ScrapeJournal(output_filename, meta, args.restart)
+    start = journal.cursor.get("next_index", 0)
+    if journal.resumed:
+        print(f"Resuming at verb #{start} ({journal.records} verbs already scraped).")
+    report = VerificationReport(journal.cursor.get("verification"))
+
+    todo = []
+    jobs = []
+    scraped_verbs = set(VERB_LIST[:start])
+    for index in range(start, len(VERB_LIST)):
+        verb = VERB_LIST[index]
         if verb in scraped_verbs:
             continue
-        
-        print(f"\nProcessing verb: {verb}")
         scraped_verbs.add(verb)
+        todo.append((index, verb))
+        if verb not in local_records or verb in verify:
+            jobs.append(FetchJob(f"{args.base_url}/word/{verb}", (verb, args.parser), index))
 
-        sleep_time = random.uniform(1, 2.5)
-        print(f"  - Waiting for {sleep_time:.2f} seconds...")
-        time.sleep(sleep_time)
-
-        jisho_url = f"https://jisho.org/word/{verb}"
-        try:
-            jisho_response = requests.get(jisho_url, headers=HEADERS, timeout=15)
-            if jisho_response.status_code == 200:
-                jisho_soup = BeautifulSoup(jisho_response.content, 'html.parser')
-                verb_data = parse_verb_page(verb, jisho_soup)
-                if verb_data:
-                    all_verbs_data.append(verb_data)
-                    print(f"  - Successfully parsed and added {verb}.")
-            else:
-                print(f"  - Failed to fetch Jisho page for {verb} (Status: {jisho_response.status_code})")
-        except requests.exceptions.RequestException as e:
-            print(f"  - An error occurred while fetching {verb}: {e}")
+    # 自适应限速: 正常时逐步加快, 遇到 429/503 减速并重试, 避免被封
+    fetcher = retrying_fetcher_from_args(args, fetcher_from_args(args, HEADERS, timeout=15))
+    pipeline = pipeline_from_args(args, fetcher, parse_verb_content)
+    stopped = False
 
-    output_filename = 'verbs_full.json'
-    # Explicitly use utf-8 encoding when writing the file
-    with open(output_filename, 'w', encoding='utf-8') as f:
-        json.dump(all_verbs_data, f, ensure_ascii=False, indent=2)
+    try:
+        with closing(pipeline.run(jobs)) as pages:
+            for index, verb in todo:
+                print(f"\nProcessing verb: {verb}")
+                local_data = local_records.get(verb)
+                if local_data is not None and verb not in verify:
+                    journal.append(local_data)
+                    print(f"  - Generated {verb} locally.")
+                    journal.commit({"next_index": index + 1, "verification": report.state})
+                    continue
+
+                # 任务与 todo 同序, 下一个结果就是这个动词的页面
+                job, jisho_response, error, verb_data = next(pages)
+                if error is not None:
+                    print(f"  - An error occurred while fetching {verb}: {error}")
+                    if is_transient_error(error):
+                        print("  - Stopping, run again to resume.")
+                        stopped = True
+                elif jisho_response.status_code == 200:
+                    if local_data is None and verb_data:
+                        journal.append(verb_data)
+                        print(f"  - Successfully parsed and added {verb}.")
+                elif is_transient_status(jisho_response.status_code):
+                    print(f"  - Jisho answered {jisho_response.status_code} for {verb}. Stopping, run again to resume.")
+                    stopped = True
+                else:
+                    print(f"  - Failed to fetch Jisho page for {verb} (Status: {jisho_response.status_code})")
+
+                if stopped:
+                    break
+                if local_data is not None:
+                    report.add(local_data, verb_data)
+                    journal.append(local_data)
+                    print(f"  - Generated {verb} locally and checked it against Jisho.")
+                journal.commit({"next_index": index + 1, "verification": report.state} if args.hybrid
+                               else {"next_index": index + 1})
+    finally:
+        pipeline.close()
+        fetcher.close()
+    print(fetcher.format_stats())
+    print(pipeline.format_metrics())
+
+    if stopped or (todo and journal.cursor.get("next_index", 0) <= todo[-1][0]):
+        # 没有抓完: 不覆盖输出文件, 保留日志以便下次继续
+        journal.close()
+        print(f"\n--- Stopped: {journal.records} of {len(set(VERB_LIST))} verbs scraped so far ---")
+        print(f"{output_filename} was not written. Run again to resume from {journal.cursor_path}.")
+        raise SystemExit(1)
+
+    # 由日志流式生成 JSON 文件
+    count = journal.compact()
+    if args.hybrid:
+        report_path = report_path_for(output_filename)
+        report.write(report_path, args.base_url, len(set(VERB_LIST)), len(local_records))
+        print(report.format_summary())
+        print(f"Verification report saved to {report_path}")
+    journal.remove()
 
     print(f"\n--- All Done! ---")
-    print(f"Successfully scraped {len(all_verbs_data)} verbs.")
+    print(f"Successfully scraped {count} verbs.")
     print(f"Data saved to {output_filename}")
 
 if __name__ == '__main__':
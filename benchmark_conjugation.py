@@ -0,0 +1,75 @@
+import argparse
+import time
+import ijson
+from conjugation_engine import ENGINE_VERSION, conjugate_batch
+from jmdict_processor import conjugate_adjective, extract_word_entry, _conjugate_verb_uncached
+
+def load_pairs(input_path, limit=None):
+    """Collects (lemma, group, type) triples for every verb/adjective in JMdict."""
+    pairs = []
+    with open(input_path, 'rb') as f:
+        for entry in ijson.items(f, 'words.item'):
+            word_data = extract_word_entry(entry)
+            if word_data is None or word_data["type"] not in ("verb", "adjective"):
+                continue
+            pairs.append((word_data["word"], word_data["group"], word_data["type"]))
+            if limit and len(pairs) >= limit:
+                break
+    return pairs
+
+def run_library(pairs):
+    results = []
+    for lemma, group, word_type in pairs:
+        if word_type == "verb":
+            results.append(_conjugate_verb_uncached(lemma, group))
+        else:
+            results.append(conjugate_adjective(lemma, group))
+    return results
+
+def run_native(pairs, batch_size):
+    results = []
+    for i in range(0, len(pairs), batch_size):
+        batch = [(lemma, group) for lemma, group, _ in pairs[i:i + batch_size]]
+        results.extend(conjugate_batch(batch))
+    return results
+
+def timed(label, func, *args):
+    start = time.perf_counter()
+    results = func(*args)
+    elapsed = time.perf_counter() - start
+    rate = len(results) / elapsed if elapsed else float('inf')
+    print(f"{label:<28} {elapsed:8.3f}s  {rate:12.0f} words/s")
+    return results, elapsed
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the native conjugation engine with japanese_verb_conjugator_v2.")
+    parser.add_argument("--input", default='jmdict-eng-3.6.1.json', help="JMdict JSON file")
+    parser.add_argument("--limit", type=int, default=None, help="Only use the first N verbs/adjectives")
+    parser.add_argument("--batch-size", type=int, default=500, help="Pairs per conjugate_batch call")
+    args = parser.parse_args()
+
+    print(f"--- Loading verbs and adjectives from {args.input} ---")
+    try:
+        pairs = load_pairs(args.input, args.limit)
+    except FileNotFoundError:
+        print(f"Error: {args.input} not found.")
+        return
+    verbs = sum(1 for _, _, word_type in pairs if word_type == "verb")
+    print(f"Loaded {len(pairs)} words ({verbs} verbs, {len(pairs) - verbs} adjectives).\n")
+
+    library_results, library_time = timed("library (per word)", run_library, pairs)
+    native_results, native_time = timed(f"native {ENGINE_VERSION} (batch)", run_native, pairs, args.batch_size)
+
+    empty_library = sum(1 for forms in library_results if len(forms) <= 1)
+    empty_native = sum(1 for forms in native_results if len(forms) <= 1)
+    same_forms = sum(1 for a, b in zip(library_results, native_results) if a == b)
+
+    print("\n--- Benchmark Report ---")
+    if native_time:
+        print(f"Speedup: {library_time / native_time:.1f}x")
+    print(f"Words without conjugations: library {empty_library}, native {empty_native}")
+    print(f"Identical form dicts: {same_forms}/{len(pairs)}")
+    print("------------------------")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+import argparse
+import contextlib
+import io
+import os
+import re
+import time
+from urllib.parse import parse_qs, unquote, urlsplit
+from advanced_scraper import parse_verb_content
+from conjugation_scraper import parse_verb_details
+from fixture_server import (DEFAULT_VERBS_FILE, fixture_filename, load_fixture_verbs, synthetic_conjugator_page,
+                            synthetic_search_page, synthetic_word_page)
+from html_backends import PARSER_BACKENDS, parse_html
+from http_fetch import DEFAULT_CACHE_DIR, ResponseCache
+from jisho_sources import JLPT_LEVELS, parse_jisho_search_page
+
+_LEVEL_RE = re.compile(r"jlpt-(n\d)")
+
+def page_kind(path, query):
+    """Which parser a page belongs to, from its URL path and query: (kind, argument) or None."""
+    path = unquote(path)
+    if path.startswith("/search/"):
+        match = _LEVEL_RE.search(path)
+        return ("search", match.group(1) if match else "n5")
+    if path.startswith("/word/"):
+        return ("verb", path[len("/word/"):])
+    if path.endswith("/VerbDetails.asp") and "txtVerb" in query:
+        return ("conjugation", query["txtVerb"][0])
+    return None
+
+def cache_corpus(cache_dir):
+    """Pages saved by the scrapers in the http_fetch cache."""
+    cache = ResponseCache(cache_dir)
+    corpus = []
+    for entry in cache.iter_entries():
+        parts = urlsplit(entry["url"])
+        kind = page_kind(parts.path, parse_qs(parts.query))
+        if kind:
+            corpus.append((*kind, cache.read_body(entry)))
+    return corpus
+
+def synthetic_corpus(pages, verbs_file):
+    """The pages fixture_server.py serves: every search page of every level plus one word and one conjugator page per verb."""
+    corpus = []
+    for level in JLPT_LEVELS:
+        for page in range(1, pages + 1):
+            corpus.append(("search", level, synthetic_search_page(level, page, pages).encode("utf-8")))
+    for verb, record in load_fixture_verbs(verbs_file).items():
+        corpus.append(("verb", verb, synthetic_word_page(record).encode("utf-8")))
+        corpus.append(("conjugation", verb, synthetic_conjugator_page(record).encode("utf-8")))
+    return corpus
+
+def fixture_corpus(fixtures_dir):
+    """Saved pages named like fixture_server.fixture_filename() does, e.g. search_jlpt-n5_page-2.html."""
+    corpus = []
+    for name in sorted(os.listdir(fixtures_dir)):
+        if not name.endswith(".html"):
+            continue
+        stem = name[:-len(".html")]
+        if stem.startswith("search_"):
+            match = _LEVEL_RE.search(stem)
+            kind = ("search", match.group(1) if match else "n5")
+        elif stem.startswith("word_"):
+            kind = ("verb", stem[len("word_"):])
+        elif stem.startswith("VerbDetails.asp_txtVerb-"):
+            kind = ("conjugation", stem[len("VerbDetails.asp_txtVerb-"):])
+        else:
+            continue
+        with open(os.path.join(fixtures_dir, name), 'rb') as f:
+            corpus.append((*kind, f.read()))
+    return corpus
+
+def save_corpus(corpus, fixtures_dir):
+    os.makedirs(fixtures_dir, exist_ok=True)
+    paths = {
+        "search": lambda arg, n: fixture_filename(f"/search/%23jlpt-{arg}", {"page": [str(n)]}),
+        "verb": lambda arg, n: fixture_filename(f"/word/{arg}", {}),
+        "conjugation": lambda arg, n: fixture_filename("/VerbDetails.asp", {"txtVerb": [arg]}),
+    }
+    counters = {}
+    for kind, arg, content in corpus:
+        counters[(kind, arg)] = counters.get((kind, arg), 0) + 1
+        with open(os.path.join(fixtures_dir, paths[kind](arg, counters[(kind, arg)])), 'wb') as f:
+            f.write(content)
+
+PAGE_PARSERS = {
+    "search": lambda content, arg, parser: parse_jisho_search_page(content, arg, parser)[0],
+    "verb": parse_verb_content,
+    "conjugation": parse_verb_details,
+}
+
+def run_backend(pages, kind, parser, repeat):
+    parse = PAGE_PARSERS[kind]
+    # parse_verb_page 会打印进度, 计时时丢弃输出
+    with contextlib.redirect_stdout(io.StringIO()):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            records = [parse(content, arg, parser) for arg, content in pages]
+        elapsed = time.perf_counter() - start
+    return records, elapsed / (repeat * len(pages)) * 1000
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the HTML parser backends on saved pages.")
+    parser.add_argument("--cache-dir", default=None,
+                        help=f"Benchmark the pages in an http_fetch cache (e.g. {DEFAULT_CACHE_DIR})")
+    parser.add_argument("--fixtures", default=None, help="Benchmark saved fixture pages from this directory")
+    parser.add_argument("--pages", type=int, default=3, help="Synthetic corpus: search pages per level")
+    parser.add_argument("--verbs", default=DEFAULT_VERBS_FILE, help="Synthetic corpus: verbs for word/conjugator pages")
+    parser.add_argument("--save-fixtures", default=None, help="Write the synthetic corpus to this directory and exit")
+    parser.add_argument("--backends", nargs="+", choices=PARSER_BACKENDS, default=list(PARSER_BACKENDS))
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.cache_dir:
+        corpus = cache_corpus(args.cache_dir)
+    elif args.fixtures:
+        corpus = fixture_corpus(args.fixtures)
+    else:
+        corpus = synthetic_corpus(args.pages, args.verbs)
+    if args.save_fixtures:
+        save_corpus(corpus, args.save_fixtures)
+        print(f"Saved {len(corpus)} pages to {args.save_fixtures}")
+        return
+    if not corpus:
+        print("No pages to benchmark.")
+        return
+
+    backends = []
+    for backend in args.backends:
+        try:
+            parse_html(b"<html></html>", backend)
+            backends.append(backend)
+        except ImportError:
+            print(f"Skipping {backend}: not installed.")
+
+    print(f"--- {len(corpus)} pages, {args.repeat} repeats ---")
+    for kind in PAGE_PARSERS:
+        pages = [(arg, content) for page_kind_, arg, content in corpus if page_kind_ == kind]
+        if not pages:
+            continue
+        size = sum(len(content) for _, content in pages) / len(pages) / 1024
+        print(f"\n{kind}: {len(pages)} pages, {size:.1f} KiB on average")
+        reference = None
+        for backend in backends:
+            records, ms_per_page = run_backend(pages, kind, backend, args.repeat)
+            if reference is None:
+                reference, reference_ms = records, ms_per_page
+            mismatches = sum(1 for a, b in zip(reference, records) if a != b)
+            status = "identical" if not mismatches else f"{mismatches} pages differ from {backends[0]}"
+            print(f"  {backend:<11} {ms_per_page:8.3f} ms/page   x{reference_ms / ms_per_page:5.1f}   {status}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import contextlib
+import io
+import time
+from contextlib import closing
+from fixture_server import start_fixture_server
+from http_fetch import Fetcher
+from jisho_sources import HEADERS, jisho_search_url, parse_jisho_search_page
+from rate_control import AdaptiveRateController, RetryingFetcher
+from scrape_pipeline import FetchJob, FetchParsePipeline
+
+def crawl(server, pages, controller, fetch_workers, max_retries):
+    """Fetches `pages` search pages through the pipeline; returns (seconds, pages ok, rate samples)."""
+    fetcher = RetryingFetcher(Fetcher(HEADERS, cache_dir=None), controller, max_retries, backoff_base=0.25)
+    pipeline = FetchParsePipeline(fetcher, parse_jisho_search_page, fetch_workers)
+    jobs = [FetchJob(jisho_search_url("n5", page, server.base_url), ("n5",), page) for page in range(1, pages + 1)]
+    ok = 0
+    samples = []
+    start = time.perf_counter()
+    # 重试信息会逐条打印, 测量时丢弃
+    with contextlib.redirect_stdout(io.StringIO()), closing(pipeline.run(jobs)) as results:
+        for job, response, error, result in results:
+            ok += response is not None and response.status_code == 200
+            samples.append((time.perf_counter() - start, controller.rate))
+    elapsed = time.perf_counter() - start
+    fetcher.close()
+    return elapsed, ok, samples, fetcher.retries
+
+def rate_timeline(samples, step):
+    """Controller rate at every `step` seconds of the run."""
+    points, next_time = [], 0.0
+    for at, rate in samples:
+        if at >= next_time:
+            points.append(f"{rate:.1f}")
+            next_time += step
+    return " ".join(points)
+
+def main():
+    parser = argparse.ArgumentParser(description="Crawl a throttling fixture server with fixed and adaptive rates.")
+    parser.add_argument("--pages", type=int, default=200)
+    parser.add_argument("--server-rate", type=float, default=8.0, help="Requests per second the server accepts")
+    parser.add_argument("--retry-after", type=int, default=1)
+    parser.add_argument("--error-rate", type=float, default=0.02, help="Share of random 503s")
+    parser.add_argument("--rate", type=float, default=1.0, help="Initial client rate")
+    parser.add_argument("--max-rate", type=float, default=20.0)
+    parser.add_argument("--fetch-workers", type=int, default=4)
+    parser.add_argument("--max-retries", type=int, default=5)
+    args = parser.parse_args()
+
+    # (label, controller, retries): the fixed modes never change their rate, like the old time.sleep() loops
+    modes = [
+        ("fixed, no retries", lambda: AdaptiveRateController(args.rate, increase=0, decrease=1), 0),
+        ("fixed fast, no retries", lambda: AdaptiveRateController(args.max_rate, increase=0, decrease=1), 0),
+        ("fixed fast, retries", lambda: AdaptiveRateController(args.max_rate, increase=0, decrease=1),
+         args.max_retries),
+        ("adaptive", lambda: AdaptiveRateController(args.rate, args.max_rate), args.max_retries),
+    ]
+    print(f"--- {args.pages} pages, server limit {args.server_rate} req/s, "
+          f"Retry-After {args.retry_after}s, {args.error_rate:.0%} random 503 ---")
+    for label, make_controller, max_retries in modes:
+        server = start_fixture_server(pages=args.pages, throttle_rate=args.server_rate,
+                                      retry_after=args.retry_after, error_rate=args.error_rate)
+        controller = make_controller()
+        elapsed, ok, samples, retries = crawl(server, args.pages, controller, args.fetch_workers, max_retries)
+        server.shutdown()
+        server.server_close()
+        print(f"\n{label}: {elapsed:.1f}s, {ok / elapsed:.2f} pages/s, {ok}/{args.pages} pages, "
+              f"{args.pages - ok} lost")
+        print(f"  server: {server.requests} requests, {server.throttled} throttled (429), {server.errors} 503s; "
+              f"client retries: {retries}")
+        print(f"  rate every 2s: {rate_timeline(samples, 2.0)}")
+
+if __name__ == '__main__':
+    main()
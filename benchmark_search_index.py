@@ -0,0 +1,80 @@
+import argparse
+import json
+import random
+import time
+from search_index import VocabularySearchIndex
+
+def sample_terms(records, count, seed):
+    """WordContext-like search terms: short Japanese prefixes/substrings and English words."""
+    rng = random.Random(seed)
+    terms = []
+    while len(terms) < count and records:
+        record = rng.choice(records)
+        kind = rng.random()
+        if kind < 0.4 and record["japanese"]:
+            terms.append(record["japanese"][:rng.randint(1, 3)])
+        elif kind < 0.6 and record.get("furigana"):
+            text = record["furigana"]
+            start = rng.randrange(len(text))
+            terms.append(text[start:start + rng.randint(1, 3)])
+        else:
+            words = [w for w in record["english"].replace(";", " ").split() if w.isalpha()]
+            if words:
+                word = rng.choice(words).lower()
+                terms.append(word[:rng.randint(2, len(word))] if len(word) > 2 else word)
+    return terms
+
+def linear_search(records, term, limit):
+    """Baseline equivalent of the ilike '%term%' OR chain: one full scan per query."""
+    results = []
+    lowered = term.lower()
+    for record in records:
+        if (term in record["japanese"] or term in (record.get("furigana") or "")
+                or lowered in record["english"].lower()):
+            results.append(record)
+            if len(results) >= limit:
+                break
+    return results
+
+def measure(label, func, terms):
+    latencies = []
+    for term in terms:
+        start = time.perf_counter()
+        func(term)
+        latencies.append((time.perf_counter() - start) * 1000)
+    latencies.sort()
+
+    def pct(p):
+        return latencies[min(len(latencies) - 1, int(len(latencies) * p))]
+
+    print(f"{label:<18} p50 {pct(0.50):8.3f} ms   p95 {pct(0.95):8.3f} ms   "
+          f"p99 {pct(0.99):8.3f} ms   max {latencies[-1]:8.3f} ms")
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure query latency of the vocabulary search index.")
+    parser.add_argument("--input", default='vocabulary_final.json', help="Vocabulary used to sample terms")
+    parser.add_argument("--index", default='vocabulary_index.kpix')
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--limit", type=int, default=20, help="Results per query (WordContext page size)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    try:
+        with open(args.input, 'r', encoding='utf-8') as f:
+            records = json.load(f)
+        index = VocabularySearchIndex(args.index)
+    except FileNotFoundError as e:
+        print(f"Error: The file {e.filename} was not found.")
+        return
+
+    terms = sample_terms(records, args.queries, args.seed)
+    print(f"--- {len(terms)} queries over {len(records)} records (limit {args.limit}) ---")
+    with index:
+        measure("index.prefix", lambda t: index.prefix(t, args.limit), terms)
+        measure("index.substring", lambda t: index.substring(t, args.limit), terms)
+        measure("index.english", lambda t: index.english(t, args.limit), terms)
+        measure("index.search", lambda t: index.search(t, args.limit), terms)
+        measure("linear scan", lambda t: linear_search(records, t, args.limit), terms)
+
+if __name__ == '__main__':
+    main()
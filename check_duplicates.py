@@ -1,54 +1,213 @@
+"""Streaming duplicate check across vocabulary datasets.
 
+Any number of JSON-array or NDJSON files (jisho_vocabulary.json,
+vocabulary_final.json, public/words.json, ...) are read one record at a
+time. Each record is reduced to a normalized (japanese, furigana) key and
+only a 64-bit fingerprint of that key is kept, together with the position
+where it was first seen, in a compact open-addressing table (16 bytes per
+slot). Memory therefore grows with the number of unique keys, not with the
+records, and stays around 25-30 bytes per key even for multi-million-row
+inputs.
 
+    python check_duplicates.py jisho_vocabulary.json vocabulary_final.json public/words.json
+    python check_duplicates.py a.json b.ndjson --output merged.ndjson --format ndjson
+"""
+import argparse
 import json
-from collections import defaultdict
+import unicodedata
+from array import array
+import ijson
+from jmdict_json_parser import key_fingerprint
+from stream_writers import open_record_writer
 
-def check_duplicates(json_file_path: str):
-    """Checks for duplicate entries in the vocabulary JSON file based on (japanese, furigana) composite key."""
-    try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            words = json.load(f)
-    except FileNotFoundError:
-        print(f"Error: The file {json_file_path} was not found.")
-        return
-    except json.JSONDecodeError:
-        print(f"Error: Could not decode JSON from the file {json_file_path}.")
-        return
-
-    seen = set()
-    duplicates = []
-    unique_words = []
-
-    print(f"Starting to check for duplicates in {json_file_path}...")
-
-    for word in words:
-        # Create a unique key for each word based on its Japanese writing and furigana
-        # Treat empty or missing furigana as a distinct value (e.g., for katakana words)
-        furigana = word.get('furigana', '').strip()
-        key = (word.get('japanese', '').strip(), furigana)
-
-        if key in seen:
-            duplicates.append(word)
+DEFAULT_INPUTS = ['jisho_vocabulary.json']
+EXAMPLE_LIMIT = 10
+
+# 片假名 -> 平假名 (读音比较时不区分)
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+def is_kana(ch):
+    return "ぁ" <= ch <= "ゟ" or "゠" <= ch <= "ヿ"
+
+def fold_kana(text):
+    """NFKC without whitespace, katakana as hiragana (ﾃﾚﾋﾞ, テレビ -> てれび)."""
+    return "".join(unicodedata.normalize('NFKC', text or "").split()).translate(_KATAKANA_TO_HIRAGANA)
+
+def normalize_key(japanese, furigana):
+    """NFKC, no whitespace, hiragana reading; the reading is reduced to the part over the kanji.
+
+    Jisho's furigana only covers the kanji (食べる -> た) while JMdict
+    readings are complete (たべる), so kana the word starts or ends with
+    are stripped from the reading. Kana-only words get an empty reading.
+    """
+    japanese = "".join(unicodedata.normalize('NFKC', japanese or "").split())
+    reading = fold_kana(furigana)
+    word = japanese.translate(_KATAKANA_TO_HIRAGANA)
+    if reading == word:
+        return japanese, ""
+    # 去掉与词形共有的开头/结尾假名 (送假名)
+    while reading and word and is_kana(word[-1]) and reading[-1] == word[-1]:
+        reading, word = reading[:-1], word[:-1]
+    while reading and word and is_kana(word[0]) and reading[0] == word[0]:
+        reading, word = reading[1:], word[1:]
+    return japanese, reading
+
+def record_text(record):
+    """Original (japanese, furigana) for the scraper/JMdict vocabularies, words.json (word/reading) and verbs.json."""
+    japanese = record.get('japanese') or record.get('word') or record.get('verb')
+    furigana = record['furigana'] if 'furigana' in record else record.get('reading', "")
+    return japanese, furigana
+
+def record_key(record):
+    """Normalized (japanese, furigana) key of a record, or None without a Japanese form."""
+    japanese, furigana = record_text(record)
+    if not japanese:
+        return None
+    return normalize_key(japanese, furigana)
+
+def detect_format(path):
+    """"json" for a JSON array, otherwise "ndjson" (decided by the first non-blank byte)."""
+    with open(path, 'rb') as f:
+        return "json" if f.read(64).lstrip().startswith(b"[") else "ndjson"
+
+def iter_records(path):
+    """Records of a JSON array or NDJSON file, read incrementally. The format is detected from the first byte."""
+    with open(path, 'rb') as f:
+        head = f.read(64).lstrip()
+        f.seek(0)
+        if head.startswith(b"["):
+            yield from ijson.items(f, 'item')
         else:
-            seen.add(key)
-            unique_words.append(word)
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+class FingerprintTable:
+    """fingerprint -> first position, as two parallel uint64 arrays with linear probing."""
+
+    def __init__(self, capacity=1 << 16):
+        self._init(capacity)
+
+    def _init(self, capacity):
+        self.mask = capacity - 1
+        self.keys = array('Q', bytes(8 * capacity))
+        self.values = array('Q', bytes(8 * capacity))
+        self.size = 0
+
+    def _grow(self):
+        keys, values = self.keys, self.values
+        self._init(len(keys) * 2)
+        for key, value in zip(keys, values):
+            if key:
+                self.setdefault(key, value)
+
+    def setdefault(self, fingerprint, value):
+        """Stores value unless the fingerprint is known; returns the stored value (0 is the empty marker)."""
+        fingerprint = fingerprint or 1
+        slot = fingerprint & self.mask
+        keys = self.keys
+        while True:
+            key = keys[slot]
+            if key == fingerprint:
+                return self.values[slot]
+            if key == 0:
+                keys[slot] = fingerprint
+                self.values[slot] = value
+                self.size += 1
+                if self.size * 10 > len(keys) * 7:
+                    self._grow()
+                return value
+            slot = (slot + 1) & self.mask
+
+    @property
+    def nbytes(self):
+        return len(self.keys) * 16
+
+# 位置编码为 (文件序号 << 40) | 记录序号, 值 0 留作空槽标记, 所以记录序号从 1 开始
+def _pack(file_index, position):
+    return (file_index << 40) | (position + 1)
+
+def _unpack(value):
+    return value >> 40, (value & ((1 << 40) - 1)) - 1
+
+def check_duplicates(paths, output_path=None, output_format="json", example_limit=EXAMPLE_LIMIT):
+    """Checks the files for duplicate (japanese, furigana) keys, within and across files.
+
+    With output_path, the first record of every key is written there in input order.
+    """
+    table = FingerprintTable()
+    stats = [{"records": 0, "no_key": 0, "unique": 0, "duplicates": 0} for _ in paths]
+    pairs = {}
+    examples = []
+
+    out = open(output_path, 'w', encoding='utf-8') if output_path else None
+    writer = open_record_writer(out, output_format) if out else None
+    try:
+        for file_index, path in enumerate(paths):
+            print(f"Checking {path}...")
+            file_stats = stats[file_index]
+            try:
+                for position, record in enumerate(iter_records(path)):
+                    if (position + 1) % 500000 == 0:
+                        print(f"  {position + 1} records...")
+                    file_stats["records"] += 1
+                    key = record_key(record) if isinstance(record, dict) else None
+                    if key is None:
+                        file_stats["no_key"] += 1
+                        continue
+                    packed = _pack(file_index, position)
+                    first = table.setdefault(key_fingerprint(key), packed)
+                    if first == packed:
+                        file_stats["unique"] += 1
+                        if writer:
+                            writer.write(record)
+                        continue
+                    file_stats["duplicates"] += 1
+                    first_file, first_position = _unpack(first)
+                    pairs[(first_file, file_index)] = pairs.get((first_file, file_index), 0) + 1
+                    if len(examples) < example_limit:
+                        examples.append((record_text(record), first_file, first_position, file_index, position))
+            except FileNotFoundError:
+                print(f"Error: The file {path} was not found.")
+            except (ijson.JSONError, json.JSONDecodeError):
+                print(f"Error: Could not decode JSON from the file {path} (stopped after {file_stats['records']} records).")
+    finally:
+        if writer:
+            writer.close()
+            out.close()
 
     print("\n--- Duplicate Check Report ---")
-    print(f"Total entries in file: {len(words)}")
-    print(f"Number of unique words: {len(unique_words)}")
-    print(f"Number of duplicate entries found: {len(duplicates)}")
+    for path, file_stats in zip(paths, stats):
+        print(f"{path}: {file_stats['records']} records, {file_stats['unique']} new keys, "
+              f"{file_stats['duplicates']} duplicates, {file_stats['no_key']} without a key")
+    print(f"Unique keys: {table.size} (fingerprint table {table.nbytes / 1024 / 1024:.1f} MiB)")
+    # 64 位指纹的误判概率约为 n^2 / 2^65
+    print(f"Chance of any fingerprint collision: {table.size ** 2 / 2 ** 65:.1e}")
     print("---------------------------------")
 
-    if duplicates:
-        print("\nFirst 10 duplicate entries found:")
-        for i, dup in enumerate(duplicates[:10]):
-            print(f"  {i+1}. Japanese: {dup.get('japanese')}, Furigana: {dup.get('furigana')}")
+    if pairs:
+        print("\nDuplicates by file (first seen in -> repeated in):")
+        for (first_file, file_index), count in sorted(pairs.items()):
+            kind = "within file" if first_file == file_index else "cross-file"
+            print(f"  {paths[first_file]} -> {paths[file_index]}: {count} ({kind})")
+    if examples:
+        print(f"\nFirst {len(examples)} duplicate entries found:")
+        for i, ((japanese, furigana), first_file, first_position, file_index, position) in enumerate(examples):
+            print(f"  {i+1}. Japanese: {japanese}, Furigana: {furigana} - {paths[file_index]}#{position} "
+                  f"(first seen at {paths[first_file]}#{first_position})")
+    if output_path:
+        print(f"\nDeduplicated records saved to {output_path} ({writer.count} records).")
+    return stats
 
 def main():
     """Main function to run the duplicate check."""
-    json_file = 'jisho_vocabulary.json'
-    check_duplicates(json_file)
+    parser = argparse.ArgumentParser(description="Find duplicate (japanese, furigana) keys across vocabulary files.")
+    parser.add_argument("inputs", nargs="*", default=DEFAULT_INPUTS, help="JSON array or NDJSON files")
+    parser.add_argument("--output", default=None, help="Write the first record of every key to this file")
+    parser.add_argument("--format", choices=("json", "ndjson"), default="json", help="Output file format")
+    parser.add_argument("--examples", type=int, default=EXAMPLE_LIMIT, help="Duplicates to list in the report")
+    args = parser.parse_args()
+    check_duplicates(args.inputs, args.output, args.format, args.examples)
 
 if __name__ == '__main__':
     main()
-
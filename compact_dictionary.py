@@ -0,0 +1,266 @@
+"""Compact columnar binary format for the dictionary JSON artifacts.
+
+Layout (all integers little endian):
+
+    b"KPDB" | u32 header length | header JSON | padding to 8 bytes | body
+
+The header describes the record count, the interned string table and one
+column per field. Columns are stored in field order:
+
+    string  u32 id per record into the string table
+    json    u32 id of the compact JSON text of the value (forms, examples, ...)
+    enum    u8 code per record; the header lists the values (jlpt_level, type, group)
+    int     i32 per record (commonness_score); INT_NULL marks None
+
+The string table is a u32 offset array (count + 1 entries) followed by the
+UTF-8 bytes of every distinct string. CompactDictionary memory-maps the file
+and only decodes a record when it is accessed.
+"""
+import argparse
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from functools import lru_cache
+
+MAGIC = b"KPDB"
+FORMAT_VERSION = 1
+ENUM_FIELDS = ("jlpt_level", "type", "group")
+INT_NULL = -2**31
+
+def _json_text(value):
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+def _column_kind(name, values):
+    if name in ENUM_FIELDS and len(set(values)) <= 255:
+        return "enum"
+    if all(isinstance(v, str) for v in values):
+        return "string"
+    if all(v is None or (isinstance(v, int) and not isinstance(v, bool) and INT_NULL < v < 2**31)
+           for v in values):
+        return "int"
+    return "json"
+
+def _to_le_bytes(arr):
+    if sys.byteorder != "little":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+def _pad(data, alignment=8):
+    return data + b"\0" * (-len(data) % alignment)
+
+def encode_records(records):
+    """Encodes a list of dicts that share the same keys into the compact format."""
+    field_names = list(records[0].keys()) if records else []
+    for i, record in enumerate(records):
+        if list(record.keys()) != field_names:
+            raise ValueError(f"Record {i} does not have the fields {field_names}")
+
+    strings = {}
+
+    def intern(text):
+        string_id = strings.get(text)
+        if string_id is None:
+            string_id = strings[text] = len(strings)
+        return string_id
+
+    fields = []
+    sections = []
+    for name in field_names:
+        values = [record[name] for record in records]
+        kind = _column_kind(name, values)
+        field = {"name": name, "kind": kind}
+        if kind == "enum":
+            enum_values = list(dict.fromkeys(values))
+            codes = {value: code for code, value in enumerate(enum_values)}
+            field["values"] = enum_values
+            column = array("B", (codes[v] for v in values)).tobytes()
+        elif kind == "int":
+            column = _to_le_bytes(array("i", (INT_NULL if v is None else v for v in values)))
+        elif kind == "string":
+            column = _to_le_bytes(array("I", (intern(v) for v in values)))
+        else:
+            column = _to_le_bytes(array("I", (intern(_json_text(v)) for v in values)))
+        fields.append(field)
+        sections.append(column)
+
+    encoded = [text.encode("utf-8") for text in strings]
+    offsets = array("I", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    string_offsets = _to_le_bytes(offsets)
+    string_data = b"".join(encoded)
+
+    # 计算每个区段相对于 body 起点的偏移量
+    body = bytearray()
+    for field, column in zip(fields, sections):
+        field["offset"] = len(body)
+        body += _pad(column)
+    strings_header = {"count": len(encoded), "offsets": len(body)}
+    body += _pad(string_offsets)
+    strings_header["data"] = len(body)
+    body += string_data
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "count": len(records),
+        "fields": fields,
+        "strings": strings_header,
+    }, ensure_ascii=False).encode("utf-8")
+    prefix = _pad(MAGIC + struct.pack("<I", len(header)) + header)
+    return prefix + bytes(body)
+
+class CompactDictionary:
+    """Read-only, memory-mapped view of a compact dictionary file.
+
+    Records are decoded on access; len(), indexing, slicing and iteration
+    behave like the original list of dicts. base_offset allows reading a
+    compact dictionary embedded in a larger file (it must be 8-byte aligned).
+    """
+
+    def __init__(self, path, base_offset=0):
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[base_offset:base_offset + 4] != MAGIC:
+            self.close()
+            raise ValueError(f"{path} is not a compact dictionary file")
+        (header_len,) = struct.unpack_from("<I", self._mm, base_offset + 4)
+        header = json.loads(self._mm[base_offset + 8:base_offset + 8 + header_len].decode("utf-8"))
+        if header["version"] != FORMAT_VERSION:
+            self.close()
+            raise ValueError(f"Unsupported compact dictionary version: {header['version']}")
+        body_start = base_offset + 8 + header_len + (-(8 + header_len) % 8)
+
+        self.count = header["count"]
+        self.fields = header["fields"]
+        self.field_names = [field["name"] for field in self.fields]
+        view = memoryview(self._mm)
+        self._views = [view]
+        self._columns = {}
+        for field in self.fields:
+            start = body_start + field["offset"]
+            if field["kind"] == "enum":
+                self._columns[field["name"]] = self._slice(view, start, start + self.count)
+            else:
+                typecode = "i" if field["kind"] == "int" else "I"
+                self._columns[field["name"]] = self._typed_view(view, start, self.count, typecode)
+
+        strings = header["strings"]
+        self._string_offsets = self._typed_view(view, body_start + strings["offsets"], strings["count"] + 1, "I")
+        self._string_data = body_start + strings["data"]
+        self._string = lru_cache(maxsize=65536)(self._decode_string)
+
+    def _slice(self, view, start, end):
+        # 记录所有派生出的 memoryview, close() 时必须先释放它们才能关闭 mmap
+        sliced = view[start:end]
+        self._views.append(sliced)
+        return sliced
+
+    def _typed_view(self, view, start, count, typecode):
+        raw = self._slice(view, start, start + 4 * count)
+        if sys.byteorder == "little":
+            typed = raw.cast(typecode)
+            self._views.append(typed)
+            return typed
+        # 大端机器上无法直接映射, 退化为复制一份并转换字节序
+        arr = array(typecode, raw.tobytes())
+        arr.byteswap()
+        return arr
+
+    def _decode_string(self, string_id):
+        start = self._string_data + self._string_offsets[string_id]
+        end = self._string_data + self._string_offsets[string_id + 1]
+        return self._mm[start:end].decode("utf-8")
+
+    def get_field(self, index, name):
+        """Decodes a single field of a single record."""
+        field = self.fields[self.field_names.index(name)]
+        return self._decode_value(field, index)
+
+    def _decode_value(self, field, index):
+        raw = self._columns[field["name"]][index]
+        kind = field["kind"]
+        if kind == "enum":
+            return field["values"][raw]
+        if kind == "int":
+            return None if raw == INT_NULL else raw
+        if kind == "string":
+            return self._string(raw)
+        return json.loads(self._string(raw))
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.count))]
+        if index < 0:
+            index += self.count
+        if not 0 <= index < self.count:
+            raise IndexError("record index out of range")
+        return {field["name"]: self._decode_value(field, index) for field in self.fields}
+
+    def __iter__(self):
+        for i in range(self.count):
+            yield self[i]
+
+    def close(self):
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._views = []
+        if not self._mm.closed:
+            self._mm.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def json_to_compact(json_path, compact_path):
+    with open(json_path, "r", encoding="utf-8") as f:
+        records = json.load(f)
+    data = encode_records(records)
+    with open(compact_path, "wb") as f:
+        f.write(data)
+    return len(records)
+
+def compact_to_json(compact_path, json_path):
+    with CompactDictionary(compact_path) as dictionary:
+        records = list(dictionary)
+    with open(json_path, "w", encoding="utf-8") as f:
+        json.dump(records, f, ensure_ascii=False, indent=2)
+    return len(records)
+
+def main():
+    parser = argparse.ArgumentParser(description="Convert dictionary JSON files to and from the compact binary format.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    encode_parser = subparsers.add_parser("encode", help="JSON -> compact binary")
+    encode_parser.add_argument("input")
+    encode_parser.add_argument("output")
+    decode_parser = subparsers.add_parser("decode", help="compact binary -> JSON")
+    decode_parser.add_argument("input")
+    decode_parser.add_argument("output")
+    args = parser.parse_args()
+
+    try:
+        if args.command == "encode":
+            count = json_to_compact(args.input, args.output)
+        else:
+            count = compact_to_json(args.input, args.output)
+    except FileNotFoundError:
+        print(f"Error: The file {args.input} was not found.")
+        return
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+
+    print(f"Converted {count} records: {args.input} ({os.path.getsize(args.input)} bytes) -> "
+          f"{args.output} ({os.path.getsize(args.output)} bytes)")
+
+if __name__ == '__main__':
+    main()
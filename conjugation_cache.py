@@ -0,0 +1,114 @@
+import json
+import os
+import sqlite3
+from collections import OrderedDict
+
+DEFAULT_CACHE_PATH = 'conjugation_cache.sqlite'
+DEFAULT_LRU_SIZE = 4096
+
+def get_conjugator_version(package_name="japanese-verb-conjugator-v2"):
+    """Returns the installed conjugator version, used as part of the cache key."""
+    try:
+        from importlib.metadata import version, PackageNotFoundError
+    except ImportError:
+        return "unknown"
+    try:
+        return version(package_name)
+    except PackageNotFoundError:
+        return "unknown"
+
+class ConjugationCache:
+    """Two-level cache for verb conjugations.
+
+    Lookups go to an in-process LRU first and then to a SQLite table keyed by
+    (verb, group, conjugator version). Newly computed forms are written to the
+    database and committed on flush(), so later builds can reuse them.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_PATH, version=None, lru_size=DEFAULT_LRU_SIZE):
+        self.path = path
+        self.version = version or get_conjugator_version()
+        self.lru_size = lru_size
+        self._lru = OrderedDict()
+        self._pending_writes = 0
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        # 多个工作进程可能同时写入, WAL 模式加上等待超时可以避免 "database is locked"
+        self._conn = sqlite3.connect(path, timeout=30)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS conjugations ("
+            " verb TEXT NOT NULL,"
+            " verb_group TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " forms TEXT NOT NULL,"
+            " PRIMARY KEY (verb, verb_group, version))"
+        )
+        self._conn.commit()
+
+    def _remember(self, key, forms):
+        self._lru[key] = forms
+        self._lru.move_to_end(key)
+        if len(self._lru) > self.lru_size:
+            self._lru.popitem(last=False)
+
+    def get_or_compute(self, verb, verb_group, compute):
+        """Returns cached forms for (verb, verb_group), calling compute() on a miss."""
+        key = (verb, verb_group)
+        forms = self._lru.get(key)
+        if forms is not None:
+            self._lru.move_to_end(key)
+            self.memory_hits += 1
+            return forms
+
+        row = self._conn.execute(
+            "SELECT forms FROM conjugations WHERE verb = ? AND verb_group = ? AND version = ?",
+            (verb, verb_group, self.version),
+        ).fetchone()
+        if row is not None:
+            forms = json.loads(row[0])
+            self.disk_hits += 1
+        else:
+            forms = compute(verb, verb_group)
+            self.misses += 1
+            self._conn.execute(
+                "INSERT OR REPLACE INTO conjugations (verb, verb_group, version, forms) VALUES (?, ?, ?, ?)",
+                (verb, verb_group, self.version, json.dumps(forms, ensure_ascii=False)),
+            )
+            self._pending_writes += 1
+
+        self._remember(key, forms)
+        return forms
+
+    def flush(self):
+        if self._pending_writes:
+            self._conn.commit()
+            self._pending_writes = 0
+
+    def take_stats(self):
+        """Returns the hit/miss counters since the last call and resets them."""
+        stats = {"memory_hits": self.memory_hits, "disk_hits": self.disk_hits, "misses": self.misses}
+        self.memory_hits = self.disk_hits = self.misses = 0
+        return stats
+
+    def close(self):
+        self.flush()
+        self._conn.close()
+
+def merge_stats(total, delta):
+    for name, count in delta.items():
+        total[name] = total.get(name, 0) + count
+    return total
+
+def format_stats(stats):
+    hits = stats.get("memory_hits", 0) + stats.get("disk_hits", 0)
+    lookups = hits + stats.get("misses", 0)
+    hit_rate = (hits / lookups * 100) if lookups else 0.0
+    return (f"{lookups} lookups, {stats.get('memory_hits', 0)} memory hits, "
+            f"{stats.get('disk_hits', 0)} disk hits, {stats.get('misses', 0)} misses "
+            f"({hit_rate:.1f}% hit rate)")
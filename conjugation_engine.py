@@ -0,0 +1,207 @@
+"""Table-driven conjugation for JMdict verbs and adjectives.
+
+Every inflection is "strip a known ending, append a suffix". The suffixes for
+each (group, ending) pair are computed once at import time, so conjugating a
+word is a dictionary lookup plus string concatenation.
+"""
+
+ENGINE_VERSION = "native-1"
+
+# 五段动词: 词尾 -> (あ段, い段, え段, お段, て形, た形)
+GODAN_ROWS = {
+    "う": ("わ", "い", "え", "お", "って", "った"),
+    "く": ("か", "き", "け", "こ", "いて", "いた"),
+    "ぐ": ("が", "ぎ", "げ", "ご", "いで", "いだ"),
+    "す": ("さ", "し", "せ", "そ", "して", "した"),
+    "つ": ("た", "ち", "て", "と", "って", "った"),
+    "ぬ": ("な", "に", "ね", "の", "んで", "んだ"),
+    "ぶ": ("ば", "び", "べ", "ぼ", "んで", "んだ"),
+    "む": ("ま", "み", "め", "も", "んで", "んだ"),
+    "る": ("ら", "り", "れ", "ろ", "って", "った"),
+    # 行く的て形/た形不规则
+    "行く": ("行か", "行き", "行け", "行こ", "行って", "行った"),
+    "いく": ("いか", "いき", "いけ", "いこ", "いって", "いった"),
+}
+
+def _godan_suffixes(row):
+    a, i, e, o, te, ta = row
+    return {
+        "masu_form": i + "ます",
+        "te_form": te,
+        "past_form": ta,
+        "nai_form": a + "ない",
+        "volitional_form": o + "う",
+        "potential_form": e + "る",
+        "passive_form": a + "れる",
+        "conditional_ba_form": e + "ば",
+        "imperative_form": e,
+        "causative_form": a + "せる",
+    }
+
+def _suru_suffixes(prefix):
+    return {
+        "masu_form": prefix + "します",
+        "te_form": prefix + "して",
+        "past_form": prefix + "した",
+        "nai_form": prefix + "しない",
+        "volitional_form": prefix + "しよう",
+        "potential_form": prefix + "できる",
+        "passive_form": prefix + "される",
+        "conditional_ba_form": prefix + "すれば",
+        "imperative_form": prefix + "しろ",
+        "causative_form": prefix + "させる",
+    }
+
+def _kuru_suffixes(ku, ki, ko):
+    return {
+        "masu_form": ki + "ます",
+        "te_form": ki + "て",
+        "past_form": ki + "た",
+        "nai_form": ko + "ない",
+        "volitional_form": ko + "よう",
+        "potential_form": ko + "られる",
+        "passive_form": ko + "られる",
+        "conditional_ba_form": ku + "れば",
+        "imperative_form": ko + "い",
+        "causative_form": ko + "させる",
+    }
+
+# group -> {词尾: 活用后缀}. 词尾按长度从长到短匹配, "" 表示直接在词后追加 (如 名词 + する).
+VERB_SUFFIX_TABLES = {
+    "godan": {ending: _godan_suffixes(row) for ending, row in GODAN_ROWS.items()},
+    "ichidan": {
+        "る": {
+            "masu_form": "ます",
+            "te_form": "て",
+            "past_form": "た",
+            "nai_form": "ない",
+            "volitional_form": "よう",
+            "potential_form": "られる",
+            "passive_form": "られる",
+            "conditional_ba_form": "れば",
+            "imperative_form": "ろ",
+            "causative_form": "させる",
+        },
+    },
+    "suru": {
+        "する": _suru_suffixes(""),
+        "": _suru_suffixes(""),
+    },
+    "kuru": {
+        "来る": _kuru_suffixes("来", "来", "来"),
+        "來る": _kuru_suffixes("來", "來", "來"),
+        "くる": _kuru_suffixes("く", "き", "こ"),
+    },
+}
+
+# 个别词条的不规则形式, 在查表结果之上覆盖
+VERB_IRREGULARS = {
+    "ある": {"nai_form": "ない"},
+    "有る": {"nai_form": "ない"},
+    "在る": {"nai_form": "ない"},
+}
+
+ADJECTIVE_SUFFIX_TABLES = {
+    "i-adjective": {
+        "いい": {
+            "negative": "よくない",
+            "past": "よかった",
+            "past_negative": "よくなかった",
+            "te_form": "よくて",
+            "conditional_ba": "よければ",
+            "volitional": "よかろう",
+        },
+        "い": {
+            "negative": "くない",
+            "past": "かった",
+            "past_negative": "くなかった",
+            "te_form": "くて",
+            "conditional_ba": "ければ",
+            "volitional": "かろう",
+        },
+    },
+    "na-adjective": {
+        "": {
+            "plain_form": "だ",
+            "negative": "ではない",
+            "past": "だった",
+            "past_negative": "ではなかった",
+            "te_form": "で",
+            "conditional_ba": "ならば",
+        },
+    },
+}
+
+def _sorted_endings(tables):
+    return {group: sorted(table, key=len, reverse=True) for group, table in tables.items()}
+
+# "いい" 结尾只对这些词条使用不规则变化 (かわいい 等仍按普通い形容词处理)
+IRREGULAR_II_ADJECTIVES = {"いい", "かっこいい", "格好いい"}
+
+_VERB_ENDINGS = _sorted_endings(VERB_SUFFIX_TABLES)
+_ADJECTIVE_ENDINGS = {
+    "i-adjective": ["い"],
+    "na-adjective": [""],
+}
+
+def _match_ending(word, endings):
+    for ending in endings:
+        if word.endswith(ending):
+            return ending
+    return None
+
+def conjugate_verb_native(verb, verb_group):
+    """Conjugates a single verb. Returns {} when the group/ending is not covered."""
+    endings = _VERB_ENDINGS.get(verb_group)
+    if not endings:
+        return {}
+    ending = _match_ending(verb, endings)
+    if ending is None:
+        return {}
+    stem = verb[:len(verb) - len(ending)]
+    forms = {"dictionary_form": verb}
+    for key, suffix in VERB_SUFFIX_TABLES[verb_group][ending].items():
+        forms[key] = stem + suffix
+    irregular = VERB_IRREGULARS.get(verb)
+    if irregular:
+        forms.update(irregular)
+    return forms
+
+def conjugate_adjective_native(adjective, adj_type):
+    """Conjugates an i/na adjective using the same keys as jmdict_processor.conjugate_adjective."""
+    forms = {"dictionary_form": adjective}
+    endings = _ADJECTIVE_ENDINGS.get(adj_type)
+    if not endings:
+        return forms
+    if adj_type == "i-adjective" and adjective in IRREGULAR_II_ADJECTIVES:
+        ending = "いい"
+    else:
+        ending = _match_ending(adjective, endings)
+    if ending is None:
+        return forms
+    stem = adjective[:len(adjective) - len(ending)]
+    for key, suffix in ADJECTIVE_SUFFIX_TABLES[adj_type][ending].items():
+        forms[key] = stem + suffix
+    return forms
+
+def conjugate_batch(pairs):
+    """Conjugates a batch of (lemma, group) pairs in one call.
+
+    group is a verb group ("godan", "ichidan", "suru", "kuru") or an adjective
+    type ("i-adjective", "na-adjective"). Returns one forms dict per pair, in
+    input order. Repeated pairs inside a batch are only conjugated once.
+    """
+    results = []
+    seen = {}
+    for pair in pairs:
+        forms = seen.get(pair)
+        if forms is None:
+            lemma, group = pair
+            if group in VERB_SUFFIX_TABLES:
+                forms = conjugate_verb_native(lemma, group)
+            else:
+                forms = conjugate_adjective_native(lemma, group)
+            seen[pair] = forms
+        # 每条记录拿到独立的 dict, 避免调用方修改时互相影响
+        results.append(dict(forms))
+    return results
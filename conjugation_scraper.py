@@ -1,9 +1,14 @@
 # -*- coding: utf-8 -*-
+import argparse
 import requests
-from bs4 import BeautifulSoup
-import json
-import time
-import random
+from contextlib import closing
+from html_backends import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS, check_parser_backend, parse_html
+from http_fetch import Fetcher, add_fetch_arguments, fetcher_from_args, is_transient_error
+from hybrid_conjugation import VerificationReport, add_hybrid_arguments, load_verb_dictionary, plan_hybrid, report_path_for
+from rate_control import AdaptiveRateController, RetryingFetcher, add_rate_arguments, retrying_fetcher_from_args
+from scrape_journal import ScrapeJournal, list_fingerprint
+from scrape_pipeline import FetchJob, add_pipeline_arguments, pipeline_from_args
+from sharded_output import DEFAULT_SHARD_SIZE, shard_output_dir, verbs_partition, write_sharded
 
 # --- 1. 精心准备的高频词例句 ---
 CURATED_EXAMPLES = {
@@ -77,18 +82,22 @@ HEADERS = {
     'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36'
 }
 
-def parse_conjugation_page(html_content):
-    soup = BeautifulSoup(html_content, 'html.parser')
+CONJUGATION_PAGE_SUBTREES = ('span.kana', 'span.english', 'span.verb-type', 'table.verb-conjugation-table')
+
+def parse_conjugation_page(html_content, parser=DEFAULT_PARSER_BACKEND):
+    return conjugation_forms(parse_html(html_content, parser, only=CONJUGATION_PAGE_SUBTREES))
+
+def conjugation_forms(doc):
     forms = {}
     
     # 查找包含活用表格的区域
-    conjugation_table = soup.find('table', class_='verb-conjugation-table')
+    conjugation_table = doc.select_one('table.verb-conjugation-table')
     if not conjugation_table:
         return forms
 
-    rows = conjugation_table.find_all('tr')
+    rows = conjugation_table.select('tr')
     for row in rows:
-        cols = row.find_all('td')
+        cols = row.select('td')
         if len(cols) >= 2:
             form_name_raw = cols[0].text.strip()
             form_value = cols[1].text.strip()
@@ -111,57 +120,91 @@ def parse_conjugation_page(html_content):
             
     return forms
 
-def get_verb_details(verb_dict_form):
-    base_url = "https://www.japaneseverbconjugator.com/VerbDetails.asp?txtVerb="
-    url = base_url + requests.utils.quote(verb_dict_form) # URL编码
+CONJUGATOR_BASE_URL = "https://www.japaneseverbconjugator.com"
+
+def conjugator_url(verb_dict_form, site_url=CONJUGATOR_BASE_URL):
+    base_url = f"{site_url}/VerbDetails.asp?txtVerb="
+    return base_url + requests.utils.quote(verb_dict_form) # URL编码
+
+def parse_verb_details(html_content, verb_dict_form, parser=DEFAULT_PARSER_BACKEND):
+    """Builds the verb record from a conjugator page (also the scrape pipeline's parse stage)."""
+    # 页面只解析一次, 活用表也从同一棵树中读取
+    doc = parse_html(html_content, parser, only=CONJUGATION_PAGE_SUBTREES)
+    
+    # 提取读音 (kana)
+    reading = ""
+    reading_tag = doc.select_one('span.kana')
+    if reading_tag: reading = reading_tag.text.strip()
+
+    # 提取释义 (meaning)
+    meaning = ""
+    meaning_tag = doc.select_one('span.english')
+    if meaning_tag: meaning = meaning_tag.text.strip()
+
+    # 提取动词类型 (group) 和 JLPT Level
+    group = "Unknown"
+    jlpt_level = "Unknown"
+    
+    # 查找包含动词类型信息的标签
+    type_tag = doc.select_one('span.verb-type')
+    if type_tag:
+        type_text = type_tag.text.strip().lower()
+        if "ichidan" in type_text: group = "ichidan"
+        elif "godan" in type_text: group = "godan"
+        elif "suru" in type_text: group = "suru"
+        elif "kuru" in type_text: group = "kuru"
+
+    forms = conjugation_forms(doc)
+    
+    return {
+        "verb": verb_dict_form,
+        "reading": reading,
+        "meaning": meaning,
+        "jlpt_level": jlpt_level,
+        "group": group,
+        "forms": forms,
+        "examples": CURATED_EXAMPLES.get(verb_dict_form, [])
+    }
+
+def get_verb_details(verb_dict_form, fetcher=None, site_url=CONJUGATOR_BASE_URL, parser=DEFAULT_PARSER_BACKEND):
+    """Returns the verb record, or None if the page could not be fetched.
+
+    Transient errors (connection problems, 403/429, 5xx) are re-raised so
+    the caller can stop and resume later instead of skipping the verb.
+    """
+    fetcher = fetcher or RetryingFetcher(Fetcher(HEADERS, timeout=10), AdaptiveRateController(0.67))
+    url = conjugator_url(verb_dict_form, site_url)
     
     try:
-        response = requests.get(url, headers=HEADERS, timeout=10)
+        response = fetcher.get(url)
         response.raise_for_status() # 检查HTTP错误
-        
-        # 确保BeautifulSoup使用正确的编码
-        soup = BeautifulSoup(response.content, 'html.parser', from_encoding='utf-8')
-        
-        # 提取读音 (kana)
-        reading = ""
-        reading_tag = soup.find('span', class_='kana')
-        if reading_tag: reading = reading_tag.text.strip()
-
-        # 提取释义 (meaning)
-        meaning = ""
-        meaning_tag = soup.find('span', class_='english')
-        if meaning_tag: meaning = meaning_tag.text.strip()
-
-        # 提取动词类型 (group) 和 JLPT Level
-        group = "Unknown"
-        jlpt_level = "Unknown"
-        
-        # 查找包含动词类型信息的标签
-        type_tag = soup.find('span', class_='verb-type')
-        if type_tag:
-            type_text = type_tag.text.strip().lower()
-            if "ichidan" in type_text: group = "ichidan"
-            elif "godan" in type_text: group = "godan"
-            elif "suru" in type_text: group = "suru"
-            elif "kuru" in type_text: group = "kuru"
-
-        forms = parse_conjugation_page(response.content)
-        
-        return {
-            "verb": verb_dict_form,
-            "reading": reading,
-            "meaning": meaning,
-            "jlpt_level": jlpt_level,
-            "group": group,
-            "forms": forms,
-            "examples": CURATED_EXAMPLES.get(verb_dict_form, [])
-        }
+        return parse_verb_details(response.content, verb_dict_form, parser)
         
     except requests.exceptions.RequestException as e:
         print(f"Error fetching {url}: {e}")
+        if is_transient_error(e):
+            raise
         return None
 
 def main():
+    parser = argparse.ArgumentParser(description="Scrape verb conjugations into public/verbs.json.")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Also write the output as verb group shards plus a manifest")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE,
+                        help="Maximum number of verbs per shard")
+    parser.add_argument("--base-url", default=CONJUGATOR_BASE_URL,
+                        help="Site to crawl (e.g. a local fixture server)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Discard the journal of an interrupted run instead of resuming it")
+    parser.add_argument("--parser", choices=PARSER_BACKENDS, default=DEFAULT_PARSER_BACKEND,
+                        help="HTML parser backend")
+    add_hybrid_arguments(parser)
+    add_fetch_arguments(parser)
+    add_pipeline_arguments(parser)
+    add_rate_arguments(parser, rate=0.67)
+    args = parser.parse_args()
+    check_parser_backend(args.parser)
+
     print("--- Starting Japanese Verb Conjugation Scraper ---")
     
     verbs_to_scrape = load_verb_list()
@@ -169,26 +212,95 @@ def main():
         print("No verbs found in japanese_verbs.txt. Exiting.")
         return
 
-    all_verbs_data = []
+    output_filename = 'public/verbs.json'
+    meta = {"base_url": args.base_url, "verbs": list_fingerprint(verbs_to_scrape)}
+    # 混合模式: 本地生成活用, 只抓取抽样核对的动词和词典中没有的动词
+    local_records, verify = {}, set()
+    if args.hybrid:
+        dictionary = load_verb_dictionary(args.dictionary)
+        local_records, verify = plan_hybrid(verbs_to_scrape, dictionary, CURATED_EXAMPLES, args.sample, args.seed)
+        meta.update({"hybrid": True, "dictionary": list_fingerprint(sorted(local_records)), "sample": args.sample,
+                     "seed": args.seed})
+        print(f"Hybrid mode: {len(local_records)} of {len(verbs_to_scrape)} verbs generated locally, "
+              f"{len(verify)} of them verified remotely.")
+    journal = ScrapeJournal(output_filename, meta, args.restart)
+    start = journal.cursor.get("next_index", 0)
+    if journal.resumed:
+        print(f"Resuming at verb #{start} ({journal.records} verbs already scraped).")
+    report = VerificationReport(journal.cursor.get("verification"))
+
+    # 自适应限速: 正常时逐步加快, 遇到 429/503 减速并重试, 避免被封
+    fetcher = retrying_fetcher_from_args(args, fetcher_from_args(args, HEADERS, timeout=10))
+    pipeline = pipeline_from_args(args, fetcher, parse_verb_details)
+    jobs = [FetchJob(conjugator_url(verbs_to_scrape[index], args.base_url), (verbs_to_scrape[index], args.parser), index)
+            for index in range(start, len(verbs_to_scrape))
+            if verbs_to_scrape[index] not in local_records or verbs_to_scrape[index] in verify]
+    stopped = False
     
-    for verb in verbs_to_scrape:
-        print(f"Processing verb: {verb}")
-        details = get_verb_details(verb)
-        if details:
-            all_verbs_data.append(details)
-            print(f"  - Successfully processed {verb}.")
-        else:
-            print(f"  - Failed to process {verb}. Skipping.")
-        
-        time.sleep(random.uniform(1, 2)) # 随机延迟，避免被封
+    try:
+        with closing(pipeline.run(jobs)) as pages:
+            for index in range(start, len(verbs_to_scrape)):
+                verb = verbs_to_scrape[index]
+                print(f"Processing verb: {verb}")
+                details = local_records.get(verb)
+                if details is None or verb in verify:
+                    # 任务与动词列表同序, 下一个结果就是这个动词的页面
+                    job, response, error, remote = next(pages)
+                    if error is None:
+                        try:
+                            response.raise_for_status() # 检查HTTP错误
+                        except requests.exceptions.RequestException as e:
+                            error = e
+                    if error is not None:
+                        print(f"Error fetching {job.url}: {error}")
+                        if is_transient_error(error):
+                            print("  - Stopping, run again to resume.")
+                            stopped = True
+                            break
+                    if details is None:
+                        details = remote
+                    else:
+                        report.add(details, remote)
+                if details:
+                    journal.append(details)
+                    print(f"  - Successfully processed {verb}.")
+                else:
+                    print(f"  - Failed to process {verb}. Skipping.")
+                journal.commit({"next_index": index + 1, "verification": report.state} if args.hybrid
+                               else {"next_index": index + 1})
+    finally:
+        pipeline.close()
+        fetcher.close()
+    print(fetcher.format_stats())
+    print(pipeline.format_metrics())
 
-    output_filename = 'public/verbs.json'
-    with open(output_filename, 'w', encoding='utf-8') as f:
-        json.dump(all_verbs_data, f, ensure_ascii=False, indent=2)
+    if stopped or journal.cursor.get("next_index", 0) < len(verbs_to_scrape):
+        # 没有抓完: 不覆盖输出文件, 保留日志以便下次继续
+        journal.close()
+        print(f"\n--- Stopped: {journal.records} of {len(verbs_to_scrape)} verbs scraped so far ---")
+        print(f"{output_filename} was not written. Run again to resume from {journal.cursor_path}.")
+        raise SystemExit(1)
+
+    # 由日志流式生成 JSON 文件
+    count = journal.compact()
+
+    if args.hybrid:
+        report_path = report_path_for(output_filename)
+        report.write(report_path, args.base_url, len(verbs_to_scrape), len(local_records))
+        print(report.format_summary())
+        print(f"Verification report saved to {report_path}")
+
+    if args.sharded:
+        shard_dir = shard_output_dir(output_filename)
+        manifest = write_sharded(list(journal.iter_records()), shard_dir, "verbs", "verb", verbs_partition,
+                                 args.shard_size)
+        print(f"Saved {len(manifest['shards'])} shards to {shard_dir}/")
+
+    journal.remove()
 
     print(f"\n--- All Done! ---")
-    print(f"Successfully scraped {len(all_verbs_data)} verbs.")
+    print(f"Successfully scraped {count} verbs.")
     print(f"Data saved to {output_filename}")
 
 if __name__ == '__main__':
-    main()
+    main()
\ No newline at end of file
@@ -0,0 +1,451 @@
+"""Local stand-in for jisho.org, used to test the scrapers without touching the real site.
+
+Serves deterministic, synthetic pages in the layout the parsers expect:
+
+    /search/%23jlpt-n5?page=1   -> a page of concept_light blocks
+    /search/%23jlpt-n5?page=99  -> a page without results (end of the level)
+    /api/v1/search/words?keyword=%23jlpt-n5&page=1 -> the same results as JSON search API output
+    /word/食べる                 -> a Jisho word page with an inflection table
+    /VerbDetails.asp?txtVerb=食べる -> a japaneseverbconjugator.com verb page
+
+Search results follow the live markup: one furigana span per character
+of the word, holding the reading of a kanji and empty over kana (食べる ->
+"た"), and the part of speech in div.meaning-tags.
+
+Word and conjugator pages are generated for the verbs in --verbs
+(public/verbs.json by default) plus the reference verbs below. Their forms
+are written out by hand (suru compounds are built from する), not derived
+with conjugation_engine, so hybrid verification checks the engine against
+independent data. Other verbs get a 404.
+
+Pages saved from the real site can be served instead with --fixtures: a
+request for /search/%23jlpt-n5?page=2 looks for the file
+"search_jlpt-n5_page-2.html" in that directory (".json" for /api/ URLs).
+
+Responses carry an ETag and answer If-None-Match with 304, so the
+http_fetch cache revalidation can be tested too.
+
+--throttle-rate makes the server behave like a rate-limited site: requests
+beyond that many per second (token bucket) get a 429, with a Retry-After
+header when --retry-after is given. --error-rate answers that fraction of
+the requests with a 503. Both exercise rate_control.
+
+    python fixture_server.py --port 8765 --pages 3 --delay 0.05
+    python fixture_server.py --port 8765 --throttle-rate 3 --retry-after 1 --error-rate 0.02
+    python jisho_scraper.py --base-url http://127.0.0.1:8765 --async
+"""
+import argparse
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, unquote, urlsplit
+
+DEFAULT_PAGES_PER_LEVEL = 3
+DEFAULT_WORDS_PER_PAGE = 20
+DEFAULT_VERBS_FILE = 'public/verbs.json'
+LEVEL_INDEX = {'n5': 5, 'n4': 4, 'n3': 3, 'n2': 2, 'n1': 1}
+POS_TAGS = ["Noun", "Godan verb with 'ku' ending, Transitive verb", "Ichidan verb", "I-adjective"]
+
+BLOCK_TEMPLATE = """<div class="concept_light clearfix">
+  <div class="concept_light-wrapper">
+    <div class="concept_light-readings">
+      <div class="concept_light-representation">
+        <span class="furigana">{furigana}</span>
+        <span class="text">{word}</span>
+      </div>
+    </div>
+  </div>
+  <div class="concept_light-meanings">
+    <div class="meanings-wrapper">
+      <div class="meaning-tags">{pos}</div>
+      <div class="meaning-wrapper"><div class="meaning-definition">
+        <span class="meaning-definition-section_divider">1. </span><span class="meaning-meaning">{meaning}</span>
+      </div></div>
+    </div>
+  </div>
+</div>"""
+
+PAGE_TEMPLATE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<script>window.dataLayer = window.dataLayer || []; function gtag(){{dataLayer.push(arguments);}}</script>
+</head>
+<body>
+{chrome}
+<div id="primary"><div class="concepts">
+{blocks}
+</div></div>
+{chrome}
+</body></html>"""
+
+WORD_PAGE_TEMPLATE = """<div class="concept_light clearfix">
+  <div class="concept_light-wrapper">
+    <div class="concept_light-readings">
+      <div class="concept_light-representation">
+        <span class="furigana">{furigana}</span>
+        <span class="text">{word}</span>
+        <div class="meaning-wrapper"><div class="meaning-definition">
+          <span class="meaning-meaning">{meaning}</span>
+        </div></div>
+      </div>
+    </div>
+    <div class="concept_light-status">
+      <div class="concept_light-tag label">Common word</div>
+      <div class="concept_light-tag label">JLPT {jlpt}</div>
+      <div class="concept_light-tag label">{group_tag}</div>
+    </div>
+  </div>
+</div>
+<div id="inflections"><table>
+{rows}
+</table></div>"""
+
+CONJUGATOR_PAGE_TEMPLATE = """<div class="verb-header">
+  <span class="kanji">{verb}</span> <span class="kana">{reading}</span>
+  <span class="english">{meaning}</span>
+  <span class="verb-type">{group_tag}</span>
+</div>
+<table class="verb-conjugation-table">
+{rows}
+</table>"""
+
+GROUP_TAGS = {
+    "godan": "Godan verb, Transitive verb",
+    "ichidan": "Ichidan verb, Transitive verb",
+    "suru": "Suru verb, Intransitive verb",
+    "kuru": "Kuru verb - special class",
+}
+
+# conjugation_engine 的键 -> japaneseverbconjugator.com 的行名
+CONJUGATOR_LABELS = {
+    "dictionary_form": "Dictionary Form",
+    "masu_form": "Masu Form",
+    "te_form": "Te Form",
+    "nai_form": "Negative Form",
+    "past_form": "Past Form",
+    "volitional_form": "Volitional Form",
+    "potential_form": "Potential Form",
+    "passive_form": "Passive Form",
+    "conditional_ba_form": "Conditional (ba) Form",
+    "imperative_form": "Imperative Form",
+    "causative_form": "Causative Form",
+}
+
+def page_chrome(links=150):
+    """Navigation and footer markup, so synthetic pages have a realistic amount of noise to parse."""
+    items = "\n".join(f'<li class="nav-item"><a href="/browse/{i}" title="Browse {i}">Browse {i}</a></li>'
+                      for i in range(links))
+    return f'<nav class="site-nav"><ul>{items}</ul></nav>'
+
+def render_page(title, blocks):
+    return PAGE_TEMPLATE.format(title=title, chrome=page_chrome(), blocks=blocks)
+
+# 词形逐字拆开, 每个汉字带自己的读音, 假名为空 (与 jisho.org 的 furigana 标注方式相同)
+SAMPLE_WORDS = [
+    [("食", "た"), ("べ", ""), ("る", "")],
+    [("学", "がっ"), ("校", "こう")],
+    [("大", "おお"), ("き", ""), ("い", "")],
+    [("取", "と"), ("り", ""), ("消", "け"), ("す", "")],
+    [("お", ""), ("茶", "ちゃ")],
+    [("日", "に"), ("本", "ほん")],
+    [("く", ""), ("だ", ""), ("さ", ""), ("い", "")],
+]
+
+def synthetic_word(level, page, i):
+    n = LEVEL_INDEX.get(level, 0) * 100000 + page * 100 + i
+    parts = SAMPLE_WORDS[n % len(SAMPLE_WORDS)]
+    kana_only = not any(reading for _, reading in parts)
+    return {
+        'word': "".join(text for text, _ in parts),
+        # API 的完整读音: 汉字的读音加上原样的假名
+        'reading': "".join(reading or text for text, reading in parts),
+        'kana_only': kana_only,
+        'furigana': "" if kana_only else "".join(
+            f'<span class="kanji-1-up kanji">{reading}</span>' if reading else "<span></span>"
+            for _, reading in parts),
+        'meaning': f"word {level} {page} {i}",
+        'pos': POS_TAGS[n % len(POS_TAGS)],
+    }
+
+def synthetic_search_page(level, page, pages=DEFAULT_PAGES_PER_LEVEL, per_page=DEFAULT_WORDS_PER_PAGE):
+    """HTML for one search page. Pages after `pages` have no results, like the real site."""
+    blocks = []
+    if 1 <= page <= pages:
+        blocks = [BLOCK_TEMPLATE.format(**synthetic_word(level, page, i)) for i in range(per_page)]
+    return render_page(f"#jlpt-{level} - Jisho.org", "\n".join(blocks))
+
+def synthetic_api_entry(word, level):
+    """One result of /api/v1/search/words, with the fields of the real API."""
+    return {
+        "slug": word['word'],
+        "is_common": True,
+        "tags": [],
+        "jlpt": [f"jlpt-{level}"],
+        # 纯假名词在 API 里只有 reading
+        "japanese": [{"reading": word['reading']} if word['kana_only']
+                     else {"word": word['word'], "reading": word['reading']}],
+        "senses": [{
+            "english_definitions": [word['meaning']],
+            "parts_of_speech": word['pos'].split(", "),
+            "links": [], "tags": [], "restrictions": [], "see_also": [], "antonyms": [], "source": [], "info": [],
+        }],
+        "attribution": {"jmdict": True, "jmnedict": False, "dbpedia": False},
+    }
+
+def synthetic_api_page(level, page, pages=DEFAULT_PAGES_PER_LEVEL, per_page=DEFAULT_WORDS_PER_PAGE):
+    """JSON search API response with the words of synthetic_search_page()."""
+    data = []
+    if 1 <= page <= pages:
+        data = [synthetic_api_entry(synthetic_word(level, page, i), level) for i in range(per_page)]
+    return json.dumps({"meta": {"status": 200}, "data": data}, ensure_ascii=False)
+
+REFERENCE_FORM_KEYS = ("dictionary_form", "masu_form", "te_form", "past_form", "nai_form", "volitional_form",
+                       "potential_form", "passive_form", "conditional_ba_form", "imperative_form", "causative_form")
+
+# 手写的教科书活用, 不经过 conjugation_engine (问う、いらっしゃる等不规则形式也按实际写)
+REFERENCE_VERBS = {
+    "食べる": ("たべる", "to eat", "ichidan",
+             "食べる 食べます 食べて 食べた 食べない 食べよう 食べられる 食べられる 食べれば 食べろ 食べさせる"),
+    "見る": ("みる", "to see", "ichidan", "見る 見ます 見て 見た 見ない 見よう 見られる 見られる 見れば 見ろ 見させる"),
+    "書く": ("かく", "to write", "godan", "書く 書きます 書いて 書いた 書かない 書こう 書ける 書かれる 書けば 書け 書かせる"),
+    "行く": ("いく", "to go", "godan", "行く 行きます 行って 行った 行かない 行こう 行ける 行かれる 行けば 行け 行かせる"),
+    "話す": ("はなす", "to speak", "godan",
+           "話す 話します 話して 話した 話さない 話そう 話せる 話される 話せば 話せ 話させる"),
+    "待つ": ("まつ", "to wait", "godan", "待つ 待ちます 待って 待った 待たない 待とう 待てる 待たれる 待てば 待て 待たせる"),
+    "買う": ("かう", "to buy", "godan", "買う 買います 買って 買った 買わない 買おう 買える 買われる 買えば 買え 買わせる"),
+    "飲む": ("のむ", "to drink", "godan", "飲む 飲みます 飲んで 飲んだ 飲まない 飲もう 飲める 飲まれる 飲めば 飲め 飲ませる"),
+    "泳ぐ": ("およぐ", "to swim", "godan",
+           "泳ぐ 泳ぎます 泳いで 泳いだ 泳がない 泳ごう 泳げる 泳がれる 泳げば 泳げ 泳がせる"),
+    "死ぬ": ("しぬ", "to die", "godan", "死ぬ 死にます 死んで 死んだ 死なない 死のう 死ねる 死なれる 死ねば 死ね 死なせる"),
+    "する": ("する", "to do", "suru", "する します して した しない しよう できる される すれば しろ させる"),
+    "来る": ("くる", "to come", "kuru", "来る 来ます 来て 来た 来ない 来よう 来られる 来られる 来れば 来い 来させる"),
+    "問う": ("とう", "to ask", "godan", "問う 問います 問うて 問うた 問わない 問おう 問える 問われる 問えば 問え 問わせる"),
+    "いらっしゃる": ("いらっしゃる", "to be (honorific)", "godan",
+                 "いらっしゃる いらっしゃいます いらっしゃって いらっしゃった いらっしゃらない いらっしゃろう "
+                 "いらっしゃれる いらっしゃられる いらっしゃれば いらっしゃい いらっしゃらせる"),
+}
+
+def reference_record(verb):
+    reading, meaning, group, forms = REFERENCE_VERBS[verb]
+    return {"verb": verb, "reading": reading, "meaning": meaning, "jlpt_level": "N5", "group": group,
+            "forms": dict(zip(REFERENCE_FORM_KEYS, forms.split()))}
+
+def load_fixture_verbs(path=DEFAULT_VERBS_FILE):
+    """{verb: record} from a verbs.json style file plus the reference verbs (which take precedence)."""
+    verbs = {}
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            verbs = {record["verb"]: record for record in json.load(f)}
+    except FileNotFoundError:
+        pass
+    verbs.update((verb, reference_record(verb)) for verb in REFERENCE_VERBS)
+    return verbs
+
+def fixture_forms(record):
+    """Forms a page shows: the reference table, する compounds built from する, else the record's own forms."""
+    verb = record["verb"]
+    if verb in REFERENCE_VERBS:
+        return reference_record(verb)["forms"]
+    if record.get("group") == "suru" and verb.endswith("する") and len(verb) > 2:
+        return {key: verb[:-2] + form for key, form in reference_record("する")["forms"].items()}
+    return record.get("forms") or {}
+
+def synthetic_word_page(record):
+    """Jisho /word/<verb> page; the inflection rows use the labels parse_verb_page turns into *_form keys."""
+    rows = []
+    for key, value in fixture_forms(record).items():
+        label = key[:-len("_form")].replace("_", " ").capitalize()
+        rows.append(f"<tr><td>{label}</td><td>{value}\n<span class=\"furigana\"></span></td></tr>")
+    furigana = "".join(f"<span>{ch}</span>" for ch in record.get("reading", ""))
+    jlpt = record.get("jlpt_level") if record.get("jlpt_level") not in (None, "Unknown") else "N3"
+    block = WORD_PAGE_TEMPLATE.format(
+        furigana=furigana, word=record["verb"], meaning=record.get("meaning", ""), jlpt=jlpt,
+        group_tag=GROUP_TAGS.get(record.get("group"), "Expression"), rows="\n".join(rows))
+    return render_page(f"{record['verb']} - Jisho.org", block)
+
+def synthetic_conjugator_page(record):
+    forms = fixture_forms(record)
+    rows = [f"<tr><td class=\"form-name\">{CONJUGATOR_LABELS[key]}</td><td>{forms[key]}</td></tr>"
+            for key in CONJUGATOR_LABELS if key in forms]
+    block = CONJUGATOR_PAGE_TEMPLATE.format(
+        verb=record["verb"], reading=record.get("reading", ""), meaning=record.get("meaning", ""),
+        group_tag=GROUP_TAGS.get(record.get("group"), ""), rows="\n".join(rows))
+    return render_page(f"{record['verb']} conjugation", block)
+
+def fixture_filename(path, query):
+    """/search/%23jlpt-n5?page=2 -> search_jlpt-n5_page-2.html, /api/... -> api_..._page-2.json"""
+    name = unquote(path).strip("/").replace("#", "").replace("/", "_")
+    for key in sorted(query):
+        name += f"_{key}-{query[key][0].replace('#', '')}"
+    return f"{name}.json" if path.startswith("/api/") else f"{name}.html"
+
+class FixtureHandler(BaseHTTPRequestHandler):
+    server_version = "JishoFixture/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_body(self, status, body, content_type="text/html; charset=utf-8", headers=None):
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        etag = f'"{hashlib.sha256(body).hexdigest()[:16]}"'
+        if status == 200 and self.headers.get("If-None-Match") == etag:
+            self.server.count_not_modified()
+            self.send_response(304)
+            self.send_header("ETag", etag)
+            self.end_headers()
+            return
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        if status == 200:
+            self.send_header("ETag", etag)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self.server.count_request()
+        if self.server.delay:
+            time.sleep(self.server.delay)
+
+        refusal = self.server.refusal()
+        if refusal == 429:
+            headers = {"Retry-After": str(self.server.retry_after)} if self.server.retry_after else None
+            return self.send_body(429, "Too Many Requests", "text/plain", headers)
+        if refusal == 503:
+            return self.send_body(503, "Service Unavailable", "text/plain")
+
+        parts = urlsplit(self.path)
+        query = parse_qs(parts.query)
+
+        if self.server.fixtures_dir:
+            path = os.path.join(self.server.fixtures_dir, fixture_filename(parts.path, query))
+            if os.path.exists(path):
+                with open(path, 'rb') as f:
+                    body = f.read()
+                if path.endswith(".json"):
+                    return self.send_body(200, body, "application/json; charset=utf-8")
+                return self.send_body(200, body)
+
+        search = unquote(parts.path)
+        if search.startswith("/search/#jlpt-"):
+            level = search[len("/search/#jlpt-"):]
+            page = int(query.get("page", ["1"])[0])
+            return self.send_body(200, synthetic_search_page(level, page, self.server.pages, self.server.per_page))
+
+        if parts.path == "/api/v1/search/words":
+            keyword = query.get("keyword", [""])[0]
+            if keyword.startswith("#jlpt-"):
+                page = int(query.get("page", ["1"])[0])
+                body = synthetic_api_page(keyword[len("#jlpt-"):], page, self.server.pages, self.server.per_page)
+            else:
+                body = json.dumps({"meta": {"status": 200}, "data": []})
+            return self.send_body(200, body, "application/json; charset=utf-8")
+
+        if search.startswith("/word/"):
+            record = self.server.verbs.get(search[len("/word/"):])
+            if record is not None:
+                return self.send_body(200, synthetic_word_page(record))
+
+        if parts.path == "/VerbDetails.asp":
+            record = self.server.verbs.get(query.get("txtVerb", [""])[0])
+            if record is not None:
+                return self.send_body(200, synthetic_conjugator_page(record))
+
+        self.send_body(404, "Not found", "text/plain")
+
+class FixtureServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, pages=DEFAULT_PAGES_PER_LEVEL, per_page=DEFAULT_WORDS_PER_PAGE,
+                 delay=0.0, fixtures_dir=None, verbose=False, verbs_file=DEFAULT_VERBS_FILE,
+                 throttle_rate=None, retry_after=None, error_rate=0.0):
+        super().__init__(address, FixtureHandler)
+        self.verbs = load_fixture_verbs(verbs_file)
+        self.pages = pages
+        self.per_page = per_page
+        self.delay = delay
+        self.fixtures_dir = fixtures_dir
+        self.verbose = verbose
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.error_rate = error_rate
+        self.requests = 0
+        self.not_modified = 0
+        self.throttled = 0
+        self.errors = 0
+        self._tokens = max(1.0, throttle_rate or 0)
+        self._tokens_updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def count_request(self):
+        with self._lock:
+            self.requests += 1
+
+    def refusal(self):
+        """429 when the request exceeds throttle_rate, 503 for a random error_rate share, else None."""
+        with self._lock:
+            if self.throttle_rate:
+                now = time.monotonic()
+                capacity = max(1.0, self.throttle_rate)
+                self._tokens = min(capacity, self._tokens + (now - self._tokens_updated) * self.throttle_rate)
+                self._tokens_updated = now
+                if self._tokens < 1:
+                    self.throttled += 1
+                    return 429
+                self._tokens -= 1
+            if self.error_rate and random.random() < self.error_rate:
+                self.errors += 1
+                return 503
+        return None
+
+    def count_not_modified(self):
+        with self._lock:
+            self.not_modified += 1
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def start_fixture_server(port=0, **options):
+    """Starts a server in a background thread. Returns it; call shutdown() when done."""
+    server = FixtureServer(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic or saved Jisho pages for scraper tests.")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--pages", type=int, default=DEFAULT_PAGES_PER_LEVEL, help="Result pages per JLPT level")
+    parser.add_argument("--per-page", type=int, default=DEFAULT_WORDS_PER_PAGE)
+    parser.add_argument("--delay", type=float, default=0.0, help="Seconds to wait before each response")
+    parser.add_argument("--fixtures", default=None, help="Directory of saved pages served before synthetic ones")
+    parser.add_argument("--verbs", default=DEFAULT_VERBS_FILE, help="Verbs served as word/conjugator pages")
+    parser.add_argument("--throttle-rate", type=float, default=None,
+                        help="Answer 429 to requests beyond this many per second")
+    parser.add_argument("--retry-after", type=int, default=None, help="Retry-After seconds sent with a 429")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = FixtureServer(("127.0.0.1", args.port), args.pages, args.per_page, args.delay, args.fixtures,
+                           args.verbose, args.verbs, args.throttle_rate, args.retry_after, args.error_rate)
+    print(f"Serving fixtures on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(f"{server.requests} requests, {server.not_modified} not modified, "
+              f"{server.throttled} throttled (429), {server.errors} errors (503).")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,201 @@
+"""Pluggable HTML parser backends for the scraper page parsers.
+
+The page parsers only need a few operations, so every backend wraps its
+tree in a small node type with the same interface:
+
+    node.select(css)      -> all matching descendants, in document order
+    node.select_one(css)  -> first matching descendant or None
+    node.text             -> all text, like BeautifulSoup's .text
+    node.stripped_text    -> like BeautifulSoup's .get_text(strip=True)
+
+Selectors are the subset the parsers use: "tag", "tag.class" and "tag#id".
+
+Backends:
+
+    bs4         BeautifulSoup + html.parser (the original parser, the default).
+                parse_html(only=...) turns the selectors into a SoupStrainer,
+                so only the relevant subtrees are built.
+    lxml        lxml.html; selectors are compiled once into XPath.
+    selectolax  selectolax's lexbor parser with native CSS selectors.
+
+All backends produce the same records on the scraped pages; see
+benchmark_parsers.py.
+"""
+import re
+
+PARSER_BACKENDS = ("bs4", "lxml", "selectolax")
+DEFAULT_PARSER_BACKEND = "bs4"
+
+_SELECTOR_RE = re.compile(r"^([a-z0-9]+)(?:([.#])([\w-]+))?$")
+
+def parse_selector(css):
+    """"div.concept_light" -> ("div", "class", "concept_light")"""
+    match = _SELECTOR_RE.match(css)
+    if not match:
+        raise ValueError(f"Unsupported selector: {css}")
+    name, kind, value = match.groups()
+    return name, {".": "class", "#": "id"}.get(kind), value
+
+def _decode(content):
+    return content.decode('utf-8', errors='replace') if isinstance(content, bytes) else content
+
+# --- BeautifulSoup ---
+
+class Bs4Node:
+    __slots__ = ("tag",)
+
+    def __init__(self, tag):
+        self.tag = tag
+
+    @staticmethod
+    def _query(css):
+        name, kind, value = parse_selector(css)
+        if kind == "class":
+            return name, {"class_": value}
+        if kind == "id":
+            return name, {"id": value}
+        return name, {}
+
+    def select(self, css):
+        name, kwargs = self._query(css)
+        return [Bs4Node(tag) for tag in self.tag.find_all(name, **kwargs)]
+
+    def select_one(self, css):
+        name, kwargs = self._query(css)
+        tag = self.tag.find(name, **kwargs)
+        return Bs4Node(tag) if tag is not None else None
+
+    @property
+    def text(self):
+        return self.tag.text
+
+    @property
+    def stripped_text(self):
+        return self.tag.get_text(strip=True)
+
+def _soup_strainer(only):
+    """SoupStrainer for "tag.class" selectors. Returns None (parse everything) for anything else."""
+    from bs4 import SoupStrainer
+    names, classes = [], []
+    for css in only:
+        name, kind, value = parse_selector(css)
+        if kind != "class":
+            return None
+        names.append(name)
+        classes.append(value)
+    # 解析时 class 是原始字符串 ("concept_light clearfix"), 所以按单词匹配.
+    # 名称与类名的组合可能多保留几个子树, 但不会漏掉需要的子树
+    pattern = "|".join(re.escape(value) for value in sorted(set(classes)))
+    return SoupStrainer(sorted(set(names)), class_=re.compile(rf"(?:^|\s)(?:{pattern})(?:\s|$)"))
+
+def _parse_bs4(content, only):
+    from bs4 import BeautifulSoup
+    strainer = _soup_strainer(only) if only else None
+    return Bs4Node(BeautifulSoup(content, 'html.parser', parse_only=strainer))
+
+# --- lxml ---
+
+_xpath_cache = {}
+
+def _compile_xpath(css):
+    compiled = _xpath_cache.get(css)
+    if compiled is None:
+        from lxml import etree
+        name, kind, value = parse_selector(css)
+        if kind == "class":
+            expr = f".//{name}[contains(concat(' ', normalize-space(@class), ' '), ' {value} ')]"
+        elif kind == "id":
+            expr = f".//{name}[@id='{value}']"
+        else:
+            expr = f".//{name}"
+        compiled = _xpath_cache[css] = etree.XPath(expr)
+    return compiled
+
+class LxmlNode:
+    __slots__ = ("element",)
+
+    def __init__(self, element):
+        self.element = element
+
+    def select(self, css):
+        return [LxmlNode(element) for element in _compile_xpath(css)(self.element)]
+
+    def select_one(self, css):
+        found = _compile_xpath(css)(self.element)
+        return LxmlNode(found[0]) if found else None
+
+    @property
+    def text(self):
+        return "".join(self.element.itertext())
+
+    @property
+    def stripped_text(self):
+        return "".join(s.strip() for s in self.element.itertext() if s.strip())
+
+def _parse_lxml(content, only):
+    import lxml.html
+    text = _decode(content)
+    if not text.strip():
+        text = "<html></html>"
+    return LxmlNode(lxml.html.document_fromstring(text))
+
+# --- selectolax ---
+
+class SelectolaxNode:
+    __slots__ = ("node",)
+
+    def __init__(self, node):
+        self.node = node
+
+    def select(self, css):
+        # lexbor 的 css() 会包含节点自身, BeautifulSoup 只查找后代
+        own_id = self.node.mem_id
+        return [SelectolaxNode(node) for node in self.node.css(css) if node.mem_id != own_id]
+
+    def select_one(self, css):
+        found = self.select(css)
+        return found[0] if found else None
+
+    @property
+    def text(self):
+        return self.node.text(deep=True, separator='', strip=False)
+
+    @property
+    def stripped_text(self):
+        return self.node.text(deep=True, separator='', strip=True)
+
+def _parse_selectolax(content, only):
+    from selectolax.lexbor import LexborHTMLParser
+    tree = LexborHTMLParser(_decode(content))
+    return SelectolaxNode(tree.root)
+
+_PARSERS = {
+    "bs4": _parse_bs4,
+    "lxml": _parse_lxml,
+    "selectolax": _parse_selectolax,
+}
+
+def parse_html(content, backend=DEFAULT_PARSER_BACKEND, only=None):
+    """Parses a page (bytes or str) and returns the root node.
+
+    only lists the selectors of the subtrees the caller will look at; the
+    bs4 backend uses it to skip building the rest of the tree. The other
+    backends parse the whole page in C and ignore it.
+    """
+    try:
+        parse = _PARSERS[backend]
+    except KeyError:
+        raise ValueError(f"Unknown parser backend: {backend} (choose from {', '.join(PARSER_BACKENDS)})")
+    return parse(content, only)
+
+def check_parser_backend(backend):
+    """Fails early with an install hint when the backend's library is missing."""
+    module, package = {
+        "bs4": ("bs4", "beautifulsoup4"),
+        "lxml": ("lxml.html", "lxml"),
+        "selectolax": ("selectolax.lexbor", "selectolax"),
+    }[backend]
+    try:
+        __import__(module)
+    except ImportError:
+        raise SystemExit(f"Error: the {backend} parser backend needs {package} (pip install {package}).")
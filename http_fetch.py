@@ -0,0 +1,224 @@
+"""Shared HTTP fetch layer for the scrapers.
+
+Fetcher keeps one requests.Session (keep-alive connection pool) for a whole
+run and stores every 200 response in a disk cache:
+
+    .http_cache/index/<sha256(url)>.json     url, ETag, Last-Modified, body digest
+    .http_cache/objects/ab/<sha256(body)>    response body, stored once per content
+
+A cached URL is revalidated with If-None-Match / If-Modified-Since, so an
+unchanged page costs a 304 instead of a full download. In offline mode
+nothing is sent at all: pages are served from the cache only and a missing
+page raises OfflineCacheMiss, which re-runs a parser over the last crawl.
+"""
+import hashlib
+import json
+import os
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_CACHE_DIR = '.http_cache'
+DEFAULT_TIMEOUT = 15
+DEFAULT_POOL_SIZE = 10
+
+class OfflineCacheMiss(requests.exceptions.RequestException):
+    """Raised in offline mode for a URL that is not in the cache."""
+
+class FetchResponse:
+    """The parts of requests.Response the scrapers use, for network and cached responses alike."""
+
+    def __init__(self, url, status_code, content, headers=None, from_cache=False, from_network=True):
+        self.url = url
+        self.status_code = status_code
+        self.content = content
+        self.headers = headers or {}
+        self.from_cache = from_cache
+        self.from_network = from_network
+
+    def raise_for_status(self):
+        if self.status_code >= 400:
+            raise requests.exceptions.HTTPError(f"{self.status_code} Error for url: {self.url}", response=self)
+
+def _sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+def _atomic_write(path, data):
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class ResponseCache:
+    """Content-addressed response store with a per-URL index of validators."""
+
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.index_dir = os.path.join(cache_dir, 'index')
+        self.objects_dir = os.path.join(cache_dir, 'objects')
+        os.makedirs(self.index_dir, exist_ok=True)
+        os.makedirs(self.objects_dir, exist_ok=True)
+
+    def _index_path(self, url):
+        return os.path.join(self.index_dir, f"{_sha256(url.encode('utf-8'))}.json")
+
+    def _object_path(self, digest):
+        return os.path.join(self.objects_dir, digest[:2], digest)
+
+    def lookup(self, url):
+        """Returns the index entry for url, or None when the URL (or its body) is not cached."""
+        try:
+            with open(self._index_path(url), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return None
+        if not os.path.exists(self._object_path(entry["sha256"])):
+            return None
+        return entry
+
+    def iter_entries(self):
+        """All cached entries, sorted by URL."""
+        entries = []
+        for name in os.listdir(self.index_dir):
+            if not name.endswith(".json"):
+                continue
+            with open(os.path.join(self.index_dir, name), 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            if os.path.exists(self._object_path(entry["sha256"])):
+                entries.append(entry)
+        return sorted(entries, key=lambda entry: entry["url"])
+
+    def read_body(self, entry):
+        with open(self._object_path(entry["sha256"]), 'rb') as f:
+            return f.read()
+
+    def _write_entry(self, url, entry):
+        _atomic_write(self._index_path(url), json.dumps(entry, ensure_ascii=False).encode('utf-8'))
+
+    def store(self, url, headers, body):
+        digest = _sha256(body)
+        path = self._object_path(digest)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            _atomic_write(path, body)
+        entry = {
+            "url": url,
+            "sha256": digest,
+            "size": len(body),
+            "etag": headers.get('ETag'),
+            "last_modified": headers.get('Last-Modified'),
+            "content_type": headers.get('Content-Type'),
+            "fetched_at": time.time(),
+        }
+        self._write_entry(url, entry)
+        return entry
+
+    def touch(self, url, entry, headers):
+        """Records a 304 revalidation; the server may send fresh validators with it."""
+        entry = dict(entry)
+        entry["etag"] = headers.get('ETag') or entry.get("etag")
+        entry["last_modified"] = headers.get('Last-Modified') or entry.get("last_modified")
+        entry["fetched_at"] = time.time()
+        self._write_entry(url, entry)
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry):
+        headers = {}
+        if entry.get("etag"):
+            headers['If-None-Match'] = entry["etag"]
+        if entry.get("last_modified"):
+            headers['If-Modified-Since'] = entry["last_modified"]
+        return headers
+
+    def cached_response(self, url, entry, from_network):
+        headers = {'Content-Type': entry.get("content_type") or ''}
+        return FetchResponse(url, 200, self.read_body(entry), headers, from_cache=True, from_network=from_network)
+
+class Fetcher:
+    """Pooled, cached GET for the scrapers. cache_dir=None disables the cache."""
+
+    def __init__(self, headers=None, cache_dir=DEFAULT_CACHE_DIR, offline=False,
+                 timeout=DEFAULT_TIMEOUT, pool_size=DEFAULT_POOL_SIZE):
+        if offline and not cache_dir:
+            raise ValueError("Offline mode needs a cache directory")
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        if headers:
+            self.session.headers.update(headers)
+        self.cache = ResponseCache(cache_dir) if cache_dir else None
+        self.offline = offline
+        self.timeout = timeout
+        self.stats = {"downloaded": 0, "not_modified": 0, "offline_hits": 0, "offline_misses": 0, "errors": 0}
+
+    def get(self, url, timeout=None):
+        entry = self.cache.lookup(url) if self.cache else None
+        if self.offline:
+            if entry is None:
+                self.stats["offline_misses"] += 1
+                raise OfflineCacheMiss(f"Not in cache (offline mode): {url}")
+            self.stats["offline_hits"] += 1
+            return self.cache.cached_response(url, entry, from_network=False)
+
+        request_headers = ResponseCache.conditional_headers(entry) if entry else {}
+        response = self.session.get(url, headers=request_headers, timeout=timeout or self.timeout)
+
+        if response.status_code == 304 and entry is not None:
+            self.stats["not_modified"] += 1
+            entry = self.cache.touch(url, entry, response.headers)
+            return self.cache.cached_response(url, entry, from_network=True)
+
+        if response.status_code == 200:
+            self.stats["downloaded"] += 1
+            if self.cache:
+                self.cache.store(url, response.headers, response.content)
+        else:
+            self.stats["errors"] += 1
+        return FetchResponse(url, response.status_code, response.content, response.headers)
+
+    def format_stats(self):
+        s = self.stats
+        if self.offline:
+            return f"Fetch: offline, {s['offline_hits']} served from cache, {s['offline_misses']} missing."
+        return (f"Fetch: {s['downloaded']} downloaded, {s['not_modified']} not modified (304), "
+                f"{s['errors']} HTTP errors.")
+
+    def close(self):
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def is_transient_status(status_code):
+    """Rate limiting, bans and server errors: worth retrying later rather than skipping the page."""
+    return status_code in (403, 429) or status_code >= 500
+
+def is_transient_error(error):
+    """Connection errors, timeouts and transient HTTP statuses (see is_transient_status)."""
+    if isinstance(error, OfflineCacheMiss):
+        return False
+    if isinstance(error, requests.exceptions.HTTPError):
+        return error.response is not None and is_transient_status(error.response.status_code)
+    return isinstance(error, requests.exceptions.RequestException)
+
+def add_fetch_arguments(parser):
+    """The cache options shared by every scraper CLI."""
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR,
+                        help="Directory of the HTTP response cache")
+    parser.add_argument("--no-cache", action="store_true",
+                        help="Do not read or write the HTTP response cache")
+    parser.add_argument("--offline", action="store_true",
+                        help="Serve every page from the cache and never touch the network")
+
+def cache_dir_from_args(args):
+    if args.offline and args.no_cache:
+        raise SystemExit("Error: --offline needs the cache, it cannot be combined with --no-cache.")
+    return None if args.no_cache else args.cache_dir
+
+def fetcher_from_args(args, headers=None, timeout=DEFAULT_TIMEOUT):
+    return Fetcher(headers, cache_dir_from_args(args), args.offline, timeout)
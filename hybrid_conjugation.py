@@ -0,0 +1,184 @@
+"""Hybrid conjugation mode for the verb scrapers.
+
+Instead of one request per verb, the forms are generated locally with
+conjugation_engine for every verb the local dictionary knows (reading,
+meaning and group come from a jmdict_processor words.json or an earlier
+verbs.json). Only a random sample of those verbs, plus the irregular ones,
+is fetched from the remote site and compared with the local record; verbs
+missing from the dictionary are still scraped as before.
+
+The comparison goes into a verification report (<output>.verification.json):
+every mismatching form and group, with counts per form and per group, so a
+wrong rule shows up as a cluster of mismatches. Form keys only one side has
+are counted too (missing: local only, extra: remote only), and verbs whose
+remote page shared no form key with the local record are listed, so a
+remote table the parser maps onto other keys is not taken for a match.
+"""
+import json
+import os
+import random
+import time
+from conjugation_engine import ENGINE_VERSION, GODAN_ROWS, VERB_IRREGULARS, VERB_SUFFIX_TABLES, conjugate_verb_native
+
+DEFAULT_DICTIONARY = 'public/words.json'
+DEFAULT_SAMPLE_SIZE = 20
+DEFAULT_SAMPLE_SEED = 1
+
+# 查表规则覆盖不到的特殊动词 (敬语 -aru 动词的ます形/命令形, 問う的て形等), 总是远程核对
+SPECIAL_VERBS = {"いらっしゃる", "おっしゃる", "仰る", "なさる", "為さる", "くださる", "下さる", "ござる", "御座る",
+                 "問う", "請う", "乞う"}
+
+def report_path_for(output_path):
+    return output_path + ".verification.json"
+
+def load_verb_dictionary(path=DEFAULT_DICTIONARY):
+    """{dictionary form: {reading, meaning, group, jlpt_level}} from words.json or verbs.json records."""
+    with open(path, 'r', encoding='utf-8') as f:
+        records = json.load(f)
+    dictionary = {}
+    for record in records:
+        if "verb" in record:
+            verb = record["verb"]
+        elif record.get("type") == "verb":
+            verb = record["word"]
+        else:
+            continue
+        # 同形词只取第一条 (words.json 按常见度排序)
+        if record.get("group") in VERB_SUFFIX_TABLES and verb not in dictionary:
+            dictionary[verb] = {
+                "reading": record.get("reading", ""),
+                "meaning": record.get("meaning", ""),
+                "group": record["group"],
+                "jlpt_level": record.get("jlpt_level", "Unknown"),
+            }
+    return dictionary
+
+def is_irregular_verb(verb, group):
+    """Verbs whose forms do not come from the regular godan/ichidan rows."""
+    if group in ("suru", "kuru") or verb in SPECIAL_VERBS or verb in VERB_IRREGULARS:
+        return True
+    return group == "godan" and any(verb.endswith(ending) for ending in GODAN_ROWS if len(ending) > 1)
+
+def local_verb_record(verb, entry, examples):
+    """The record the scrapers would build, with forms from conjugation_engine. None when no rule applies."""
+    forms = conjugate_verb_native(verb, entry["group"])
+    if not forms:
+        return None
+    return {
+        "verb": verb,
+        "reading": entry["reading"],
+        "meaning": entry["meaning"],
+        "jlpt_level": entry["jlpt_level"],
+        "group": entry["group"],
+        "forms": forms,
+        "examples": examples.get(verb, []),
+    }
+
+def plan_hybrid(verbs, dictionary, examples, sample_size=DEFAULT_SAMPLE_SIZE, seed=DEFAULT_SAMPLE_SEED):
+    """Returns ({verb: local record}, set of verbs to verify remotely).
+
+    The sample is drawn from the regular verbs with a fixed seed, so a
+    resumed run verifies the same verbs.
+    """
+    local = {}
+    for verb in verbs:
+        entry = dictionary.get(verb)
+        record = local_verb_record(verb, entry, examples) if entry else None
+        if record:
+            local[verb] = record
+    irregular = {verb for verb, record in local.items() if is_irregular_verb(verb, record["group"])}
+    regular = sorted(set(local) - irregular)
+    sample = set(random.Random(seed).sample(regular, min(sample_size, len(regular))))
+    return local, sample | irregular
+
+class VerificationReport:
+    """Mismatches between local and remote records. state is JSON-serialisable, so it can live in the journal cursor."""
+
+    def __init__(self, state=None):
+        self.state = state or {"verified": 0, "unverified": [], "forms_compared": 0, "mismatches": []}
+        # 旧日志里的状态没有这些字段
+        self.state.setdefault("missing_forms", {})
+        self.state.setdefault("extra_forms", {})
+        self.state.setdefault("no_common_forms", [])
+
+    def add(self, local, remote):
+        """remote is the scraped record, or None when the page could not be used."""
+        verb = local["verb"]
+        if remote is None:
+            self.state["unverified"].append(verb)
+            return
+        self.state["verified"] += 1
+        remote_group = remote.get("group")
+        if remote_group not in (None, "", "Unknown") and remote_group != local["group"]:
+            self.state["mismatches"].append({"verb": verb, "group": local["group"], "field": "group",
+                                             "local": local["group"], "remote": remote_group})
+        # 两边都有的形式逐个比较; 只有一边有的键单独计数
+        remote_forms = remote.get("forms", {})
+        common = set(local["forms"]) & set(remote_forms)
+        for key in set(local["forms"]) - common:
+            self.state["missing_forms"][key] = self.state["missing_forms"].get(key, 0) + 1
+        for key in set(remote_forms) - common:
+            self.state["extra_forms"][key] = self.state["extra_forms"].get(key, 0) + 1
+        if not common:
+            self.state["no_common_forms"].append(verb)
+        for key in sorted(common):
+            self.state["forms_compared"] += 1
+            if local["forms"][key] != remote_forms[key]:
+                self.state["mismatches"].append({"verb": verb, "group": local["group"], "field": key,
+                                                 "local": local["forms"][key], "remote": remote_forms[key]})
+
+    def summary(self):
+        by_field, by_group = {}, {}
+        for mismatch in self.state["mismatches"]:
+            by_field[mismatch["field"]] = by_field.get(mismatch["field"], 0) + 1
+            by_group[mismatch["group"]] = by_group.get(mismatch["group"], 0) + 1
+        return by_field, by_group
+
+    def write(self, path, source, total_verbs, local_verbs):
+        by_field, by_group = self.summary()
+        report = {
+            "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "engine_version": ENGINE_VERSION,
+            "source": source,
+            "verbs": total_verbs,
+            "generated_locally": local_verbs,
+            "verified": self.state["verified"],
+            "unverified": self.state["unverified"],
+            "forms_compared": self.state["forms_compared"],
+            "verified_without_common_forms": self.state["no_common_forms"],
+            "missing_forms": self.state["missing_forms"],
+            "extra_forms": self.state["extra_forms"],
+            "mismatch_count": len(self.state["mismatches"]),
+            "mismatches_by_field": by_field,
+            "mismatches_by_group": by_group,
+            "mismatches": self.state["mismatches"],
+        }
+        tmp_path = path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+
+    def format_summary(self):
+        verbs = {mismatch["verb"] for mismatch in self.state["mismatches"]}
+        by_field, _ = self.summary()
+        text = (f"Verification: {self.state['verified']} verbs checked, {self.state['forms_compared']} forms compared, "
+                f"{len(self.state['mismatches'])} mismatches in {len(verbs)} verbs")
+        if by_field:
+            text += " (" + ", ".join(f"{field}: {count}" for field, count in sorted(by_field.items())) + ")"
+        if self.state["unverified"]:
+            text += f", {len(self.state['unverified'])} could not be fetched"
+        if self.state["no_common_forms"]:
+            text += f", {len(self.state['no_common_forms'])} shared no form with the remote page"
+        for name, label in (("missing_forms", "missing remotely"), ("extra_forms", "only remote")):
+            if self.state[name]:
+                text += f"; {label}: " + ", ".join(f"{key} x{count}" for key, count in sorted(self.state[name].items()))
+        return text + "."
+
+def add_hybrid_arguments(parser):
+    parser.add_argument("--hybrid", action="store_true",
+                        help="Generate forms locally and only fetch a verification sample")
+    parser.add_argument("--dictionary", default=DEFAULT_DICTIONARY,
+                        help="Hybrid mode: words.json/verbs.json with reading, meaning and group per verb")
+    parser.add_argument("--sample", type=int, default=DEFAULT_SAMPLE_SIZE,
+                        help="Hybrid mode: regular verbs verified remotely (irregular verbs are always verified)")
+    parser.add_argument("--seed", type=int, default=DEFAULT_SAMPLE_SEED, help="Hybrid mode: sampling seed")
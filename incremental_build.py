@@ -0,0 +1,157 @@
+"""Helpers for incremental JMdict builds.
+
+A build manifest is an NDJSON file. The first line is {"version": ...,
+"source": ...}: the version of the builder code and options that produced it
+and a digest of the input file. A manifest with a different (or no) version
+is ignored and the build starts from scratch; if the version and the input
+digest both match, the previous output is still current. Every
+other line is one JMdict entry: {"id": ..., "hash": ..., "derived": ...},
+where "derived" is whatever the builder computed from that entry alone. On
+the next release only entries whose content hash changed (or that are new)
+are processed again; entries missing from the new release simply drop out.
+Hashing every entry and reading/writing the entry lines costs more than
+cheap per-entry work, so builders whose per-entry step is cheap write the
+header only and rebuild everything once the input changed.
+The new output is diffed against the previous output to produce a changeset
+for downstream import stages.
+"""
+import hashlib
+import json
+import os
+import pickle
+
+def entry_content_hash(entry):
+    """Hash of a JMdict entry as parsed from the file.
+
+    The entry is serialized with pickle (about twice as fast as json.dumps; the
+    bytes are only hashed, never loaded). Keys are not sorted: releases keep
+    the key order, and an entry whose keys were reordered is only derived
+    again, which is still correct.
+    """
+    return hashlib.blake2b(pickle.dumps(entry, protocol=5), digest_size=16).hexdigest()
+
+def manifest_path_for(output_path):
+    return output_path + ".manifest.ndjson"
+
+def changeset_path_for(output_path):
+    return output_path + ".changeset.json"
+
+def file_digest(path):
+    """blake2b digest of a whole file, read in 1 MiB blocks."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def read_manifest_header(path):
+    """The first line of a manifest, or {} if there is none."""
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.loads(f.readline() or "{}")
+
+def is_up_to_date(manifest_path, version, source, output_paths):
+    """True if the previous build used the same version and input, and its outputs still exist."""
+    header = read_manifest_header(manifest_path)
+    return (header.get("version") == version and header.get("source") == source
+            and all(os.path.exists(path) for path in output_paths))
+
+def load_manifest(path, version):
+    """Returns {entry_id: (hash, derived)} from a previous build of the same version, or {}."""
+    manifest = {}
+    if not os.path.exists(path):
+        return manifest
+    with open(path, "r", encoding="utf-8") as f:
+        header = json.loads(f.readline() or "{}")
+        if header.get("version") != version:
+            print(f"Manifest {path} was built by version {header.get('version')!r}, "
+                  f"not {version!r}; rebuilding everything.")
+            return manifest
+        for line in f:
+            if not line.strip():
+                continue
+            item = json.loads(line)
+            manifest[item["id"]] = (item["hash"], item["derived"])
+    return manifest
+
+def write_manifest(path, version, source, manifest):
+    """Writes {entry_id: (hash, derived)} to path via a temporary file."""
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"version": version, "source": source}))
+        f.write("\n")
+        for entry_id, (content_hash, derived) in manifest.items():
+            f.write(json.dumps({"id": entry_id, "hash": content_hash, "derived": derived}, ensure_ascii=False))
+            f.write("\n")
+    os.replace(tmp_path, path)
+
+def iter_incremental(entries, previous_manifest, derive, manifest, stats):
+    """Yields derive(entry) for every entry, reusing results for unchanged entries.
+
+    Every entry is recorded in the manifest dict as entry_id -> (hash, derived)
+    for the next build. The derived objects are the ones yielded, so a caller
+    that fills them in further (e.g. with conjugations) has that stored too.
+    stats is filled with added/changed/unchanged/deleted entry counts.
+    """
+    for name in ("added", "changed", "unchanged", "deleted"):
+        stats.setdefault(name, 0)
+    seen_ids = set()
+
+    for entry in entries:
+        entry_id = str(entry.get("id", ""))
+        content_hash = entry_content_hash(entry)
+        previous = previous_manifest.get(entry_id) if entry_id else None
+
+        if previous is not None and previous[0] == content_hash:
+            derived = previous[1]
+            stats["unchanged"] += 1
+        else:
+            derived = derive(entry)
+            stats["changed" if previous is not None else "added"] += 1
+
+        if entry_id:
+            seen_ids.add(entry_id)
+            manifest[entry_id] = (content_hash, derived)
+        yield derived
+
+    stats["deleted"] += sum(1 for entry_id in previous_manifest if entry_id not in seen_ids)
+
+def load_output_records(path):
+    """Loads a previous JSON-array output, or [] if it does not exist yet."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def diff_records(old_records, new_records, key_func):
+    """Compares two outputs by key and returns the changeset dict."""
+    old_by_key = {key_func(record): record for record in old_records}
+    new_keys = set()
+    added, updated = [], []
+    for record in new_records:
+        key = key_func(record)
+        new_keys.add(key)
+        old = old_by_key.get(key)
+        if old is None:
+            added.append(record)
+        elif old != record:
+            updated.append(record)
+    deleted = [list(key) for key in old_by_key if key not in new_keys]
+    return {"added": added, "updated": updated, "deleted": deleted}
+
+def empty_changeset():
+    return {"added": [], "updated": [], "deleted": []}
+
+def write_changeset(path, changeset):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(changeset, f, ensure_ascii=False, indent=2)
+
+def format_incremental_stats(stats, changeset):
+    """One-line summary; the entry counts are left out when no entries were reused (stats is empty)."""
+    rows = (f"output rows: {len(changeset['added'])} added, {len(changeset['updated'])} updated, "
+            f"{len(changeset['deleted'])} deleted")
+    if not stats:
+        return rows
+    return (f"entries: {stats.get('added', 0)} added, {stats.get('changed', 0)} changed, "
+            f"{stats.get('unchanged', 0)} unchanged, {stats.get('deleted', 0)} deleted; " + rows)
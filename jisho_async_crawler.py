@@ -0,0 +1,182 @@
+"""Concurrent asyncio crawler for the Jisho JLPT search pages.
+
+All JLPT levels are crawled at the same time through one pooled aiohttp
+session. A semaphore bounds the number of requests in flight and a
+rate_control.AdaptiveRateController per host paces them; throttled and
+failed requests are retried with jittered backoff. Within a level a few
+pages are requested ahead of the last parsed page; a level still ends at
+the first empty page or failed request, so the result is the same as the
+sequential get_jisho_words_by_jlpt() run. Responses go through the same
+disk cache as the sequential scrapers (http_fetch.ResponseCache).
+"""
+import asyncio
+import time
+from urllib.parse import urlsplit
+import aiohttp
+from http_fetch import OfflineCacheMiss, ResponseCache, is_transient_status
+from html_backends import DEFAULT_PARSER_BACKEND
+from rate_control import DEFAULT_MAX_RETRIES, THROTTLE_STATUSES, AdaptiveRateController, backoff_delay, parse_retry_after
+from jisho_sources import HEADERS, JISHO_BASE_URL, JISHO_SOURCES
+
+REQUEST_TIMEOUT = 30
+
+class AsyncFetcher:
+    """Shared HTTP client: pooled session, bounded in-flight requests, adaptive per-host rate with retries."""
+
+    def __init__(self, session, max_in_flight=8, rate=2.0, cache=None, offline=False,
+                 max_rate=None, min_rate=None, max_retries=DEFAULT_MAX_RETRIES):
+        self.session = session
+        self.rate = rate
+        self.max_rate = max_rate
+        self.min_rate = min_rate
+        self.max_retries = max_retries
+        self.cache = cache
+        self.offline = offline
+        self._semaphore = asyncio.Semaphore(max_in_flight)
+        self._controllers = {}
+        self.requests = 0
+        self.not_modified = 0
+        self.retries = 0
+
+    def controller(self, url):
+        host = urlsplit(url).netloc
+        controller = self._controllers.get(host)
+        if controller is None:
+            controller = self._controllers[host] = AdaptiveRateController(self.rate, self.max_rate, self.min_rate)
+        return controller
+
+    async def _request(self, url, entry, last_attempt):
+        """One attempt: (status, body, retry_after). body is None for a transient status that will be retried."""
+        async with self._semaphore:
+            self.requests += 1
+            headers = ResponseCache.conditional_headers(entry) if entry else None
+            async with self.session.get(url, headers=headers) as response:
+                if response.status == 304 and entry is not None:
+                    self.not_modified += 1
+                    self.cache.touch(url, entry, response.headers)
+                    return 200, self.cache.read_body(entry), None
+                if is_transient_status(response.status) and not last_attempt:
+                    return response.status, None, parse_retry_after(response.headers.get('Retry-After'))
+                response.raise_for_status()
+                body = await response.read()
+        if self.cache:
+            self.cache.store(url, response.headers, body)
+        return response.status, body, None
+
+    async def get(self, url):
+        entry = self.cache.lookup(url) if self.cache else None
+        if self.offline:
+            if entry is None:
+                raise OfflineCacheMiss(f"Not in cache (offline mode): {url}")
+            return self.cache.read_body(entry)
+
+        controller = self.controller(url)
+        attempt = 0
+        while True:
+            await asyncio.sleep(controller.reserve())
+            try:
+                status, body, retry_after = await self._request(url, entry, attempt >= self.max_retries)
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                controller.on_error()
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt)
+                reason = e.__class__.__name__
+            else:
+                if body is not None:
+                    controller.on_success()
+                    return body
+                if status in THROTTLE_STATUSES:
+                    controller.on_throttle(retry_after)
+                delay = max(retry_after or 0.0, backoff_delay(attempt))
+                reason = f"HTTP {status}"
+            print(f"  - {reason} for {url}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            self.retries += 1
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    def format_stats(self):
+        lines = [f"{host}: {controller.format_stats()}" for host, controller in self._controllers.items()]
+        return "\n".join(lines + [f"Retries: {self.retries}."])
+
+async def crawl_level(fetcher, level, base_url=JISHO_BASE_URL, pages_ahead=3, journal=None,
+                      parser=DEFAULT_PARSER_BACKEND, source="html"):
+    """Crawls one JLPT level. Pages are requested ahead but consumed strictly in order."""
+    page_url, parse_page = JISHO_SOURCES[source]
+    words = []
+    pending = {}
+    state = journal.cursor.get(level, {}) if journal else {}
+    if state.get("done"):
+        print(f"JLPT {level} was finished in a previous run.")
+        return words
+    page = next_page = state.get("page", 1)
+    print(f"Starting to scrape JLPT {level}..." if page == 1 else f"Resuming JLPT {level} at page {page}...")
+
+    try:
+        while True:
+            while next_page <= page + pages_ahead:
+                url = page_url(level, next_page, base_url)
+                pending[next_page] = asyncio.ensure_future(fetcher.get(url))
+                next_page += 1
+
+            try:
+                content = await pending.pop(page)
+            except (aiohttp.ClientError, asyncio.TimeoutError, OfflineCacheMiss) as e:
+                print(f"Error fetching page {page} for {level}: {e}")
+                break
+
+            page_words, block_count = parse_page(content, level, parser)
+            if not block_count:
+                print(f"No more words found for {level} on page {page}. Finished level.")
+                if journal:
+                    journal.commit({level: {"page": page, "done": True}})
+                break
+
+            words.extend(page_words)
+            if journal:
+                for word in page_words:
+                    journal.append(word)
+                journal.commit({level: {"page": page + 1, "done": False}})
+            print(f"Scraped page {page} for {level}, found {block_count} words. Total words for level: {len(words)}.")
+            page += 1
+    finally:
+        # 超出最后一页的预取请求不再需要
+        for task in pending.values():
+            task.cancel()
+        await asyncio.gather(*pending.values(), return_exceptions=True)
+
+    return words
+
+async def crawl_levels(levels, base_url=JISHO_BASE_URL, max_in_flight=8, rate=2.0, pages_ahead=3,
+                       cache_dir=None, offline=False, journal=None, parser=DEFAULT_PARSER_BACKEND,
+                       max_rate=None, min_rate=None, max_retries=DEFAULT_MAX_RETRIES, source="html"):
+    cache = ResponseCache(cache_dir) if cache_dir else None
+    connector = aiohttp.TCPConnector(limit=max_in_flight, ttl_dns_cache=300)
+    timeout = aiohttp.ClientTimeout(total=REQUEST_TIMEOUT)
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout, headers=HEADERS) as session:
+        fetcher = AsyncFetcher(session, max_in_flight, rate, cache, offline, max_rate, min_rate, max_retries)
+        start = time.perf_counter()
+        results = await asyncio.gather(*(crawl_level(fetcher, level, base_url, pages_ahead, journal, parser, source)
+                                         for level in levels))
+        elapsed = time.perf_counter() - start
+    print(f"Async crawl finished: {fetcher.requests} requests ({fetcher.not_modified} not modified) in {elapsed:.2f}s.")
+    if not offline:
+        print(fetcher.format_stats())
+    return results
+
+def crawl_all_levels(levels, base_url=JISHO_BASE_URL, max_in_flight=8, rate=2.0, pages_ahead=3,
+                     cache_dir=None, offline=False, journal=None, parser=DEFAULT_PARSER_BACKEND,
+                     max_rate=None, min_rate=None, max_retries=DEFAULT_MAX_RETRIES, source="html"):
+    """Crawls all levels concurrently and returns the words in level order, like the sequential run.
+
+    Pages of different levels are journaled as they arrive; ScrapeJournal.compact()
+    restores level order.
+    """
+    results = asyncio.run(crawl_levels(levels, base_url, max_in_flight, rate, pages_ahead,
+                                       cache_dir, offline, journal, parser, max_rate, min_rate, max_retries,
+                                       source))
+    all_words = []
+    for level, words in zip(levels, results):
+        all_words.extend(words)
+        print(f"Finished scraping for {level}. Total words so far: {len(all_words)}")
+    return all_words
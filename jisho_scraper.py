@@ -1,88 +1,140 @@
-
-
+import argparse
+import itertools
 import requests
-from bs4 import BeautifulSoup
-import json
-import time
-
-def get_jisho_words_by_jlpt(level):
-    """Fetches all words for a given JLPT level from Jisho.org."""
+from contextlib import closing
+from html_backends import DEFAULT_PARSER_BACKEND, PARSER_BACKENDS, check_parser_backend
+from http_fetch import Fetcher, add_fetch_arguments, cache_dir_from_args, fetcher_from_args
+from scrape_journal import ScrapeJournal
+from rate_control import AdaptiveRateController, RetryingFetcher, add_rate_arguments, retrying_fetcher_from_args
+from scrape_pipeline import FetchJob, FetchParsePipeline, add_pipeline_arguments, pipeline_from_args
+from jisho_sources import HEADERS, JISHO_BASE_URL, JISHO_SOURCES, JLPT_LEVELS
+
+def get_jisho_words_by_jlpt(level, base_url=JISHO_BASE_URL, fetcher=None, journal=None, parser=DEFAULT_PARSER_BACKEND,
+                            pipeline=None, source="html"):
+    """Fetches all words for a given JLPT level from Jisho.org.
+
+    With a journal, every page is journaled and committed as it is scraped,
+    and the level continues from the page stored in the journal cursor.
+    source picks the HTML search pages or the JSON search API (JISHO_SOURCES).
+    pipeline is a scrape_pipeline.FetchParsePipeline running the source's
+    parse function; by default pages are fetched one at a time.
+    """
+    page_url, parse_page = JISHO_SOURCES[source]
+    if pipeline is None:
+        # Be respectful to the server: about one request per second, slower when throttled
+        fetcher = fetcher or RetryingFetcher(Fetcher(HEADERS), AdaptiveRateController(1.0))
+        pipeline = FetchParsePipeline(fetcher, parse_page, max_ahead=1)
     words = []
-    page = 1
-    print(f"Starting to scrape JLPT {level}...")
-
-    while True:
-        url = f"https://jisho.org/search/%23jlpt-{level}?page={page}"
-        try:
-            response = requests.get(url, headers={'User-Agent': 'Mozilla/5.0'})
-            response.raise_for_status() # Raise an exception for bad status codes
-        except requests.exceptions.RequestException as e:
-            print(f"Error fetching page {page} for {level}: {e}")
-            break
-
-        soup = BeautifulSoup(response.content, 'html.parser')
-
-        # Find all the word blocks
-        word_blocks = soup.find_all('div', class_='concept_light')
-
-        if not word_blocks:
-            print(f"No more words found for {level} on page {page}. Finished level.")
-            break
-
-        for block in word_blocks:
-            japanese_block = block.find('div', class_='concept_light-representation')
-            english_block = block.find('div', class_='concept_light-meanings')
-
-            if not japanese_block or not english_block:
-                continue
-
-            furigana = ' '.join(f.get_text(strip=True) for f in japanese_block.find_all('span', class_='furigana'))
-            japanese_word = japanese_block.find('span', class_='text').get_text(strip=True)
-            
-            # Combine furigana and japanese word if furigana exists
-            full_japanese = f"{japanese_word} ({furigana})" if furigana else japanese_word
-
-            meanings = english_block.find_all('div', class_='meanings-wrapper')
-            english_senses = []
-            for meaning in meanings:
-                sense = meaning.find('span', class_='meaning-meaning').get_text(strip=True)
-                english_senses.append(sense)
-            
-            english_definition = "; ".join(english_senses)
-
-            word_data = {
-                'japanese': japanese_word,
-                'furigana': furigana,
-                'english': english_definition,
-                'jlpt_level': level.upper(),
-                'part_of_speech': ", ".join(tag.get_text(strip=True) for tag in english_block.find_all('span', class_='meaning-tags'))
-            }
-            words.append(word_data)
-
-        print(f"Scraped page {page} for {level}, found {len(word_blocks)} words. Total words for level: {len(words)}.")
-        page += 1
-        time.sleep(1) # Be respectful to the server
+    state = journal.cursor.get(level, {}) if journal else {}
+    if state.get("done"):
+        print(f"JLPT {level} was finished in a previous run.")
+        return words
+    start_page = state.get("page", 1)
+    print(f"Starting to scrape JLPT {level}..." if start_page == 1 else f"Resuming JLPT {level} at page {start_page}...")
+
+    # 页数未知, 任务无限生成; 流水线最多提前 max_ahead 页, 读到空页即停止
+    jobs = (FetchJob(page_url(level, page, base_url), (level, parser), page)
+            for page in itertools.count(start_page))
+    with closing(pipeline.run(jobs)) as pages:
+        for job, response, error, result in pages:
+            page = job.key
+            if error is None:
+                try:
+                    response.raise_for_status() # Raise an exception for bad status codes
+                except requests.exceptions.RequestException as e:
+                    error = e
+            if error is not None:
+                print(f"Error fetching page {page} for {level}: {error}")
+                break
+
+            page_words, block_count = result
+
+            if not block_count:
+                print(f"No more words found for {level} on page {page}. Finished level.")
+                if journal:
+                    journal.commit({level: {"page": page, "done": True}})
+                break
+
+            words.extend(page_words)
+            if journal:
+                for word in page_words:
+                    journal.append(word)
+                journal.commit({level: {"page": page + 1, "done": False}})
+            print(f"Scraped page {page} for {level}, found {block_count} words. Total words for level: {len(words)}.")
 
     return words
 
+def finish_journal(journal, levels=JLPT_LEVELS):
+    """Compacts the journal into the output file once every level is finished.
+
+    If a level is incomplete (e.g. a page failed), the output file is left
+    untouched and the journal is kept so the next run resumes from it.
+    Returns whether the output was written.
+    """
+    unfinished = [level for level in levels if not journal.cursor.get(level, {}).get("done")]
+    if unfinished:
+        journal.close()
+        print(f"Levels {', '.join(unfinished)} are incomplete ({journal.records} words scraped so far); "
+              f"{journal.output_path} was not written. Run again to resume from {journal.cursor_path}.")
+        return False
+    count = journal.compact(groups=[level.upper() for level in levels], group_key='jlpt_level')
+    journal.remove()
+    print(f"Successfully scraped all levels. Total words: {count}.")
+    print(f"Data saved to {journal.output_path}")
+    return True
+
 def main():
     """Main function to scrape all levels and save to a file."""
-    all_words = []
-    jlpt_levels = ['n5', 'n4', 'n3', 'n2', 'n1']
-
-    for level in jlpt_levels:
-        words_for_level = get_jisho_words_by_jlpt(level)
-        all_words.extend(words_for_level)
-        print(f"Finished scraping for {level}. Total words so far: {len(all_words)}\n")
-
-    # Save to a JSON file
-    output_filename = 'jisho_vocabulary.json'
-    with open(output_filename, 'w', encoding='utf-8') as f:
-        json.dump(all_words, f, ensure_ascii=False, indent=2)
-
-    print(f"Successfully scraped all levels. Total words: {len(all_words)}.")
-    print(f"Data saved to {output_filename}")
+    parser = argparse.ArgumentParser(description="Scrape JLPT vocabulary from Jisho.org.")
+    parser.add_argument("--output", default='jisho_vocabulary.json')
+    parser.add_argument("--base-url", default=JISHO_BASE_URL,
+                        help="Site to crawl (e.g. a local fixture server)")
+    parser.add_argument("--restart", action="store_true",
+                        help="Discard the journal of an interrupted run instead of resuming it")
+    parser.add_argument("--async", dest="use_async", action="store_true",
+                        help="Crawl all levels concurrently with asyncio")
+    parser.add_argument("--max-in-flight", type=int, default=8,
+                        help="Async mode: maximum concurrent requests")
+    parser.add_argument("--pages-ahead", type=int, default=3,
+                        help="Pages requested ahead of the last known page per level")
+    parser.add_argument("--parser", choices=PARSER_BACKENDS, default=DEFAULT_PARSER_BACKEND,
+                        help="HTML parser backend")
+    parser.add_argument("--source", choices=sorted(JISHO_SOURCES), default="html",
+                        help="Scrape the HTML search pages or read Jisho's JSON search API")
+    add_fetch_arguments(parser)
+    add_pipeline_arguments(parser)
+    add_rate_arguments(parser, rate=1.0)
+    args = parser.parse_args()
+    if args.source == "html":
+        check_parser_backend(args.parser)
+
+    meta = {"base_url": args.base_url}
+    if args.source != "html":
+        meta["source"] = args.source
+    journal = ScrapeJournal(args.output, meta, args.restart)
+    if journal.resumed:
+        print(f"Resuming from {journal.journal_path} ({journal.records} words already scraped).\n")
+
+    if args.use_async:
+        from jisho_async_crawler import crawl_all_levels
+        crawl_all_levels(JLPT_LEVELS, args.base_url, args.max_in_flight, args.rate, args.pages_ahead,
+                         cache_dir_from_args(args), args.offline, journal, args.parser,
+                         max(args.rate, args.max_rate), args.min_rate, args.max_retries, args.source)
+        if not finish_journal(journal):
+            raise SystemExit(1)
+        return
+
+    with retrying_fetcher_from_args(args, fetcher_from_args(args, HEADERS)) as fetcher, \
+            pipeline_from_args(args, fetcher, JISHO_SOURCES[args.source][1], max_ahead=args.pages_ahead + 1) as pipeline:
+        for level in JLPT_LEVELS:
+            get_jisho_words_by_jlpt(level, args.base_url, fetcher, journal, args.parser, pipeline, args.source)
+            print(f"Finished scraping for {level}. Total words so far: {journal.records}\n")
+        print(fetcher.format_stats())
+        print(pipeline.format_metrics())
+
+    # 由日志流式生成 JSON 文件
+    if not finish_journal(journal):
+        raise SystemExit(1)
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,109 @@
+"""Jisho page sources shared by the sequential and async scrapers.
+
+Page URLs, request headers and the page parsers live here, not in
+jisho_scraper.py, so jisho_async_crawler can import them while
+jisho_scraper.py is running as the main script.
+"""
+import json
+import re
+from html_backends import DEFAULT_PARSER_BACKEND, parse_html
+
+JISHO_BASE_URL = "https://jisho.org"
+JLPT_LEVELS = ['n5', 'n4', 'n3', 'n2', 'n1']
+HEADERS = {'User-Agent': 'Mozilla/5.0'}
+
+def jisho_search_url(level, page, base_url=JISHO_BASE_URL):
+    return f"{base_url}/search/%23jlpt-{level}?page={page}"
+
+def jisho_api_url(level, page, base_url=JISHO_BASE_URL):
+    return f"{base_url}/api/v1/search/words?keyword=%23jlpt-{level}&page={page}"
+
+SEARCH_PAGE_SUBTREES = ('div.concept_light',)
+
+def parse_jisho_search_page(content, level, parser=DEFAULT_PARSER_BACKEND):
+    """Parses one Jisho search result page. Returns (word records, number of result blocks on the page)."""
+    doc = parse_html(content, parser, only=SEARCH_PAGE_SUBTREES)
+
+    # Find all the word blocks
+    word_blocks = doc.select('div.concept_light')
+
+    words = []
+    for block in word_blocks:
+        japanese_block = block.select_one('div.concept_light-representation')
+        english_block = block.select_one('div.concept_light-meanings')
+
+        if not japanese_block or not english_block:
+            continue
+
+        furigana = ' '.join(f.stripped_text for f in japanese_block.select('span.furigana'))
+        japanese_word = japanese_block.select_one('span.text').stripped_text
+
+        meanings = english_block.select('div.meanings-wrapper')
+        english_senses = []
+        for meaning in meanings:
+            sense = meaning.select_one('span.meaning-meaning').stripped_text
+            english_senses.append(sense)
+
+        english_definition = "; ".join(english_senses)
+
+        word_data = {
+            'japanese': japanese_word,
+            'furigana': furigana,
+            'english': english_definition,
+            'jlpt_level': level.upper(),
+            'part_of_speech': ", ".join(tag.stripped_text for tag in english_block.select('span.meaning-tags'))
+        }
+        words.append(word_data)
+    return words, len(word_blocks)
+
+_KANA = "ぁ-ゟ゠-ヿ"
+_KANA_RUN_RE = re.compile(f"[{_KANA}]+|[^{_KANA}]+")
+_KATAKANA_TO_HIRAGANA = {code: code - 0x60 for code in range(0x30A1, 0x30F7)}
+
+def kanji_furigana(word, reading):
+    """The part of reading over the kanji, as the search page's furigana spans show it.
+
+    食べる/たべる -> た, 取り消す/とりけす -> とけ, お茶/おちゃ -> ちゃ. The full
+    reading is returned when the kana of the word do not line up with it.
+    """
+    runs = _KANA_RUN_RE.findall(word)
+    # 假名部分按字面匹配 (不区分平/片假名), 汉字部分各对应一段读音
+    pattern = "".join(re.escape(run.translate(_KATAKANA_TO_HIRAGANA)) if re.match(f"[{_KANA}]", run) else "(.+?)"
+                      for run in runs)
+    match = re.fullmatch(pattern, reading.translate(_KATAKANA_TO_HIRAGANA))
+    if match is None:
+        return reading
+    return "".join(reading[match.start(group):match.end(group)] for group in range(1, len(match.groups()) + 1))
+
+def jisho_api_record(entry, level):
+    """Maps one result of the JSON search API onto the record parse_jisho_search_page builds from HTML.
+
+    furigana only covers the kanji, like on the page. part_of_speech differs:
+    the API lists it for every entry, but the HTML parser looks for
+    span.meaning-tags and the live page renders the tags as div.meaning-tags,
+    so the HTML records have none (empty in all of jisho_vocabulary.json).
+    """
+    japanese = entry["japanese"][0] if entry.get("japanese") else {}
+    word = japanese.get("word")
+    senses = entry.get("senses", [])
+    return {
+        'japanese': word or japanese.get("reading", ""),
+        # 网页只在汉字上方标注假名, 纯假名词的 furigana 为空
+        'furigana': kanji_furigana(word, japanese.get("reading", "")) if word else "",
+        'english': "; ".join("; ".join(sense.get("english_definitions", [])) for sense in senses),
+        'jlpt_level': level.upper(),
+        # 网页只在词性变化时显示标签, API 中相同词性的后续义项为空列表
+        'part_of_speech': ", ".join(", ".join(sense["parts_of_speech"]) for sense in senses
+                                    if sense.get("parts_of_speech")),
+    }
+
+def parse_jisho_api_page(content, level, parser=None):
+    """Parses one page of /api/v1/search/words. Same return value as parse_jisho_search_page; parser is unused."""
+    entries = json.loads(content).get("data", [])
+    return [jisho_api_record(entry, level) for entry in entries], len(entries)
+
+# 抓取来源: (页面 URL, 解析函数)
+JISHO_SOURCES = {
+    "html": (jisho_search_url, parse_jisho_search_page),
+    "api": (jisho_api_url, parse_jisho_api_page),
+}
@@ -1,7 +1,75 @@
-
-
+import argparse
+import hashlib
 import json
+import os
 import time
+import ijson
+from incremental_build import (changeset_path_for, diff_records, empty_changeset, file_digest,
+                               format_incremental_stats, is_up_to_date, load_output_records, manifest_path_for,
+                               write_changeset, write_manifest)
+from jmdict_processor import get_commonness_score
+from stream_writers import open_record_writer
+
+# Bump when get_entry_key/build_vocabulary_record change, so old incremental manifests are rebuilt
+BUILD_VERSION = "vocabulary-3"
+
+def get_entry_key(entry):
+    """Returns the (japanese, furigana) key of an entry, or None if it has no Japanese form."""
+    # Get the most common Japanese writing (usually the first kanji form)
+    japanese = ""
+    if entry.get('kanji'):
+        japanese = entry['kanji'][0].get('text', '')
+
+    # Get the most common reading (usually the first kana form)
+    furigana = ""
+    if entry.get('kana'):
+        furigana = entry['kana'][0].get('text', '')
+
+    # If there is no kanji form, the kana form is the main representation
+    if not japanese:
+        japanese = furigana
+        furigana = "" # Furigana is not needed if it's the same as the main word
+
+    # Skip entries without a primary Japanese representation
+    if not japanese:
+        return None
+    return japanese, furigana
+
+def build_vocabulary_record(entry, key):
+    """Builds the database record for an entry, or None if it has no usable senses."""
+    japanese, furigana = key
+
+    # --- Sense and Definition Processing ---
+    senses = entry.get('sense', [])
+    if not senses:
+        return None
+
+    # For simplicity, we'll take the parts of speech from the first sense
+    part_of_speech = ", ".join(senses[0].get('partOfSpeech', []))
+
+    # Aggregate all English glossaries from all senses
+    all_glosses = []
+    for sense in senses:
+        for gloss in sense.get('gloss', []):
+            gloss_text = gloss.get('text')
+            if gloss_text:
+                all_glosses.append(gloss_text)
+
+    english = "; ".join(all_glosses)
+
+    if not english:
+        return None
+
+    # Assemble the final object for our database
+    return {
+        "japanese": japanese,
+        "furigana": furigana,
+        "english": english,
+        "jlpt_level": None,  # JMdict does not contain JLPT levels
+        "part_of_speech": part_of_speech,
+        "conjugations": None,
+        "commonness_score": get_commonness_score(entry.get("misc", []))  # 越小越常见, 供搜索排序
+    }
 
 def parse_jmdict_json(input_path: str, output_path: str):
     """Parses a JSON version of the JMdict dictionary to a simplified format."""
@@ -25,61 +93,18 @@ def parse_jmdict_json(input_path: str, output_path: str):
     start_time = time.time()
 
     for i, entry in enumerate(words_to_process):
-        # Get the most common Japanese writing (usually the first kanji form)
-        japanese = ""
-        if entry.get('kanji'):
-            japanese = entry['kanji'][0].get('text', '')
-
-        # Get the most common reading (usually the first kana form)
-        furigana = ""
-        if entry.get('kana'):
-            furigana = entry['kana'][0].get('text', '')
-
-        # If there is no kanji form, the kana form is the main representation
-        if not japanese:
-            japanese = furigana
-            furigana = "" # Furigana is not needed if it's the same as the main word
-
-        # Skip entries without a primary Japanese representation
-        if not japanese:
+        key = get_entry_key(entry)
+        if key is None:
             continue
 
         # --- Deduplication Logic ---
-        key = (japanese, furigana)
         if key in seen_keys:
             continue
         seen_keys.add(key)
 
-        # --- Sense and Definition Processing ---
-        senses = entry.get('sense', [])
-        if not senses:
-            continue
-
-        # For simplicity, we'll take the parts of speech from the first sense
-        part_of_speech = ", ".join(senses[0].get('partOfSpeech', []))
-
-        # Aggregate all English glossaries from all senses
-        all_glosses = []
-        for sense in senses:
-            for gloss in sense.get('gloss', []):
-                gloss_text = gloss.get('text')
-                if gloss_text:
-                    all_glosses.append(gloss_text)
-        
-        english = "; ".join(all_glosses)
-
-        if not english:
+        processed_word = build_vocabulary_record(entry, key)
+        if processed_word is None:
             continue
-
-        # Assemble the final object for our database
-        processed_word = {
-            "japanese": japanese,
-            "furigana": furigana,
-            "english": english,
-            "jlpt_level": None,  # JMdict does not contain JLPT levels
-            "part_of_speech": part_of_speech,
-            "conjugations": None
-        }
         processed_words.append(processed_word)
 
         # Print progress
@@ -99,12 +124,169 @@ def parse_jmdict_json(input_path: str, output_path: str):
     print(f"Total unique words processed and saved: {len(processed_words)}")
     print("------------------------")
 
+def encode_key(key):
+    """Exact (japanese, furigana) key as one bytes object, cheaper to keep in a set than a tuple of str."""
+    return "\x1f".join(key).encode('utf-8')
+
+def key_fingerprint(key):
+    """Compact 64-bit fingerprint of a (japanese, furigana) key, used for deduplication."""
+    digest = hashlib.blake2b(encode_key(key), digest_size=8).digest()
+    return int.from_bytes(digest, 'big')
+
+def parse_jmdict_json_streaming(input_path: str, output_path: str, output_format: str = "json"):
+    """Streaming version of parse_jmdict_json.
+
+    Entries are read one at a time with ijson and every record is written as
+    soon as it is built; only the encoded key of each unique word is kept for
+    deduplication, so memory grows with the number of keys rather than with the
+    records. With output_format="json" the file is identical to
+    parse_jmdict_json's output. The records go to <output>.tmp, which replaces
+    output_path only once the whole input has been read, so a failed run leaves
+    the previous output intact.
+    """
+    print(f"Streaming JMdict data from {input_path} (ijson backend: {ijson.backend})...")
+
+    seen_keys = set()
+    total_words = 0
+    saved_words = 0
+    tmp_path = output_path + ".tmp"
+    start_time = time.time()
+
+    try:
+        with open(input_path, 'rb') as f_in, open(tmp_path, 'w', encoding='utf-8') as f_out:
+            writer = open_record_writer(f_out, output_format)
+            for i, entry in enumerate(ijson.items(f_in, 'words.item')):
+                total_words += 1
+                key = get_entry_key(entry)
+                if key is None:
+                    continue
+
+                # --- Deduplication Logic ---
+                encoded_key = encode_key(key)
+                if encoded_key in seen_keys:
+                    continue
+                seen_keys.add(encoded_key)
+
+                processed_word = build_vocabulary_record(entry, key)
+                if processed_word is None:
+                    continue
+                writer.write(processed_word)
+                saved_words += 1
+
+                # Print progress
+                if (i + 1) % 5000 == 0:
+                    print(f"Processed {i + 1} entries...")
+            writer.close()
+        os.replace(tmp_path, output_path)
+    except FileNotFoundError as e:
+        if e.filename == input_path:
+            print(f"Error: Input file not found at {input_path}")
+        else:
+            print(f"Error: Cannot write {e.filename} (does the output directory exist?)")
+        return
+    except ijson.JSONError:
+        print(f"Error: Failed to decode JSON from {input_path}")
+        return
+    finally:
+        # Never leave a partial .tmp behind; on success it has already been renamed
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+    end_time = time.time()
+    print(f"\nFinished processing all entries in {end_time - start_time:.2f} seconds.")
+
+    print("\n--- Parsing Report ---")
+    print(f"Total entries in source file: {total_words}")
+    print(f"Total unique words processed and saved: {saved_words} ({output_path})")
+    print("------------------------")
+
+def vocabulary_key(record):
+    return (record["japanese"], record["furigana"])
+
+def parse_jmdict_json_incremental(input_path: str, output_path: str):
+    """Rebuilds output_path only if the input changed, and writes what changed.
+
+    The manifest next to the output holds the build version and the input
+    digest; when both match the previous output is kept as is. Otherwise
+    every entry is processed again (building a record is cheaper than hashing
+    the entry and reusing a stored one) and the new output is compared with
+    the previous one; the difference is written to <output>.changeset.json.
+    """
+    manifest_path = manifest_path_for(output_path)
+    try:
+        source = file_digest(input_path)
+    except FileNotFoundError:
+        print(f"Error: Input file not found at {input_path}")
+        return
+    if is_up_to_date(manifest_path, BUILD_VERSION, source, [output_path]):
+        write_changeset(changeset_path_for(output_path), empty_changeset())
+        print(f"{input_path} is unchanged since the last build; {output_path} is up to date.")
+        return
+
+    processed_words = []
+    seen_keys = set()
+    start_time = time.time()
+
+    try:
+        with open(input_path, 'rb') as f_in:
+            for entry in ijson.items(f_in, 'words.item'):
+                key = get_entry_key(entry)
+                if key is None:
+                    continue
+
+                # --- Deduplication Logic ---
+                if key in seen_keys:
+                    continue
+                seen_keys.add(key)
+
+                processed_word = build_vocabulary_record(entry, key)
+                if processed_word is not None:
+                    processed_words.append(processed_word)
+    except FileNotFoundError:
+        print(f"Error: Input file not found at {input_path}")
+        return
+    except ijson.JSONError:
+        print(f"Error: Failed to decode JSON from {input_path}")
+        return
+
+    end_time = time.time()
+    print(f"\nFinished processing all entries in {end_time - start_time:.2f} seconds.")
+
+    changeset = diff_records(load_output_records(output_path), processed_words, vocabulary_key)
+
+    if not any(changeset.values()) and os.path.exists(output_path):
+        print(f"{output_path} is unchanged.")
+    else:
+        print(f"Saving {len(processed_words)} unique words to {output_path}...")
+        with open(output_path, 'w', encoding='utf-8') as f:
+            json.dump(processed_words, f, ensure_ascii=False, indent=2)
+    write_changeset(changeset_path_for(output_path), changeset)
+    write_manifest(manifest_path, BUILD_VERSION, source, {})
+
+    print("\n--- Incremental Build Report ---")
+    print(format_incremental_stats({}, changeset))
+    print(f"Changeset saved to {changeset_path_for(output_path)}")
+    print("------------------------")
+
 def main():
     """Main function to run the parser."""
-    input_file = 'jmdict-eng-3.6.1.json'
-    output_file = 'vocabulary_final.json'
-    parse_jmdict_json(input_file, output_file)
+    parser = argparse.ArgumentParser(description="Convert JMdict JSON into vocabulary_final.json.")
+    parser.add_argument("--input", default='jmdict-eng-3.6.1.json', help="JMdict JSON file")
+    parser.add_argument("--output", default='vocabulary_final.json', help="Output file")
+    parser.add_argument("--stream", action="store_true",
+                        help="Read and write incrementally with constant memory")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip the build if the input is unchanged and write a changeset against the previous output")
+    parser.add_argument("--format", choices=("json", "ndjson"), default="json",
+                        help="Output format in streaming mode")
+    args = parser.parse_args()
+
+    if args.incremental:
+        parse_jmdict_json_incremental(args.input, args.output)
+    elif args.stream:
+        parse_jmdict_json_streaming(args.input, args.output, args.format)
+    else:
+        parse_jmdict_json(args.input, args.output)
 
 if __name__ == '__main__':
     main()
-
@@ -0,0 +1,207 @@
+"""Single-pass JMdict build.
+
+jmdict-eng-*.json is decoded once and every entry is handed to a list of
+sinks. Each sink builds one output artifact; new artifacts (search indexes
+and so on) only need a new sink class:
+
+    class MySink(JMdictSink):
+        name = "my-index"
+        def process(self, entry): ...
+        def finish(self): ...
+
+Sinks write to <output>.tmp and os.replace() it at the end, so a failed
+build leaves every previous output intact.
+"""
+import argparse
+import json
+import os
+import time
+import ijson
+from jmdict_json_parser import build_vocabulary_record, encode_key, get_entry_key
+from jmdict_processor import DEFAULT_WORD_LIMIT, TopWordsSelector, conjugate_words, extract_word_entry, init_conjugator
+from stream_writers import open_record_writer
+
+class JMdictSink:
+    """Base class for pipeline outputs.
+
+    start() is called once the input is open, process() once per entry and
+    finish() at the end. If the build fails, abort() is called instead of
+    (or after a failed) finish() and must remove any temporary files.
+    """
+
+    name = "sink"
+
+    def __init__(self):
+        self.elapsed = 0.0
+
+    def start(self):
+        pass
+
+    def process(self, entry):
+        raise NotImplementedError
+
+    def finish(self):
+        pass
+
+    def abort(self):
+        pass
+
+    def summary(self):
+        """Short description of what the sink produced, printed in the report."""
+        return ""
+
+class WordsSink(JMdictSink):
+    """Builds public/words.json, same as jmdict_processor.py."""
+
+    name = "words"
+
+    def __init__(self, output_path='public/words.json', limit=DEFAULT_WORD_LIMIT, conjugator="native"):
+        super().__init__()
+        self.output_path = output_path
+        self.conjugator = conjugator
+        self.selector = TopWordsSelector(limit)
+        self.saved = 0
+
+    def process(self, entry):
+        word_data = extract_word_entry(entry)
+        if word_data is not None:
+            self.selector.add(word_data)
+
+    def finish(self):
+        init_conjugator(self.conjugator)
+        final_words = conjugate_words(self.selector.result())
+        tmp_path = self.output_path + ".tmp"
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(final_words, f, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.output_path)
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.saved = len(final_words)
+
+    def summary(self):
+        return f"{self.saved} of {self.selector.total} words saved to {self.output_path}"
+
+class VocabularySink(JMdictSink):
+    """Builds vocabulary_final.json for supabase_importer, same as jmdict_json_parser.py --stream."""
+
+    name = "vocabulary"
+
+    def __init__(self, output_path='vocabulary_final.json', output_format="json"):
+        super().__init__()
+        self.output_path = output_path
+        self.output_format = output_format
+        self.tmp_path = output_path + ".tmp"
+        self.seen_keys = set()
+        self.f = None
+        self.writer = None
+
+    def start(self):
+        self.f = open(self.tmp_path, 'w', encoding='utf-8')
+        self.writer = open_record_writer(self.f, self.output_format)
+
+    def process(self, entry):
+        key = get_entry_key(entry)
+        if key is None:
+            return
+        encoded_key = encode_key(key)
+        if encoded_key in self.seen_keys:
+            return
+        self.seen_keys.add(encoded_key)
+        record = build_vocabulary_record(entry, key)
+        if record is not None:
+            self.writer.write(record)
+
+    def finish(self):
+        self.writer.close()
+        self.f.close()
+        os.replace(self.tmp_path, self.output_path)
+
+    def abort(self):
+        if self.f is not None:
+            self.f.close()
+        if os.path.exists(self.tmp_path):
+            os.remove(self.tmp_path)
+
+    def summary(self):
+        return f"{self.writer.count} unique words saved to {self.output_path}"
+
+def run_pipeline(input_path, sinks):
+    """Decodes input_path once and feeds every entry to all sinks. Returns (entries, parse seconds)."""
+    started = []
+    try:
+        total_entries, parse_time = _feed_sinks(input_path, sinks, started)
+        for sink in sinks:
+            start = time.perf_counter()
+            sink.finish()
+            sink.elapsed += time.perf_counter() - start
+    except BaseException:
+        # Outputs that were not finished keep their previous file
+        for sink in started:
+            sink.abort()
+        raise
+    return total_entries, parse_time
+
+def _feed_sinks(input_path, sinks, started):
+    total_entries = 0
+    parse_time = 0.0
+    with open(input_path, 'rb') as f:
+        for sink in sinks:
+            sink.start()
+            started.append(sink)
+        entries = iter(ijson.items(f, 'words.item'))
+        while True:
+            start = time.perf_counter()
+            entry = next(entries, None)
+            parse_time += time.perf_counter() - start
+            if entry is None:
+                break
+            total_entries += 1
+            for sink in sinks:
+                start = time.perf_counter()
+                sink.process(entry)
+                sink.elapsed += time.perf_counter() - start
+            if total_entries % 20000 == 0:
+                print(f"Processed {total_entries} entries...")
+    return total_entries, parse_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Build all JMdict artifacts in a single pass.")
+    parser.add_argument("--input", default='jmdict-eng-3.6.1.json', help="JMdict JSON file")
+    parser.add_argument("--sinks", default="words,vocabulary",
+                        help="Comma-separated outputs to build (words, vocabulary)")
+    parser.add_argument("--words-output", default='public/words.json')
+    parser.add_argument("--words-limit", type=int, default=DEFAULT_WORD_LIMIT)
+    parser.add_argument("--vocabulary-output", default='vocabulary_final.json')
+    args = parser.parse_args()
+
+    factories = {
+        "words": lambda: WordsSink(args.words_output, args.words_limit),
+        "vocabulary": lambda: VocabularySink(args.vocabulary_output),
+    }
+    names = [name.strip() for name in args.sinks.split(",") if name.strip()]
+    unknown = [name for name in names if name not in factories]
+    if unknown:
+        print(f"Error: unknown sinks: {', '.join(unknown)}")
+        return
+
+    sinks = [factories[name]() for name in names]
+    print(f"--- Building {', '.join(names)} from {args.input} (single pass) ---")
+    try:
+        total_entries, parse_time = run_pipeline(args.input, sinks)
+    except FileNotFoundError:
+        print(f"Error: Input file not found at {args.input}")
+        return
+    except ijson.JSONError as e:
+        print(f"Error decoding JSON from {args.input}: {e}")
+        return
+
+    print("\n--- Pipeline Report ---")
+    print(f"Entries decoded: {total_entries} in {parse_time:.2f}s")
+    for sink in sinks:
+        print(f"[{sink.name}] {sink.elapsed:.2f}s - {sink.summary()}")
+    print("------------------------")
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,26 @@
+import argparse
+import gc
+import heapq
 import json
+import os
 import re
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 import ijson
-from japanese_verb_conjugator_v2 import JapaneseVerbFormGenerator
+from conjugation_cache import DEFAULT_CACHE_PATH, ConjugationCache, format_stats, get_conjugator_version, merge_stats
+from conjugation_engine import ENGINE_VERSION, conjugate_batch
+from sharded_output import DEFAULT_SHARD_SIZE, shard_output_dir, words_partition, write_sharded
+from incremental_build import (changeset_path_for, diff_records, empty_changeset, file_digest,
+                               format_incremental_stats, is_up_to_date, iter_incremental, load_manifest,
+                               load_output_records, manifest_path_for, read_manifest_header, write_changeset,
+                               write_manifest)
+
+# 多进程模式下每个任务包含的条目数
+DEFAULT_CHUNK_SIZE = 500
+# 输出的单词数量上限 (按常见度排序后保留前 N 个)
+DEFAULT_WORD_LIMIT = 8000
+# 修改 extract_word_entry / 活用逻辑后递增, 使旧的增量构建清单失效
+BUILD_VERSION = 2
 
 # --- 1. 精心准备的高频词例句 ---
 CURATED_EXAMPLES = {
@@ -51,15 +70,54 @@ CURATED_EXAMPLES = {
 
 # --- 2. 活用逻辑 ---
 
-def conjugate_verb(verb, verb_group):
-    conjugator = JapaneseVerbFormGenerator()
+# "native": 使用 conjugation_engine 的查表批量活用; "library": 逐词调用 japanese_verb_conjugator_v2
+CONJUGATORS = ("native", "library")
+
+_conjugator = None
+_conjugator_name = "native"
+_conjugation_cache = None
+
+def init_conjugation_cache(cache_path):
+    """启用活用缓存 (主进程和每个工作进程各调用一次), cache_path 为 None 时不使用缓存."""
+    global _conjugation_cache
+    if _conjugation_cache is not None:
+        _conjugation_cache.close()
+    _conjugation_cache = ConjugationCache(cache_path) if cache_path else None
+
+def init_conjugator(conjugator_name, cache_path=None):
+    """选择活用实现. 查表实现比读缓存更快, 所以缓存只用于 library 模式."""
+    global _conjugator_name
+    _conjugator_name = conjugator_name
+    init_conjugation_cache(cache_path if conjugator_name == "library" else None)
+
+def close_conjugation_cache():
+    """关闭缓存并返回尚未汇报的命中统计."""
+    global _conjugation_cache
+    if _conjugation_cache is None:
+        return {}
+    stats = _conjugation_cache.take_stats()
+    _conjugation_cache.close()
+    _conjugation_cache = None
+    return stats
+
+def _conjugate_verb_uncached(verb, verb_group):
+    global _conjugator
+    if _conjugator is None:
+        # 只有 library 模式需要这个库, 默认的 native 模式不依赖它
+        from japanese_verb_conjugator_v2 import JapaneseVerbFormGenerator
+        _conjugator = JapaneseVerbFormGenerator()
     try:
-        conjugations = conjugator.conjugate(verb, verb_group)
+        conjugations = _conjugator.conjugate(verb, verb_group)
         forms = {key: value for tense in conjugations.values() for key, value in tense.items()}
         return forms
     except Exception as e:
         return {}
 
+def conjugate_verb(verb, verb_group):
+    if _conjugation_cache is None:
+        return _conjugate_verb_uncached(verb, verb_group)
+    return _conjugation_cache.get_or_compute(verb, verb_group, _conjugate_verb_uncached)
+
 def conjugate_adjective(adjective, adj_type):
     forms = {"dictionary_form": adjective}
     if adj_type == "i-adjective":
@@ -153,81 +211,306 @@ def get_commonness_score(misc_tags):
             score = min(score, COMMONNESS_PRIORITY[tag])
     return score
 
-def main():
-    input_filename = 'jmdict-eng-3.6.1.json' # 明确指定输入文件
-    output_filename = 'public/words.json' # 更改输出文件名
-    
-    processed_words = []
+def extract_word_entry(entry):
+    """把一条 JMdict 条目转换为前端使用的单词结构 (forms 尚未填充), 无法分类的条目返回 None."""
+    word_type, group = "unknown", ""
+    pos_tags_for_entry = []
+
+    if "sense" in entry:
+        for sense in entry["sense"]:
+            if "partOfSpeech" in sense:
+                for pos in sense["partOfSpeech"]:
+                    pos_tags_for_entry.append(pos)
+                    word_type, group = get_word_type_and_group_from_pos(pos_tags_for_entry)
+                    if word_type != "unknown":
+                        break
+            if word_type != "unknown":
+                break
+    if word_type == "unknown":
+        return None
+
+    # 提取词汇的汉字形式和假名形式
+    word_dict_form = ""
+    word_reading = ""
+
+    # 优先使用 kanji 字段作为辞书形
+    if "kanji" in entry and len(entry["kanji"]) > 0:
+        word_dict_form = entry["kanji"][0]["text"]
+
+    # 使用 kana 字段作为读音
+    if "kana" in entry and len(entry["kana"]) > 0:
+        word_reading = entry["kana"][0]["text"]
+
+    # 如果没有汉字形式，使用假名形式作为辞书形
+    if not word_dict_form and word_reading:
+        word_dict_form = word_reading
+    elif not word_dict_form and not word_reading:
+        return None # 无法获取词汇形式，跳过
+
+    # 确保有假名读音用于活用
+    if not word_reading:
+        word_reading = word_dict_form # Fallback if no specific kana reading
+
+    # 提取释义
+    meaning = ""
+    if "sense" in entry and len(entry["sense"]) > 0 and "gloss" in entry["sense"][0]:
+        meaning = "; ".join([g["text"] for g in entry["sense"][0]["gloss"]])
+
+    # 获取常见度分数
+    commonness_score = get_commonness_score(entry.get("misc", []))
+
+    # 构建最终数据结构
+    return {
+        "word": word_dict_form,
+        "reading": word_reading,
+        "meaning": meaning,
+        "type": word_type,
+        "group": group, # 仅对动词和形容词有效
+        "forms": {}, # 由 conjugate_words 填充
+        "examples": CURATED_EXAMPLES.get(word_dict_form, []),
+        "commonness_score": commonness_score # 添加常见度分数
+    }
+
+def conjugate_words(words):
+    """为一批单词填充 forms. native 模式下整批只调用一次 conjugate_batch."""
+    targets = [w for w in words if w["type"] in ("verb", "adjective")]
+    if _conjugator_name == "native":
+        forms_list = conjugate_batch([(w["word"], w["group"]) for w in targets])
+    else:
+        forms_list = [
+            conjugate_verb(w["word"], w["group"]) if w["type"] == "verb"
+            else conjugate_adjective(w["word"], w["group"]) # 形容词活用
+            for w in targets
+        ]
+    for word_data, forms in zip(targets, forms_list):
+        word_data["forms"] = forms
+    return words
+
+def extract_word_chunk(entries):
+    """在子进程中提取一批条目 (不做活用), 保持输入顺序."""
+    results = []
+    for entry in entries:
+        word_data = extract_word_entry(entry)
+        if word_data is not None:
+            results.append(word_data)
+    return results, {}
+
+def conjugate_word_chunk(words):
+    """为一批已入选的单词填充 forms, 同时返回本批次的缓存统计."""
+    conjugate_words(words)
+    cache_stats = {}
+    if _conjugation_cache is not None:
+        # 工作进程退出时不会执行清理逻辑, 所以每个批次结束后立即提交
+        _conjugation_cache.flush()
+        cache_stats = _conjugation_cache.take_stats()
+    return words, cache_stats
+
+def iter_chunks(iterable, chunk_size):
+    chunk = []
+    for item in iterable:
+        chunk.append(item)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def iter_chunk_results(func, chunks, executor=None, max_in_flight=1, cache_stats=None):
+    """按输入顺序产出 func(chunk) 返回的单词.
+
+    传入 executor 时分块交给进程池处理. 提交窗口限制为 max_in_flight 个分块,
+    结果按提交顺序取回, 因此输出与串行模式完全一致. 如果传入 cache_stats 字典,
+    各进程的缓存命中统计会累加到其中.
+    """
+    if cache_stats is None:
+        cache_stats = {}
+
+    if executor is None:
+        for chunk in chunks:
+            results, stats = func(chunk)
+            merge_stats(cache_stats, stats)
+            yield from results
+        return
+
+    pending = deque()
+
+    def collect(future):
+        results, stats = future.result()
+        merge_stats(cache_stats, stats)
+        return results
+
+    for chunk in chunks:
+        pending.append(executor.submit(func, chunk))
+        if len(pending) >= max_in_flight:
+            yield from collect(pending.popleft())
+    while pending:
+        yield from collect(pending.popleft())
+
+class TopWordsSelector:
+    """流式选出 commonness_score 最小的 limit 个单词.
+
+    使用大小为 limit 的最大堆, 分数相同时先出现的条目优先, 结果等价于对全部单词
+    做稳定排序后截断. limit 为 0 或 None 时保留全部单词.
+    """
+
+    def __init__(self, limit):
+        self.limit = limit
+        self.total = 0
+        self._heap = []
+
+    def add(self, word_data):
+        order = self.total
+        self.total += 1
+        # 堆顶是目前最差的入选者: 分数最大, 分数相同时出现得最晚
+        item = (-word_data["commonness_score"], -order, word_data)
+        if not self.limit or len(self._heap) < self.limit:
+            heapq.heappush(self._heap, item)
+        elif item > self._heap[0]:
+            heapq.heapreplace(self._heap, item)
+
+    def result(self):
+        """按 (commonness_score, 出现顺序) 排好序的入选单词."""
+        return [word_data for _, _, word_data in sorted(self._heap, reverse=True)]
+
+def select_top_words(words, limit):
+    """选出最常见的 limit 个单词, 返回 (入选单词, 处理总数)."""
+    selector = TopWordsSelector(limit)
+    for word_data in words:
+        selector.add(word_data)
+    return selector.result(), selector.total
+
+def build_words(entries, limit=DEFAULT_WORD_LIMIT, workers=1, chunk_size=DEFAULT_CHUNK_SIZE,
+                conjugator="native", cache_path=None, cache_stats=None, pre_extracted=False):
+    """提取全部条目, 选出最常见的 limit 个单词, 再只对入选单词做活用.
+
+    内存占用只与 limit 成正比, 与 JMdict 的大小无关. 返回 (最终单词列表, 处理总数).
+    pre_extracted 为 True 时 entries 已经是 extract_word_entry 的结果 (增量构建).
+    已经带有 forms 的单词 (增量构建从清单复用的结果) 不再活用; 新活用的 forms
+    会写回传入的单词对象, 增量构建的清单因此能保存它们.
+    """
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(max_workers=workers, initializer=init_conjugator,
+                                       initargs=(conjugator, cache_path))
+    else:
+        init_conjugator(conjugator, cache_path)
+    max_in_flight = workers * 4
 
-    print(f"--- Loading and processing {input_filename} (Streaming) ---")
+    try:
+        if pre_extracted:
+            extracted = (word_data for word_data in entries if word_data is not None)
+        else:
+            extracted = iter_chunk_results(extract_word_chunk, iter_chunks(entries, chunk_size),
+                                           executor, max_in_flight)
+        selected, total = select_top_words(extracted, limit)
+        pending = [word_data for word_data in selected
+                   if word_data["type"] in ("verb", "adjective") and not word_data["forms"]]
+        conjugated = iter_chunk_results(conjugate_word_chunk, iter_chunks(pending, chunk_size),
+                                        executor, max_in_flight, cache_stats)
+        # 进程池返回的是副本, 按顺序把结果写回原对象
+        for word_data, result in zip(pending, conjugated):
+            word_data["forms"] = result["forms"]
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        elif cache_stats is not None:
+            merge_stats(cache_stats, close_conjugation_cache())
+        else:
+            close_conjugation_cache()
+    return selected, total
+
+def build_version(conjugator, limit, shard_size=None):
+    """增量构建清单的版本: 构建代码版本 + 活用实现及其版本 + 所有影响输出的选项.
+
+    shard_size 为 None 表示不写分片.
+    """
+    if conjugator == "library":
+        conjugator = f"library-{get_conjugator_version()}"
+    else:
+        conjugator = ENGINE_VERSION
+    shards = f"shards-{shard_size}" if shard_size is not None else "no-shards"
+    return f"words-{BUILD_VERSION}/{conjugator}/limit-{limit}/{shards}"
+
+def words_key(word_data):
+    return (word_data["word"], word_data["reading"], word_data["meaning"])
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Build public/words.json from JMdict.")
+    parser.add_argument("--input", default='jmdict-eng-3.6.1.json', help="JMdict JSON file")
+    parser.add_argument("--output", default='public/words.json', help="Output words file")
+    parser.add_argument("--limit", type=int, default=DEFAULT_WORD_LIMIT,
+                        help="Keep only the N most common words (0 = keep all)")
+    parser.add_argument("--sharded", action="store_true",
+                        help="Also write the output as word type/commonness shards plus a manifest")
+    parser.add_argument("--shard-size", type=int, default=DEFAULT_SHARD_SIZE,
+                        help="Maximum number of words per shard")
+    parser.add_argument("--incremental", action="store_true",
+                        help="Skip the build if the input is unchanged and write a changeset against the previous "
+                             "output; with --conjugator library also reuse conjugations of unchanged entries")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="Number of worker processes (1 = serial)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE,
+                        help="Entries per chunk sent to a worker process")
+    parser.add_argument("--conjugator", choices=CONJUGATORS, default="native",
+                        help="native = table-driven batch engine, library = japanese_verb_conjugator_v2")
+    parser.add_argument("--conjugation-cache", default=DEFAULT_CACHE_PATH,
+                        help="SQLite file used to cache library conjugations between builds")
+    parser.add_argument("--no-conjugation-cache", action="store_true",
+                        help="Always recompute conjugations")
+    return parser.parse_args(argv)
+
+def main(argv=None):
+    args = parse_args(argv)
+    input_filename = args.input # 明确指定输入文件
+    output_filename = args.output # 更改输出文件名
+
+    cache_path = None
+    if args.conjugator == "library" and not args.no_conjugation_cache:
+        cache_path = args.conjugation_cache
+    cache_stats = {}
+    incremental_stats = {}
+    manifest = {}
+    manifest_path = manifest_path_for(output_filename)
+    version = build_version(args.conjugator, args.limit, args.shard_size if args.sharded else None)
+    source = None
+    # 逐条目复用只对 library 模式划算: native 活用 8000 个词不到一秒, 整体耗时以 JSON 解析为主,
+    # 再加上每个条目的哈希和清单读写反而比完整构建更慢. native 模式只保存清单头, 每次完整构建后做 diff
+    reuse_entries = args.incremental and args.conjugator == "library"
+
+    mode = f"{args.workers} workers" if args.workers > 1 else "Streaming"
+    if args.incremental:
+        mode += ", incremental"
+    print(f"--- Loading and processing {input_filename} ({mode}) ---")
     try:
         with open(input_filename, 'rb') as f:
             entries = ijson.items(f, 'words.item')
-            for entry in entries:
-                word_type, group = "unknown", ""
-                pos_tags_for_entry = []
-
-                if "sense" in entry:
-                    for sense in entry["sense"]:
-                        if "partOfSpeech" in sense:
-                            for pos in sense["partOfSpeech"]:
-                                pos_tags_for_entry.append(pos)
-                                word_type, group = get_word_type_and_group_from_pos(pos_tags_for_entry)
-                                if word_type != "unknown":
-                                    break
-                        if word_type != "unknown":
-                            break
-                if word_type == "unknown":
-                    continue
-
-                # 提取词汇的汉字形式和假名形式
-                word_dict_form = ""
-                word_reading = ""
-
-                # 优先使用 kanji 字段作为辞书形
-                if "kanji" in entry and len(entry["kanji"]) > 0:
-                    word_dict_form = entry["kanji"][0]["text"]
-                
-                # 使用 kana 字段作为读音
-                if "kana" in entry and len(entry["kana"]) > 0:
-                    word_reading = entry["kana"][0]["text"]
-                
-                # 如果没有汉字形式，使用假名形式作为辞书形
-                if not word_dict_form and word_reading:
-                    word_dict_form = word_reading
-                elif not word_dict_form and not word_reading:
-                    continue # 无法获取词汇形式，跳过
-
-                # 确保有假名读音用于活用
-                if not word_reading:
-                    word_reading = word_dict_form # Fallback if no specific kana reading
-
-                # 提取释义
-                meaning = ""
-                if "sense" in entry and len(entry["sense"]) > 0 and "gloss" in entry["sense"][0]:
-                    meaning = "; ".join([g["text"] for g in entry["sense"][0]["gloss"]])
-
-                forms = {}
-                if word_type == "verb":
-                    forms = conjugate_verb(word_dict_form, group)
-                elif word_type == "adjective":
-                    forms = conjugate_adjective(word_dict_form, group) # 形容词活用
-
-                # 获取常见度分数
-                commonness_score = get_commonness_score(entry.get("misc", []))
-
-                # 构建最终数据结构
-                final_word_data = {
-                    "word": word_dict_form,
-                    "reading": word_reading,
-                    "meaning": meaning,
-                    "type": word_type,
-                    "group": group, # 仅对动词和形容词有效
-                    "forms": forms,
-                    "examples": CURATED_EXAMPLES.get(word_dict_form, []),
-                    "commonness_score": commonness_score # 添加常见度分数
-                }
-                processed_words.append(final_word_data)
+            if args.incremental:
+                source = file_digest(input_filename)
+                outputs = [output_filename] + ([shard_output_dir(output_filename)] if args.sharded else [])
+                if is_up_to_date(manifest_path, version, source, outputs):
+                    # 输入文件和构建版本都没变, 上次的输出仍然有效
+                    write_changeset(changeset_path_for(output_filename), empty_changeset())
+                    print(f"{input_filename} is unchanged since the last build; {output_filename} is up to date.")
+                    return
+            if reuse_entries:
+                # 只重新提取内容哈希发生变化的条目, 其余直接复用上次构建的结果 (包括活用)
+                previous_manifest = load_manifest(manifest_path, version)
+                print(f"Loaded manifest with {len(previous_manifest)} entries from {manifest_path}.")
+                # 清单在整个构建期间都存活; 冻结后每次 GC 都跳过这几十万个对象, 构建结束后解冻
+                gc.freeze()
+                try:
+                    extracted = iter_incremental(entries, previous_manifest, extract_word_entry,
+                                                 manifest, incremental_stats)
+                    final_words, total_words = build_words(extracted, args.limit, args.workers, args.chunk_size,
+                                                           args.conjugator, cache_path, cache_stats,
+                                                           pre_extracted=True)
+                finally:
+                    gc.unfreeze()
+                del previous_manifest
+            else:
+                # 先按常见度选出前 N 个单词, 只对入选的单词做活用
+                final_words, total_words = build_words(entries, args.limit, args.workers, args.chunk_size,
+                                                       args.conjugator, cache_path, cache_stats)
 
     except FileNotFoundError:
         print(f"Error: {input_filename} not found. Please ensure it's in the same directory as the script.")
@@ -236,18 +519,42 @@ def main():
         print(f"Error decoding JSON from {input_filename}: {e}")
         return
 
-    print(f"Successfully processed {len(processed_words)} words.")
+    print(f"Successfully processed {total_words} words, kept {len(final_words)} most common.")
+    if cache_path:
+        print(f"Conjugation cache ({cache_path}): {format_stats(cache_stats)}")
+
+    changeset = None
+    if args.incremental:
+        changeset = diff_records(load_output_records(output_filename), final_words, words_key)
 
-    # 根据常见度分数排序
-    processed_words.sort(key=lambda x: x['commonness_score'])
+    unchanged = changeset is not None and not any(changeset.values()) and os.path.exists(output_filename)
+    if unchanged and args.sharded:
+        # 分片选项变了 (版本不同) 时单词没变也要重写分片
+        unchanged = (os.path.exists(shard_output_dir(output_filename))
+                     and read_manifest_header(manifest_path).get("version") == version)
+    if unchanged:
+        # 输出没有变化, 保留原文件 (和分片)
+        print(f"--- {output_filename} is unchanged ---")
+    else:
+        print(f"--- Saving data to {output_filename} ---")
+        with open(output_filename, 'w', encoding='utf-8') as f:
+            json.dump(final_words, f, ensure_ascii=False, indent=2)
 
-    # Truncate to 8000 words
-    final_words = processed_words[:8000]
+        if args.sharded:
+            shard_dir = shard_output_dir(output_filename)
+            shard_manifest = write_sharded(final_words, shard_dir, "words", "word", words_partition, args.shard_size)
+            print(f"Saved {len(shard_manifest['shards'])} shards to {shard_dir}/")
 
-    print(f"--- Saving data to {output_filename} ---")
-    with open(output_filename, 'w', encoding='utf-8') as f:
-        json.dump(final_words, f, ensure_ascii=False, indent=2)
+    if args.incremental:
+        write_changeset(changeset_path_for(output_filename), changeset)
+        write_manifest(manifest_path, version, source, manifest)
+        if reuse_entries:
+            print(f"Incremental build: {format_incremental_stats(incremental_stats, changeset)}")
+        else:
+            print(f"Incremental build (full rebuild with the native engine): "
+                  f"{format_incremental_stats(incremental_stats, changeset)}")
+        print(f"Changeset saved to {changeset_path_for(output_filename)}")
     print("--- All Done! ---")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
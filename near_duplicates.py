@@ -0,0 +1,327 @@
+"""Near-duplicate detection for merged vocabulary files.
+
+check_duplicates.py only finds identical (japanese, furigana) keys. Merged
+data also contains the same word as a katakana/hiragana or full/half-width
+variant (テレビ / ﾃﾚﾋﾞ), as an okurigana variant (取り扱い / 取扱い), or with
+a reworded English gloss. This module finds those entries in three steps.
+
+1. Candidate pairs. Entries are blocked on their folded key (NFKC, kana
+   folding), on their kanji skeleton plus the first kana of the reading,
+   and by MinHash/LSH over English gloss shingles. The shingles are
+   lowercase words and word pairs. The signatures are split into bands,
+   and entries that share a band become candidates. The work is linear in
+   the number of entries, not quadratic. Buckets larger than max_bucket,
+   such as very generic glosses, are skipped and counted.
+2. Scoring. score = (key similarity + estimated gloss Jaccard) / 2. A gloss
+   match alone (学校 / スクール "school") stays below the threshold, and so
+   does a key match whose meaning differs (上げる / 上がる).
+3. Clusters. Pairs at or above the threshold are joined with union-find.
+   The clusters are ranked by mean score and written to a JSON report.
+
+    python near_duplicates.py jisho_vocabulary.json vocabulary_final.json --report near_duplicates.json
+"""
+import argparse
+import hashlib
+import json
+import re
+import time
+from array import array
+from functools import lru_cache
+import ijson
+from check_duplicates import fold_kana, iter_records, normalize_key, is_kana
+
+DEFAULT_REPORT = 'near_duplicates.json'
+DEFAULT_NUM_PERM = 64
+DEFAULT_BANDS = 16
+DEFAULT_THRESHOLD = 0.6
+DEFAULT_MAX_BUCKET = 50
+SHOW_CLUSTERS = 10
+
+# 键相似度: 折叠后完全相同 / 只有送假名不同 / 其余按字符二元组计算 (最高 0.5)
+KEY_SIMILARITY = {"exact key": 1.0, "kana/width variant": 1.0, "okurigana variant": 0.8}
+
+_WORD_RE = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(("a", "an", "the", "of", "be", "or", "and", "one", "s", "something", "someone",
+                       "esp", "etc", "e", "g", "in", "on", "for", "with", "as", "by"))
+
+def gloss_shingles(english):
+    """Lowercase words and adjacent word pairs of the gloss, without stopwords."""
+    words = [word for word in _WORD_RE.findall((english or "").lower()) if word not in STOPWORDS]
+    return set(words) | {f"{a} {b}" for a, b in zip(words, words[1:])}
+
+def make_shingle_hasher(num_perm):
+    """shingle -> num_perm 32-bit hash values. One SHAKE-128 digest stands in for num_perm permutations."""
+    @lru_cache(maxsize=1 << 16)
+    def shingle_hashes(shingle):
+        return array('I', hashlib.shake_128(shingle.encode('utf-8')).digest(4 * num_perm))
+    return shingle_hashes
+
+def minhash(shingles, shingle_hashes):
+    """MinHash signature of a shingle set (None for an empty set)."""
+    if not shingles:
+        return None
+    hashes = [shingle_hashes(shingle) for shingle in shingles]
+    if len(hashes) == 1:
+        return hashes[0]
+    return array('I', map(min, *hashes))
+
+def kanji_skeleton(folded):
+    """The non-kana characters of a folded word (取り扱い, 取扱い -> 取扱)."""
+    return "".join(ch for ch in folded if not is_kana(ch))
+
+def _bigrams(text):
+    return {text[i:i + 2] for i in range(len(text) - 1)} or {text}
+
+def key_similarity(a, b):
+    """(similarity, reason) for two entries' (normalized key, folded key, skeleton, reading head) tuples."""
+    if a[0] == b[0]:
+        return KEY_SIMILARITY["exact key"], "exact key"
+    if a[1] == b[1]:
+        return KEY_SIMILARITY["kana/width variant"], "kana/width variant"
+    if a[2] and a[2] == b[2] and a[3] == b[3]:
+        return KEY_SIMILARITY["okurigana variant"], "okurigana variant"
+    x, y = _bigrams(a[1][0]), _bigrams(b[1][0])
+    return len(x & y) / len(x | y) * 0.5, "similar word and gloss"
+
+class UnionFind:
+    def __init__(self):
+        self.parent = {}
+
+    def find(self, x):
+        parent = self.parent
+        root = x
+        while parent.get(root, root) != root:
+            root = parent[root]
+        while x != root:
+            parent[x], x = root, parent.get(x, x)
+        return root
+
+    def union(self, a, b):
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+class NearDuplicateIndex:
+    """Compact per-entry state: keys for blocking/scoring and MinHash signatures in one flat array."""
+
+    def __init__(self, num_perm=DEFAULT_NUM_PERM):
+        self.num_perm = num_perm
+        self.keys = []
+        self.sources = array('H')
+        self.positions = array('L')
+        self.signatures = array('I')
+        self.has_gloss = bytearray()
+        self._shingle_hashes = make_shingle_hasher(num_perm)
+        self._empty = array('I', bytes(4 * num_perm))
+
+    def __len__(self):
+        return len(self.keys)
+
+    def add(self, record, source, position):
+        japanese = record.get('japanese') or record.get('word') or record.get('verb')
+        if not japanese:
+            return False
+        furigana = record['furigana'] if 'furigana' in record else record.get('reading', "")
+        key = normalize_key(japanese, furigana)
+        folded = (fold_kana(key[0]), key[1])
+        reading = fold_kana(furigana) or folded[0]
+        self.keys.append((key, folded, kanji_skeleton(folded[0]), reading[:1]))
+        self.sources.append(source)
+        self.positions.append(position)
+        english = record.get('english') or record.get('meaning') or ""
+        if isinstance(english, list):
+            english = "; ".join(english)
+        signature = minhash(gloss_shingles(english), self._shingle_hashes)
+        self.signatures.extend(signature if signature is not None else self._empty)
+        self.has_gloss.append(signature is not None)
+        return True
+
+    def signature(self, i):
+        return self.signatures[i * self.num_perm:(i + 1) * self.num_perm]
+
+    def gloss_similarity(self, i, j):
+        """Estimated Jaccard similarity: the share of equal MinHash values."""
+        if not (self.has_gloss[i] and self.has_gloss[j]):
+            return float(self.has_gloss[i] == self.has_gloss[j])
+        n = self.num_perm
+        equal = sum(a == b for a, b in zip(self.signatures[i * n:(i + 1) * n], self.signatures[j * n:(j + 1) * n]))
+        return equal / n
+
+def _bucket_pairs(buckets, candidates, max_bucket, stats):
+    for ids in buckets.values():
+        if len(ids) < 2:
+            continue
+        if len(ids) > max_bucket:
+            stats["skipped_buckets"] += 1
+            continue
+        for x in range(len(ids)):
+            for y in range(x + 1, len(ids)):
+                candidates.add((ids[x] << 32) | ids[y])
+
+def candidate_pairs(index, bands=DEFAULT_BANDS, max_bucket=DEFAULT_MAX_BUCKET):
+    """Set of candidate pairs, encoded as (i << 32) | j with i < j, and blocking stats."""
+    stats = {"skipped_buckets": 0}
+    candidates = set()
+    # 键分块: 折叠键相同, 或汉字骨架 + 读音首字相同
+    for block_key in (lambda key: key[1], lambda key: (key[2], key[3]) if key[2] else None):
+        buckets = {}
+        for i, key in enumerate(index.keys):
+            value = block_key(key)
+            if value is not None:
+                buckets.setdefault(value, []).append(i)
+        _bucket_pairs(buckets, candidates, max_bucket, stats)
+    stats["key_candidates"] = len(candidates)
+
+    # LSH: 签名分成 bands 段, 任意一段完全相同即为候选; 每次只保留一段的桶
+    rows = index.num_perm // bands
+    n = index.num_perm
+    signatures = index.signatures
+    for band in range(bands):
+        buckets = {}
+        start = band * rows
+        for i in range(len(index)):
+            if index.has_gloss[i]:
+                offset = i * n + start
+                buckets.setdefault(signatures[offset:offset + rows].tobytes(), []).append(i)
+        _bucket_pairs(buckets, candidates, max_bucket, stats)
+    stats["candidates"] = len(candidates)
+    return candidates, stats
+
+def score_pairs(index, candidates, threshold=DEFAULT_THRESHOLD):
+    """[(i, j, score, key similarity, gloss similarity, reason)] for pairs scoring at least threshold."""
+    pairs = []
+    mask = (1 << 32) - 1
+    for pair in candidates:
+        i, j = pair >> 32, pair & mask
+        key_sim, reason = key_similarity(index.keys[i], index.keys[j])
+        # 键相似度太低时, 词义再接近也达不到阈值, 不必比较签名
+        if (key_sim + 1.0) / 2 < threshold:
+            continue
+        gloss_sim = index.gloss_similarity(i, j)
+        score = (key_sim + gloss_sim) / 2
+        if score >= threshold:
+            pairs.append((i, j, score, key_sim, gloss_sim, reason))
+    return pairs
+
+def build_clusters(pairs):
+    """Union-find over the scored pairs. Clusters are ranked by mean pair score, then size."""
+    union_find = UnionFind()
+    for i, j, *_ in pairs:
+        union_find.union(i, j)
+    clusters = {}
+    for pair in pairs:
+        clusters.setdefault(union_find.find(pair[0]), []).append(pair)
+    result = []
+    for cluster_pairs in clusters.values():
+        members = sorted({i for pair in cluster_pairs for i in pair[:2]})
+        scores = [pair[2] for pair in cluster_pairs]
+        result.append({"members": members, "pairs": cluster_pairs, "score": sum(scores) / len(scores)})
+    result.sort(key=lambda cluster: (-cluster["score"], -len(cluster["members"]), cluster["members"][0]))
+    return result
+
+def load_members(paths, index, ids):
+    """Second pass over the inputs: {entry id: record} for the clustered entries only.
+
+    Only sources with clustered entries are reopened, and each is read up to its last
+    clustered position, so a missing file or a decode error after that point in the
+    first pass is not hit again.
+    """
+    wanted = {(index.sources[i], index.positions[i]): i for i in ids}
+    last = {}
+    for source, position in wanted:
+        last[source] = max(last.get(source, position), position)
+    records = {}
+    for source, path in enumerate(paths):
+        if source not in last:
+            continue
+        for position, record in enumerate(iter_records(path)):
+            i = wanted.get((source, position))
+            if i is not None:
+                records[i] = record
+            if position == last[source]:
+                break
+    return records
+
+def find_near_duplicates(paths, report_path=DEFAULT_REPORT, threshold=DEFAULT_THRESHOLD, num_perm=DEFAULT_NUM_PERM,
+                         bands=DEFAULT_BANDS, max_bucket=DEFAULT_MAX_BUCKET, show=SHOW_CLUSTERS):
+    if num_perm % bands:
+        raise ValueError(f"num_perm ({num_perm}) must be a multiple of bands ({bands})")
+    start = time.perf_counter()
+    index = NearDuplicateIndex(num_perm)
+    for source, path in enumerate(paths):
+        print(f"Reading {path}...")
+        try:
+            for position, record in enumerate(iter_records(path)):
+                if isinstance(record, dict):
+                    index.add(record, source, position)
+        except FileNotFoundError:
+            print(f"Error: The file {path} was not found.")
+        except (ijson.JSONError, json.JSONDecodeError):
+            print(f"Error: Could not decode JSON from the file {path}.")
+    signed = time.perf_counter()
+    print(f"{len(index)} entries signed in {signed - start:.1f}s.")
+
+    candidates, stats = candidate_pairs(index, bands, max_bucket)
+    pairs = score_pairs(index, candidates, threshold)
+    clusters = build_clusters(pairs)
+    print(f"{stats['candidates']} candidate pairs ({stats['key_candidates']} from key blocking, "
+          f"{stats['skipped_buckets']} oversized buckets skipped), {len(pairs)} near-duplicate pairs, "
+          f"{len(clusters)} clusters in {time.perf_counter() - signed:.1f}s.")
+
+    records = load_members(paths, index, {i for cluster in clusters for i in cluster["members"]})
+
+    def member(i):
+        record = records.get(i, {})
+        return {"source": paths[index.sources[i]], "position": index.positions[i],
+                "japanese": record.get('japanese') or record.get('word') or record.get('verb'),
+                "furigana": record.get('furigana', record.get('reading', "")),
+                "english": record.get('english', record.get('meaning', ""))}
+
+    report = {
+        "inputs": paths,
+        "entries": len(index),
+        "threshold": threshold,
+        "num_perm": num_perm,
+        "bands": bands,
+        "candidate_pairs": stats["candidates"],
+        "skipped_buckets": stats["skipped_buckets"],
+        "clusters": [{
+            "rank": rank,
+            "score": round(cluster["score"], 3),
+            "members": [member(i) for i in cluster["members"]],
+            "pairs": [{"a": cluster["members"].index(i), "b": cluster["members"].index(j), "score": round(score, 3),
+                       "key_similarity": round(key_sim, 3), "gloss_similarity": round(gloss_sim, 3),
+                       "reason": reason}
+                      for i, j, score, key_sim, gloss_sim, reason in cluster["pairs"]],
+        } for rank, cluster in enumerate(clusters, 1)],
+    }
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
+    print(f"Report saved to {report_path}.")
+
+    for cluster in report["clusters"][:show]:
+        reasons = sorted({pair["reason"] for pair in cluster["pairs"]})
+        print(f"\n{cluster['rank']}. score {cluster['score']:.2f} ({', '.join(reasons)})")
+        for entry in cluster["members"]:
+            print(f"   {entry['japanese']} [{entry['furigana']}] {entry['english'][:60]} - "
+                  f"{entry['source']}#{entry['position']}")
+    return report
+
+def main():
+    parser = argparse.ArgumentParser(description="Find near-duplicate vocabulary entries across JSON/NDJSON files.")
+    parser.add_argument("inputs", nargs="*", default=['jisho_vocabulary.json'], help="JSON array or NDJSON files")
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="Clusters report (JSON)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="Minimum pair score, the mean of key and gloss similarity")
+    parser.add_argument("--num-perm", type=int, default=DEFAULT_NUM_PERM, help="MinHash signature length")
+    parser.add_argument("--bands", type=int, default=DEFAULT_BANDS,
+                        help="LSH bands (more bands find less similar glosses, with more candidates)")
+    parser.add_argument("--max-bucket", type=int, default=DEFAULT_MAX_BUCKET,
+                        help="Skip blocking/LSH buckets with more entries than this")
+    parser.add_argument("--show", type=int, default=SHOW_CLUSTERS, help="Clusters to print")
+    args = parser.parse_args()
+    find_near_duplicates(args.inputs, args.report, args.threshold, args.num_perm, args.bands, args.max_bucket,
+                         args.show)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+"""Adaptive request rate control for the scrapers.
+
+AdaptiveRateController paces requests AIMD-style, like TCP congestion
+control. While responses are healthy the rate grows additively: each
+success adds increase/rate, which is about +increase requests/s for every
+second of clean responses. A 429 or 503 cuts the rate multiplicatively.
+Throttles that arrive within one interval of the last cut belong to the
+same burst and are counted only once. A Retry-After header pauses every
+request until it has passed. The rate stays between min_rate and max_rate.
+
+RetryingFetcher wraps http_fetch.Fetcher. It paces every attempt through
+the controller and retries connection errors and transient statuses (see
+http_fetch.is_transient_status) with jittered exponential backoff. When
+the retries are exhausted, the last response or error goes back to the
+scraper, which stops and resumes later from its journal as before.
+
+    python fixture_server.py --port 8765 --throttle-rate 3 --retry-after 2
+    python conjugation_scraper.py --base-url http://127.0.0.1:8765 --rate 1 --max-rate 8
+    python benchmark_rate_control.py
+"""
+import random
+import threading
+import time
+from email.utils import parsedate_to_datetime
+import requests
+from http_fetch import is_transient_status
+
+THROTTLE_STATUSES = (429, 503)
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_BACKOFF_BASE = 1.0
+DEFAULT_BACKOFF_MAX = 60.0
+
+def parse_retry_after(value, now=None):
+    """Retry-After header (seconds or an HTTP date) -> seconds to wait, or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        return float(value)
+    try:
+        when = parsedate_to_datetime(value).timestamp()
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, when - (now if now is not None else time.time()))
+
+def backoff_delay(attempt, base=DEFAULT_BACKOFF_BASE, cap=DEFAULT_BACKOFF_MAX):
+    """Full-jitter exponential backoff: uniform(0, min(cap, base * 2**attempt))."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+class AdaptiveRateController:
+    """Thread-safe AIMD pacing for one host. max_rate=None keeps the rate at or below its start value."""
+
+    def __init__(self, rate=1.0, max_rate=None, min_rate=None, increase=0.5, decrease=0.5, jitter=0.2):
+        self.rate = rate
+        self.max_rate = max_rate if max_rate is not None else rate
+        self.min_rate = min_rate if min_rate is not None else min(rate, 0.1)
+        self.increase = increase
+        self.decrease = decrease
+        self.jitter = jitter
+        self.paused_until = 0.0
+        self.stats = {"successes": 0, "throttled": 0, "decreases": 0, "errors": 0,
+                      "lowest_rate": rate, "highest_rate": rate}
+        self._next = 0.0
+        self._last_decrease = 0.0
+        self._lock = threading.Lock()
+
+    def reserve(self):
+        """Books the next request slot and returns how many seconds to wait for it."""
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next, self.paused_until)
+            # 间隔带少量随机抖动, 请求不会呈固定节奏
+            interval = 1.0 / self.rate * random.uniform(1 - self.jitter, 1 + self.jitter)
+            self._next = start + interval
+            return start - now
+
+    def wait(self):
+        delay = self.reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _set_rate(self, rate):
+        self.rate = min(self.max_rate, max(self.min_rate, rate))
+        self.stats["lowest_rate"] = min(self.stats["lowest_rate"], self.rate)
+        self.stats["highest_rate"] = max(self.stats["highest_rate"], self.rate)
+
+    def on_success(self):
+        with self._lock:
+            self.stats["successes"] += 1
+            self._set_rate(self.rate + self.increase / self.rate)
+
+    def on_throttle(self, retry_after=None):
+        """429/503: multiplicative decrease (once per interval) and a pause for Retry-After."""
+        with self._lock:
+            now = time.monotonic()
+            self.stats["throttled"] += 1
+            if now - self._last_decrease >= 1.0 / self.rate:
+                self._set_rate(self.rate * self.decrease)
+                self._last_decrease = now
+                self.stats["decreases"] += 1
+            if retry_after:
+                self.paused_until = max(self.paused_until, now + retry_after)
+            # 已预约的请求按新速率重新排队
+            self._next = max(now, self.paused_until) + 1.0 / self.rate
+
+    def on_error(self):
+        """Connection error or timeout: retried with backoff, but the rate is left alone."""
+        with self._lock:
+            self.stats["errors"] += 1
+
+    def format_stats(self):
+        s = self.stats
+        return (f"Rate: now {self.rate:.2f} req/s (range {s['lowest_rate']:.2f}-{s['highest_rate']:.2f}), "
+                f"{s['successes']} ok, {s['throttled']} throttled ({s['decreases']} slowdowns), "
+                f"{s['errors']} connection errors.")
+
+class RetryingFetcher:
+    """http_fetch.Fetcher with adaptive pacing and retries. Offline mode passes straight through."""
+
+    def __init__(self, fetcher, controller, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=DEFAULT_BACKOFF_BASE, backoff_max=DEFAULT_BACKOFF_MAX):
+        self.fetcher = fetcher
+        self.controller = controller
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.retries = 0
+        self._lock = threading.Lock()
+
+    @property
+    def offline(self):
+        return self.fetcher.offline
+
+    @property
+    def stats(self):
+        return self.fetcher.stats
+
+    def get(self, url, timeout=None):
+        if self.fetcher.offline:
+            return self.fetcher.get(url, timeout)
+        attempt = 0
+        while True:
+            self.controller.wait()
+            try:
+                response = self.fetcher.get(url, timeout)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                self.controller.on_error()
+                if attempt >= self.max_retries:
+                    raise
+                delay = backoff_delay(attempt, self.backoff_base, self.backoff_max)
+                reason = e.__class__.__name__
+            else:
+                if not is_transient_status(response.status_code):
+                    self.controller.on_success()
+                    return response
+                retry_after = parse_retry_after(response.headers.get('Retry-After'))
+                if response.status_code in THROTTLE_STATUSES:
+                    self.controller.on_throttle(retry_after)
+                if attempt >= self.max_retries:
+                    return response
+                delay = max(retry_after or 0.0, backoff_delay(attempt, self.backoff_base, self.backoff_max))
+                reason = f"HTTP {response.status_code}"
+            print(f"  - {reason} for {url}, retry {attempt + 1}/{self.max_retries} in {delay:.1f}s")
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay)
+            attempt += 1
+
+    def format_stats(self):
+        return f"{self.fetcher.format_stats()}\n{self.controller.format_stats()} Retries: {self.retries}."
+
+    def close(self):
+        self.fetcher.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def add_rate_arguments(parser, rate=1.0, max_rate=4.0):
+    """Pacing and retry options shared by the scraper CLIs."""
+    parser.add_argument("--rate", type=float, default=rate,
+                        help="Initial requests per second")
+    parser.add_argument("--max-rate", type=float, default=max_rate,
+                        help="Upper bound for the adaptive request rate (equal to --rate for a fixed rate)")
+    parser.add_argument("--min-rate", type=float, default=None,
+                        help="Lower bound the rate may drop to after throttling")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES,
+                        help="Retries per request for connection errors, 403/429 and 5xx")
+
+def rate_controller_from_args(args):
+    return AdaptiveRateController(args.rate, max(args.rate, args.max_rate), args.min_rate)
+
+def retrying_fetcher_from_args(args, fetcher):
+    return RetryingFetcher(fetcher, rate_controller_from_args(args), args.max_retries)
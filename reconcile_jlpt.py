@@ -0,0 +1,263 @@
+"""Fill JLPT levels (and missing parts of speech) into the JMdict output.
+
+jmdict_json_parser.py writes "jlpt_level": None for every record. The
+scraped jisho_vocabulary.json has levels for most of the same words. This
+stage joins the two on the normalized (japanese, furigana) key from
+check_duplicates.normalize_key. That key strips okurigana from the
+reading, so JMdict's full reading (食べる/たべる) and Jisho's kanji-only
+furigana (食べる/た) match.
+
+By default this is a hash join. The Jisho side becomes a dict from 64-bit
+key fingerprint to (level, part of speech), and the JMdict output is
+streamed once and probed record by record. When a word has several levels
+on Jisho, the easiest one wins (N5 before N4 ...).
+
+When the Jisho side has more than --index-limit keys, or with --spill, the
+join becomes an external sort-merge. Both sides are written to sorted run
+files in a temporary directory. The runs are merge-joined on the
+fingerprint, the matches are sorted back by record position, and they
+are applied during a second pass over the JMdict output. Memory is then
+bounded by --run-size.
+
+    python jmdict_json_parser.py --stream
+    python reconcile_jlpt.py --input vocabulary_final.json --jisho jisho_vocabulary.json
+"""
+import argparse
+import heapq
+import json
+import os
+import tempfile
+import time
+import ijson
+from check_duplicates import detect_format, iter_records, record_key
+from jmdict_json_parser import key_fingerprint
+from stream_writers import open_record_writer
+
+DEFAULT_INPUT = 'vocabulary_final.json'
+DEFAULT_JISHO = 'jisho_vocabulary.json'
+DEFAULT_INDEX_LIMIT = 5_000_000
+DEFAULT_RUN_SIZE = 200_000
+
+JLPT_LEVELS = ("N5", "N4", "N3", "N2", "N1")
+JLPT_RANK = {level: rank for rank, level in enumerate(JLPT_LEVELS)}
+
+def is_missing(value):
+    return value in (None, "", "Unknown")
+
+def iter_jisho_keys(path):
+    """(fingerprint, level rank, level, part_of_speech) for every Jisho record with a known level."""
+    for record in iter_records(path):
+        level = str(record.get('jlpt_level') or "").upper()
+        key = record_key(record)
+        if key is None or level not in JLPT_RANK:
+            continue
+        yield key_fingerprint(key), JLPT_RANK[level], level, record.get('part_of_speech') or ""
+
+def build_jlpt_index(path, limit=DEFAULT_INDEX_LIMIT):
+    """{fingerprint: (level, part_of_speech)} keeping the easiest level, or None when there are more than limit keys."""
+    index = {}
+    interned = {}
+    for fingerprint, rank, level, pos in iter_jisho_keys(path):
+        current = index.get(fingerprint)
+        # 与排序合并路径一致: 等级相同时取词性排序最小的一条
+        if current is None or (rank, pos) < (JLPT_RANK[current[0]], current[1]):
+            # 词性字符串种类很少, 共享同一个元组
+            value = (level, pos)
+            index[fingerprint] = interned.setdefault(value, value)
+            if len(index) > limit:
+                return None
+    return index
+
+class ReconcileStats:
+    def __init__(self):
+        self.records = 0
+        self.matched = 0
+        self.filled_level = 0
+        self.filled_pos = 0
+        self.conflicts = 0
+        self.levels = {level: 0 for level in JLPT_LEVELS}
+        self.matched_keys = 0
+        self.jisho_keys = 0
+
+    def apply(self, record, level, pos):
+        """Fills the missing fields of one matched record."""
+        self.matched += 1
+        if is_missing(record.get('jlpt_level')):
+            record['jlpt_level'] = level
+            self.filled_level += 1
+            self.levels[level] += 1
+        elif record['jlpt_level'] != level:
+            self.conflicts += 1
+        if pos and is_missing(record.get('part_of_speech')):
+            record['part_of_speech'] = pos
+            self.filled_pos += 1
+
+    def format(self):
+        def share(part, whole):
+            return f"{part / whole:.1%}" if whole else "n/a"
+        lines = [
+            f"Records: {self.records}, matched: {self.matched} ({share(self.matched, self.records)})",
+            f"jlpt_level filled: {self.filled_level} ("
+            + ", ".join(f"{level}: {count}" for level, count in self.levels.items())
+            + f"), kept because they differ: {self.conflicts}",
+            f"part_of_speech filled: {self.filled_pos}",
+            f"Jisho keys found in the input: {self.matched_keys}/{self.jisho_keys} "
+            f"({share(self.matched_keys, self.jisho_keys)})",
+        ]
+        return "\n".join(lines)
+
+def hash_join(input_path, index, writer, stats):
+    """One pass over the input, probing the in-memory index."""
+    stats.jisho_keys = len(index)
+    matched_keys = set()
+    for record in iter_records(input_path):
+        stats.records += 1
+        key = record_key(record)
+        if key is not None:
+            fingerprint = key_fingerprint(key)
+            hit = index.get(fingerprint)
+            if hit is not None:
+                stats.apply(record, *hit)
+                matched_keys.add(fingerprint)
+        writer.write(record)
+    stats.matched_keys = len(matched_keys)
+
+def spill_sorted_runs(items, tmp_dir, prefix, run_size=DEFAULT_RUN_SIZE):
+    """Sorts items (lists of JSON values) in runs of run_size and writes each run as NDJSON. Returns the paths."""
+    paths = []
+    run = []
+
+    def flush():
+        run.sort()
+        path = os.path.join(tmp_dir, f"{prefix}-{len(paths):05d}.ndjson")
+        with open(path, 'w', encoding='utf-8') as f:
+            for item in run:
+                f.write(json.dumps(item, ensure_ascii=False))
+                f.write("\n")
+        paths.append(path)
+        run.clear()
+
+    for item in items:
+        run.append(item)
+        if len(run) >= run_size:
+            flush()
+    if run or not paths:
+        flush()
+    return paths
+
+def merge_runs(paths):
+    """Sorted stream over all run files (k-way merge)."""
+    files = [open(path, 'r', encoding='utf-8') for path in paths]
+    try:
+        yield from heapq.merge(*[map(json.loads, f) for f in files])
+    finally:
+        for f in files:
+            f.close()
+
+def _probe_keys(input_path, stats):
+    for position, record in enumerate(iter_records(input_path)):
+        stats.records += 1
+        key = record_key(record)
+        if key is not None:
+            yield [key_fingerprint(key), position]
+
+def sort_merge_join(input_path, jisho_path, writer, stats, tmp_dir, run_size=DEFAULT_RUN_SIZE):
+    """External sort-merge join: bounded memory, two passes over the input."""
+    build_runs = spill_sorted_runs(([fp, rank, level, pos] for fp, rank, level, pos in iter_jisho_keys(jisho_path)),
+                                   tmp_dir, "jisho", run_size)
+    probe_runs = spill_sorted_runs(_probe_keys(input_path, stats), tmp_dir, "input", run_size)
+    print(f"Spilled {len(build_runs)} Jisho runs and {len(probe_runs)} input runs to {tmp_dir}.")
+
+    def unique_build_keys():
+        # 同一指纹的第一条 Jisho 记录等级最低 (rank 排在指纹之后)
+        last = None
+        for item in merge_runs(build_runs):
+            if item[0] != last:
+                stats.jisho_keys += 1
+                last = item[0]
+                yield item
+
+    def matches():
+        build = unique_build_keys()
+        current = next(build, None)
+        last_matched = None
+        for fingerprint, position in merge_runs(probe_runs):
+            while current is not None and current[0] < fingerprint:
+                current = next(build, None)
+            if current is not None and current[0] == fingerprint:
+                if fingerprint != last_matched:
+                    stats.matched_keys += 1
+                    last_matched = fingerprint
+                yield [position, current[2], current[3]]
+        for _ in build:
+            pass
+
+    # 匹配结果按记录位置重新排序, 第二遍顺序读取输入时合并
+    match_runs = spill_sorted_runs(matches(), tmp_dir, "matches", run_size)
+    pending = merge_runs(match_runs)
+    match = next(pending, None)
+    for position, record in enumerate(iter_records(input_path)):
+        if match is not None and match[0] == position:
+            stats.apply(record, match[1], match[2])
+            match = next(pending, None)
+        writer.write(record)
+
+def reconcile_jlpt(input_path=DEFAULT_INPUT, jisho_path=DEFAULT_JISHO, output_path=None, output_format=None,
+                   index_limit=DEFAULT_INDEX_LIMIT, spill=False, run_size=DEFAULT_RUN_SIZE):
+    """Writes the input with jlpt_level/part_of_speech filled in.
+
+    output_path defaults to the input (replaced atomically), output_format to the input's format.
+    """
+    output_path = output_path or input_path
+    stats = ReconcileStats()
+    start = time.time()
+    tmp_path = output_path + ".tmp"
+    try:
+        output_format = output_format or detect_format(input_path)
+        index = None if spill else build_jlpt_index(jisho_path, index_limit)
+        with open(tmp_path, 'w', encoding='utf-8') as f_out:
+            writer = open_record_writer(f_out, output_format)
+            if index is not None:
+                print(f"Hash join: {len(index)} Jisho keys in memory.")
+                hash_join(input_path, index, writer, stats)
+            else:
+                if not spill:
+                    print(f"More than {index_limit} Jisho keys, switching to sort-merge join.")
+                with tempfile.TemporaryDirectory(prefix="reconcile-", dir=os.path.dirname(os.path.abspath(output_path))) as tmp_dir:
+                    sort_merge_join(input_path, jisho_path, writer, stats, tmp_dir, run_size)
+            writer.close()
+    except (FileNotFoundError, ijson.JSONError, json.JSONDecodeError) as e:
+        if isinstance(e, FileNotFoundError) and e.filename in (input_path, jisho_path):
+            print(f"Error: File not found at {e.filename}")
+        elif isinstance(e, FileNotFoundError):
+            print(f"Error: Cannot write {e.filename} (does the output directory exist?)")
+        else:
+            print(f"Error: Failed to decode JSON: {e}")
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return None
+    os.replace(tmp_path, output_path)
+
+    print(f"\nFinished in {time.time() - start:.2f} seconds.")
+    print("\n--- JLPT Reconciliation Report ---")
+    print(stats.format())
+    print(f"Saved to {output_path}")
+    print("----------------------------------")
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Fill JLPT levels from the Jisho scrape into the JMdict output.")
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="jmdict_json_parser.py output (JSON or NDJSON)")
+    parser.add_argument("--jisho", default=DEFAULT_JISHO, help="Scraped Jisho vocabulary with JLPT levels")
+    parser.add_argument("--output", default=None, help="Output file (default: replace the input)")
+    parser.add_argument("--format", choices=("json", "ndjson"), default=None,
+                        help="Output format (default: the input's format)")
+    parser.add_argument("--index-limit", type=int, default=DEFAULT_INDEX_LIMIT,
+                        help="Largest Jisho key count joined in memory before spilling to disk")
+    parser.add_argument("--spill", action="store_true", help="Always use the on-disk sort-merge join")
+    parser.add_argument("--run-size", type=int, default=DEFAULT_RUN_SIZE, help="Items per sorted run when spilling")
+    args = parser.parse_args()
+    reconcile_jlpt(args.input, args.jisho, args.output, args.format, args.index_limit, args.spill, args.run_size)
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,132 @@
+"""Append-only journal that makes the scrapers resumable.
+
+While a scraper runs, every parsed record is appended to
+<output>.journal.ndjson, and after each page (or verb) the progress cursor
+is committed to <output>.cursor.json together with the journal size at
+that moment. The journal is fsynced before the cursor is replaced, so the
+cursor never points past data that is not on disk. On restart the journal
+is cut back to the committed size (dropping records of a half-finished
+page) and the scraper continues from the cursor.
+
+The final JSON file is produced by streaming the journal through
+stream_writers.JsonArrayWriter; the records are never all held in memory.
+"""
+import hashlib
+import json
+import os
+from stream_writers import JsonArrayWriter
+
+def journal_path_for(output_path):
+    return output_path + ".journal.ndjson"
+
+def cursor_path_for(output_path):
+    return output_path + ".cursor.json"
+
+def list_fingerprint(values):
+    """Short hash of an input list (e.g. the verbs to scrape), stored with the cursor."""
+    return hashlib.sha1("\n".join(values).encode("utf-8")).hexdigest()[:16]
+
+class ScrapeJournal:
+    """Journal + cursor for one output file.
+
+    meta describes the run (base URL, input list...). A cursor written with
+    different meta is refused instead of being resumed into the wrong output.
+    """
+
+    def __init__(self, output_path, meta=None, restart=False):
+        self.output_path = output_path
+        self.journal_path = journal_path_for(output_path)
+        self.cursor_path = cursor_path_for(output_path)
+        self.meta = meta or {}
+
+        state = None if restart else self._load_state()
+        if state is not None and state.get("meta") != self.meta:
+            raise SystemExit(f"Error: {self.cursor_path} belongs to a run with different settings "
+                             f"({state.get('meta')}). Use --restart to discard it.")
+        if state is not None and state["journal_bytes"] > self._journal_size():
+            raise SystemExit(f"Error: {self.journal_path} is shorter than its cursor says. Use --restart to discard it.")
+
+        self.resumed = state is not None
+        self.cursor = state["cursor"] if state else {}
+        self.records = state["records"] if state else 0
+        self._pending = 0
+        if state is None:
+            self._file = open(self.journal_path, 'wb')
+            self._write_state()
+        else:
+            self._file = open(self.journal_path, 'r+b')
+            self._file.truncate(state["journal_bytes"])
+            self._file.seek(state["journal_bytes"])
+
+    def _load_state(self):
+        if not os.path.exists(self.cursor_path):
+            return None
+        with open(self.cursor_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+
+    def _journal_size(self):
+        return os.path.getsize(self.journal_path) if os.path.exists(self.journal_path) else 0
+
+    def _write_state(self):
+        state = {
+            "meta": self.meta,
+            "cursor": self.cursor,
+            "records": self.records,
+            "journal_bytes": self._file.tell(),
+        }
+        tmp_path = self.cursor_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(state, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.cursor_path)
+
+    def append(self, record):
+        self._file.write(json.dumps(record, ensure_ascii=False).encode('utf-8') + b"\n")
+        self._pending += 1
+
+    def commit(self, cursor_updates):
+        """Makes the appended records durable and moves the cursor (top-level keys are replaced)."""
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self.records += self._pending
+        self._pending = 0
+        self.cursor.update(cursor_updates)
+        self._write_state()
+
+    def iter_records(self):
+        """Committed records in journal order."""
+        self._file.flush()
+        with open(self.journal_path, 'rb') as f:
+            remaining = self.records
+            for line in f:
+                if remaining == 0:
+                    break
+                remaining -= 1
+                yield json.loads(line)
+
+    def compact(self, groups=None, group_key=None):
+        """Streams the journal into output_path as an indented JSON array and returns the record count.
+
+        With groups/group_key the output is ordered by group (one pass over
+        the journal per group), for journals written by concurrent crawls.
+        Records whose group is not listed are left out.
+        """
+        tmp_path = self.output_path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            writer = JsonArrayWriter(f)
+            for group in (groups if groups is not None else [None]):
+                for record in self.iter_records():
+                    if group is None or record.get(group_key) == group:
+                        writer.write(record)
+            writer.close()
+        os.replace(tmp_path, self.output_path)
+        return writer.count
+
+    def close(self):
+        self._file.close()
+
+    def remove(self):
+        """Deletes journal and cursor once the crawl is complete and compacted."""
+        self.close()
+        for path in (self.journal_path, self.cursor_path):
+            if os.path.exists(path):
+                os.remove(path)
@@ -0,0 +1,228 @@
+"""Two-stage fetch/parse pipeline for the scrapers.
+
+Fetch threads download pages with the shared http_fetch.Fetcher and put the
+raw bytes into a bounded queue. The consumer takes pages off the queue and
+parses them, either inline or in a process pool, and yields the results in
+job order, so the scrapers see the same sequence as their old
+fetch-then-parse loop.
+
+Backpressure comes from two bounds. The queue holds at most queue_size
+pages. At most max_ahead jobs may be taken before the consumer has used
+their result, which also keeps a crawl with an open-ended page count from
+running far past its last page. When parsing is the bottleneck the queue
+stays full and fetchers wait; when the network is, the queue stays empty.
+format_metrics() reports both stages and the queue depth. Request pacing is
+left to the fetcher (rate_control.RetryingFetcher).
+"""
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+import requests
+
+DEFAULT_QUEUE_SIZE = 16
+
+FetchJob = namedtuple("FetchJob", ["url", "parse_args", "key"])
+
+_FETCHER_DONE = object()
+
+def _timed_parse(parse_func, content, parse_args):
+    start = time.perf_counter()
+    result = parse_func(content, *parse_args)
+    return result, time.perf_counter() - start
+
+class PipelineMetrics:
+    def __init__(self, queue_size):
+        self.queue_size = queue_size
+        self.fetched = 0
+        self.fetch_errors = 0
+        self.fetch_bytes = 0
+        self.fetch_seconds = 0.0
+        self.parsed = 0
+        self.parse_seconds = 0.0
+        self.depth_samples = 0
+        self.depth_total = 0
+        self.depth_max = 0
+        self.depth_full = 0
+        self.depth_empty = 0
+        self.started = None
+        self.wall_seconds = 0.0
+        self._lock = threading.Lock()
+
+    def record_fetch(self, seconds, size, failed):
+        with self._lock:
+            self.fetched += 1
+            self.fetch_errors += failed
+            self.fetch_bytes += size
+            self.fetch_seconds += seconds
+
+    def record_depth(self, depth):
+        self.depth_samples += 1
+        self.depth_total += depth
+        self.depth_max = max(self.depth_max, depth)
+        self.depth_full += depth >= self.queue_size
+        self.depth_empty += depth == 0
+
+    def format(self):
+        wall = max(self.wall_seconds, 1e-9)
+        samples = max(self.depth_samples, 1)
+        return "\n".join([
+            f"Fetch stage: {self.fetched} pages ({self.fetch_errors} failed), "
+            f"{self.fetch_bytes / 1024 / 1024:.1f} MiB, {self.fetched / wall:.2f} pages/s, "
+            f"{self.fetch_seconds / max(self.fetched, 1) * 1000:.0f} ms/page",
+            f"Parse stage: {self.parsed} pages, {self.parsed / wall:.2f} pages/s, "
+            f"{self.parse_seconds / max(self.parsed, 1) * 1000:.1f} ms/page CPU",
+            f"Queue: mean depth {self.depth_total / samples:.1f}/{self.queue_size}, max {self.depth_max}, "
+            f"full {self.depth_full * 100 / samples:.0f}% (parse-bound), "
+            f"empty {self.depth_empty * 100 / samples:.0f}% (fetch-bound) over {wall:.1f}s",
+        ])
+
+class FetchParsePipeline:
+    """Runs parse_func(content, *job.parse_args) on pages fetched by fetch_workers threads.
+
+    parse_workers > 1 parses in a process pool (parse_func must then be a
+    module-level function); otherwise pages are parsed in the calling thread.
+    Only 200 responses are parsed. The pipeline can run several job lists
+    one after the other and keeps its process pool between runs.
+    """
+
+    def __init__(self, fetcher, parse_func, fetch_workers=1, parse_workers=1,
+                 queue_size=DEFAULT_QUEUE_SIZE, max_ahead=None):
+        self.fetcher = fetcher
+        self.parse_func = parse_func
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_workers = parse_workers
+        self.queue_size = max(1, queue_size)
+        self.max_ahead = max_ahead or self.queue_size + self.fetch_workers
+        self.metrics = PipelineMetrics(self.queue_size)
+        self._executor = ProcessPoolExecutor(max_workers=parse_workers) if parse_workers > 1 else None
+
+    def _fetch_loop(self, jobs, jobs_lock, pages, window, stop):
+        try:
+            while not stop.is_set():
+                # 先占用窗口名额, 再领取任务
+                while not window.acquire(timeout=0.1):
+                    if stop.is_set():
+                        return
+                with jobs_lock:
+                    try:
+                        seq, job = next(jobs)
+                    except StopIteration:
+                        return
+                start = time.perf_counter()
+                response, error = None, None
+                try:
+                    response = self.fetcher.get(job.url)
+                except Exception as e:
+                    # 其他异常也交给消费者, 由它在主线程中重新抛出
+                    error = e
+                failed = error is not None or response.status_code != 200
+                self.metrics.record_fetch(time.perf_counter() - start,
+                                          len(response.content) if response is not None else 0, failed)
+                self._put(pages, (seq, job, response, error), stop)
+        finally:
+            self._put(pages, _FETCHER_DONE, stop)
+
+    @staticmethod
+    def _put(pages, item, stop):
+        while not stop.is_set():
+            try:
+                pages.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    def run(self, jobs):
+        """Yields (job, response, error, result) in job order.
+
+        response is None when the request failed with error; result is None
+        unless the page was fetched with status 200. Closing the generator
+        (or breaking out of a with-closing block) stops the fetchers.
+        """
+        pages = queue.Queue(maxsize=self.queue_size)
+        window = threading.Semaphore(self.max_ahead)
+        stop = threading.Event()
+        jobs_lock = threading.Lock()
+        numbered = enumerate(jobs)
+        threads = [threading.Thread(target=self._fetch_loop, args=(numbered, jobs_lock, pages, window, stop),
+                                    daemon=True)
+                   for _ in range(self.fetch_workers)]
+        if self.metrics.started is None:
+            self.metrics.started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+
+        ready = {}
+        in_flight = set()
+        next_seq = 0
+        finished = 0
+        try:
+            while True:
+                while next_seq in ready:
+                    job, response, error, parsed = ready.pop(next_seq)
+                    result = None
+                    if parsed is not None:
+                        if self._executor:
+                            in_flight.discard(parsed)
+                            parsed = parsed.result()
+                        result, seconds = parsed
+                        self.metrics.parsed += 1
+                        self.metrics.parse_seconds += seconds
+                    next_seq += 1
+                    window.release()
+                    yield job, response, error, result
+                if finished == len(threads):
+                    break
+
+                self.metrics.record_depth(pages.qsize())
+                item = pages.get()
+                if item is _FETCHER_DONE:
+                    finished += 1
+                    continue
+                seq, job, response, error = item
+                if error is not None and not isinstance(error, requests.exceptions.RequestException):
+                    raise error
+                parsed = None
+                if response is not None and response.status_code == 200:
+                    if self._executor:
+                        # 解析进程全忙时先等一个完成, 队列随之被填满, 从而限制抓取速度
+                        running = [f for f in in_flight if not f.done()]
+                        if len(running) >= self.parse_workers * 2:
+                            wait(running, return_when=FIRST_COMPLETED)
+                        parsed = self._executor.submit(_timed_parse, self.parse_func, response.content, job.parse_args)
+                        in_flight.add(parsed)
+                    else:
+                        parsed = _timed_parse(self.parse_func, response.content, job.parse_args)
+                ready[seq] = (job, response, error, parsed)
+        finally:
+            stop.set()
+            for thread in threads:
+                thread.join()
+            self.metrics.wall_seconds = time.perf_counter() - self.metrics.started
+
+    def format_metrics(self):
+        return self.metrics.format()
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def add_pipeline_arguments(parser):
+    """Pipeline options shared by the scraper CLIs."""
+    parser.add_argument("--fetch-workers", type=int, default=1,
+                        help="Threads downloading pages")
+    parser.add_argument("--parse-workers", type=int, default=1,
+                        help="Processes parsing pages (1 = parse in the main process)")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Maximum number of downloaded pages waiting to be parsed")
+
+def pipeline_from_args(args, fetcher, parse_func, max_ahead=None):
+    return FetchParsePipeline(fetcher, parse_func, args.fetch_workers, args.parse_workers,
+                              args.queue_size, max_ahead)
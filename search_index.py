@@ -0,0 +1,330 @@
+"""Build-time search index for vocabulary_final.json.
+
+The index file contains:
+
+* the vocabulary records in compact_dictionary format, renumbered so that
+  record id order is rank order (most common first);
+* a sorted table of full japanese/furigana strings (prefix search);
+* a sorted table of japanese/furigana substrings, each cut to MAX_GRAM
+  characters (substring search, longer terms are verified on the record);
+* a sorted table of lowercase English gloss tokens (inverted index).
+
+Every key points to a posting list of record ids in ascending order, so the
+best-ranked matches of a query come out of a lazy merge of the posting lists
+and the merge stops as soon as enough results are found.
+
+Run after jmdict_json_parser.py:
+
+    python search_index.py build --input vocabulary_final.json
+    python search_index.py query 食べ
+"""
+import argparse
+import heapq
+import json
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from compact_dictionary import CompactDictionary, encode_records
+
+MAGIC = b"KPIX"
+FORMAT_VERSION = 1
+MAX_GRAM = 6
+INDEX_FIELDS = ("japanese", "furigana", "english", "jlpt_level", "part_of_speech")
+JLPT_ORDER = {"N5": 0, "N4": 1, "N3": 2, "N2": 3, "N1": 4}
+DEFAULT_COMMONNESS = 1000
+_MAX_CHAR = "\U0010ffff"
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+def tokenize(text):
+    return _TOKEN_RE.findall(text.lower())
+
+def load_commonness(jmdict_path):
+    """Maps (japanese, furigana) -> commonness score using the same rules as jmdict_processor."""
+    import ijson
+    from jmdict_json_parser import get_entry_key
+    from jmdict_processor import get_commonness_score
+
+    commonness = {}
+    with open(jmdict_path, 'rb') as f:
+        for entry in ijson.items(f, 'words.item'):
+            key = get_entry_key(entry)
+            if key is not None and key not in commonness:
+                commonness[key] = get_commonness_score(entry.get("misc", []))
+    return commonness
+
+def record_rank(record, commonness):
+    score = record.get("commonness_score")
+    if score is None:
+        # 旧版 vocabulary_final.json 没有 commonness_score, 从 --jmdict 读取
+        score = commonness.get((record.get("japanese", ""), record.get("furigana") or ""), DEFAULT_COMMONNESS)
+    return (score, JLPT_ORDER.get(record.get("jlpt_level"), len(JLPT_ORDER)))
+
+def _add_posting(table, key, record_id):
+    postings = table.get(key)
+    if postings is None:
+        table[key] = [record_id]
+    elif postings[-1] != record_id:
+        postings.append(record_id)
+
+def _le_bytes(arr):
+    if sys.byteorder != "little":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+def _pad(data, alignment=8):
+    return data + b"\0" * (-len(data) % alignment)
+
+def _encode_table(table):
+    keys = sorted(table)
+    offsets = array("I", [0])
+    postings = array("I")
+    for key in keys:
+        postings.extend(table[key])
+        offsets.append(len(postings))
+    return "\0".join(keys).encode("utf-8"), _le_bytes(offsets), _le_bytes(postings), len(keys)
+
+def build_search_index(records, commonness=None):
+    """Builds the index file contents for a list of vocabulary records."""
+    commonness = commonness or {}
+    # 稳定排序: 同分时保持原文件顺序, 排名即 record id
+    ranked = sorted(records, key=lambda record: record_rank(record, commonness))
+    ranked = [{field: record.get(field) for field in INDEX_FIELDS} for record in ranked]
+
+    full_table, gram_table, token_table = {}, {}, {}
+    for record_id, record in enumerate(ranked):
+        for text in (record["japanese"], record["furigana"]):
+            if not text:
+                continue
+            _add_posting(full_table, text, record_id)
+            for i in range(len(text)):
+                _add_posting(gram_table, text[i:i + MAX_GRAM], record_id)
+        for token in tokenize(record["english"] or ""):
+            _add_posting(token_table, token, record_id)
+
+    sections = {"records": encode_records(ranked) if ranked else b""}
+    tables = {}
+    for name, table in (("full", full_table), ("gram", gram_table), ("token", token_table)):
+        keys, offsets, postings, count = _encode_table(table)
+        sections[f"{name}_keys"] = keys
+        sections[f"{name}_offsets"] = offsets
+        sections[f"{name}_postings"] = postings
+        tables[name] = count
+
+    body = bytearray()
+    layout = {}
+    for name, data in sections.items():
+        layout[name] = [len(body), len(data)]
+        body += _pad(data)
+
+    header = json.dumps({
+        "version": FORMAT_VERSION,
+        "count": len(ranked),
+        "max_gram": MAX_GRAM,
+        "tables": tables,
+        "sections": layout,
+    }).encode("utf-8")
+    return _pad(MAGIC + struct.pack("<I", len(header)) + header) + bytes(body)
+
+class _KeyTable:
+    def __init__(self, keys, offsets, postings):
+        self.keys = keys
+        self.offsets = offsets
+        self.postings = postings
+
+    def key_range(self, prefix):
+        lo = bisect_left(self.keys, prefix)
+        hi = bisect_left(self.keys, prefix + _MAX_CHAR, lo)
+        return lo, hi
+
+    def posting_list(self, i):
+        return self.postings[self.offsets[i]:self.offsets[i + 1]]
+
+    def exact(self, key):
+        lo, hi = self.key_range(key)
+        if lo < hi and self.keys[lo] == key:
+            return self.posting_list(lo)
+        return array("I")
+
+    def prefix_lists(self, prefix):
+        lo, hi = self.key_range(prefix)
+        return [self.posting_list(i) for i in range(lo, hi)]
+
+class VocabularySearchIndex:
+    """Query API over a file written by build_search_index().
+
+    All methods return record dicts ordered by rank. search() mirrors the
+    WordContext query: every whitespace-separated term is matched against
+    japanese/furigana (substring) and English (token prefix), and any term
+    matching is enough.
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a search index file")
+        (header_len,) = struct.unpack_from("<I", data, 4)
+        header = json.loads(data[8:8 + header_len].decode("utf-8"))
+        if header["version"] != FORMAT_VERSION:
+            raise ValueError(f"Unsupported search index version: {header['version']}")
+        body_start = 8 + header_len + (-(8 + header_len) % 8)
+        self.count = header["count"]
+        self.max_gram = header["max_gram"]
+        sections = {name: (body_start + offset, length) for name, (offset, length) in header["sections"].items()}
+
+        def section_bytes(name):
+            start, length = sections[name]
+            return data[start:start + length]
+
+        def section_array(name):
+            arr = array("I")
+            arr.frombytes(section_bytes(name))
+            if sys.byteorder != "little":
+                arr.byteswap()
+            return arr
+
+        self._tables = {}
+        for name in ("full", "gram", "token"):
+            raw_keys = section_bytes(f"{name}_keys").decode("utf-8")
+            keys = raw_keys.split("\0") if header["tables"][name] else []
+            self._tables[name] = _KeyTable(keys, section_array(f"{name}_offsets"), section_array(f"{name}_postings"))
+        self.records = CompactDictionary(path, sections["records"][0]) if self.count else []
+
+    def close(self):
+        if self.count:
+            self.records.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _collect(self, posting_lists, limit, offset=0, accept=None, seen=None):
+        """Merges ascending posting lists and returns the first offset + limit accepted ids."""
+        seen = set() if seen is None else seen
+        ids = []
+        for record_id in heapq.merge(*posting_lists):
+            if record_id in seen:
+                continue
+            seen.add(record_id)
+            if accept is not None and not accept(record_id):
+                continue
+            ids.append(record_id)
+            if len(ids) >= offset + limit:
+                break
+        return ids[offset:]
+
+    def _substring_lists(self, term):
+        return self._tables["gram"].prefix_lists(term[:self.max_gram])
+
+    def _contains_accept(self, term):
+        """Substring check needed when term is longer than the indexed grams."""
+        if len(term) <= self.max_gram:
+            return None
+        def accept(record_id):
+            return (term in self.records.get_field(record_id, "japanese")
+                    or term in (self.records.get_field(record_id, "furigana") or ""))
+        return accept
+
+    def _english_lists(self, term):
+        tokens = tokenize(term)
+        if not tokens:
+            return [], None
+        table = self._tables["token"]
+        lists = table.prefix_lists(tokens[-1])
+        required = [set(table.exact(token)) for token in tokens[:-1]]
+        if not required:
+            return lists, None
+        return lists, (lambda record_id: all(record_id in ids for ids in required))
+
+    def _with_pos(self, accept, part_of_speech):
+        if not part_of_speech:
+            return accept
+        wanted = part_of_speech.lower()
+        def accept_pos(record_id):
+            pos = (self.records.get_field(record_id, "part_of_speech") or "").lower()
+            return wanted in pos and (accept is None or accept(record_id))
+        return accept_pos
+
+    def _records(self, ids):
+        return [self.records[record_id] for record_id in ids]
+
+    def prefix(self, term, limit=20, offset=0, part_of_speech=None):
+        """Records whose japanese or furigana starts with term."""
+        lists = self._tables["full"].prefix_lists(term)
+        return self._records(self._collect(lists, limit, offset, self._with_pos(None, part_of_speech)))
+
+    def substring(self, term, limit=20, offset=0, part_of_speech=None):
+        """Records whose japanese or furigana contains term."""
+        accept = self._with_pos(self._contains_accept(term), part_of_speech)
+        return self._records(self._collect(self._substring_lists(term), limit, offset, accept))
+
+    def english(self, term, limit=20, offset=0, part_of_speech=None):
+        """Records whose English gloss contains every token of term (the last one as a prefix)."""
+        lists, accept = self._english_lists(term)
+        return self._records(self._collect(lists, limit, offset, self._with_pos(accept, part_of_speech)))
+
+    def search(self, term, limit=20, offset=0, part_of_speech=None):
+        """WordContext-style search. Exact japanese/furigana matches come first, then rank order."""
+        terms = term.split()
+        if not terms:
+            return self._records(range(offset, min(self.count, offset + limit)))
+
+        # 每个检索词各自的匹配条件, 任意一个满足即可 (与前端的 OR 条件一致)
+        sources = []
+        for t in terms:
+            sources.append((self._substring_lists(t), self._contains_accept(t)))
+            sources.append(self._english_lists(t))
+
+        pos_accept = self._with_pos(None, part_of_speech)
+        exact = sorted({record_id for t in terms for record_id in self._tables["full"].exact(t)})
+        if pos_accept is not None:
+            exact = [record_id for record_id in exact if pos_accept(record_id)]
+        seen = set(exact)
+
+        # 分别取每个来源的前 offset + limit 个结果, 合并后按排名截断
+        wanted = offset + limit
+        merged = set()
+        for lists, accept in sources:
+            merged.update(self._collect(lists, wanted, 0, self._with_pos(accept, part_of_speech), set(seen)))
+        ids = exact + sorted(merged)
+        return self._records(ids[offset:offset + limit])
+
+def main():
+    parser = argparse.ArgumentParser(description="Build and query the vocabulary search index.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build_parser = subparsers.add_parser("build", help="Build the index from vocabulary_final.json")
+    build_parser.add_argument("--input", default='vocabulary_final.json')
+    build_parser.add_argument("--output", default='vocabulary_index.kpix')
+    build_parser.add_argument("--jmdict", default=None,
+                              help="JMdict JSON file with the commonness of records that have no commonness_score")
+    query_parser = subparsers.add_parser("query", help="Run a WordContext-style search")
+    query_parser.add_argument("term")
+    query_parser.add_argument("--index", default='vocabulary_index.kpix')
+    query_parser.add_argument("--limit", type=int, default=20)
+    query_parser.add_argument("--pos", default=None, help="Part of speech filter")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        try:
+            with open(args.input, 'r', encoding='utf-8') as f:
+                records = json.load(f)
+            commonness = load_commonness(args.jmdict) if args.jmdict else {}
+        except FileNotFoundError as e:
+            print(f"Error: The file {e.filename} was not found.")
+            return
+        data = build_search_index(records, commonness)
+        with open(args.output, 'wb') as f:
+            f.write(data)
+        print(f"Indexed {len(records)} records into {args.output} ({len(data)} bytes).")
+    else:
+        with VocabularySearchIndex(args.index) as index:
+            for record in index.search(args.term, args.limit, part_of_speech=args.pos):
+                print(f"{record['japanese']} [{record['furigana']}] {record['english'][:60]}")
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,100 @@
+import json
+import os
+
+DEFAULT_SHARD_SIZE = 1000
+
+# commonness_score (见 jmdict_processor.COMMONNESS_PRIORITY) -> 频率段
+COMMONNESS_BANDS = [
+    (14, "core"),      # ichi / news / gai / spec
+    (34, "frequent"),  # nf01 - nf20
+    (1000, "common"),  # P / U
+]
+
+def commonness_band(record):
+    score = record.get("commonness_score")
+    if score is None:
+        return "unknown"
+    for upper, band in COMMONNESS_BANDS:
+        if score < upper:
+            return band
+    return "rare"
+
+def label(value):
+    """Lower-case file name part; missing values and "Unknown" become "unknown"."""
+    if not value:
+        return "unknown"
+    return str(value).lower()
+
+# 每个数据集按它实际包含的字段分片 (words.json 没有 jlpt_level, verbs.json 没有 commonness_score)
+def words_partition(record):
+    """public/words.json (jmdict_processor): word type and commonness band."""
+    return {"type": label(record.get("type")), "band": commonness_band(record)}
+
+def verbs_partition(record):
+    """public/verbs.json (conjugation_scraper): verb group."""
+    return {"group": label(record.get("group"))}
+
+def shard_output_dir(output_path):
+    """public/words.json -> public/words"""
+    root, _ = os.path.splitext(output_path)
+    return root
+
+def remove_shards(manifest_path):
+    """Deletes the shard files listed in a previous manifest, so no stale shards are left behind."""
+    if not os.path.exists(manifest_path):
+        return
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    output_dir = os.path.dirname(manifest_path)
+    for shard in manifest.get("shards", []):
+        path = os.path.join(output_dir, shard["file"])
+        if os.path.exists(path):
+            os.remove(path)
+
+def write_sharded(records, output_dir, dataset, key_field, partition, shard_size=DEFAULT_SHARD_SIZE):
+    """Splits records by partition(record), then into files of at most shard_size records.
+
+    partition returns a dict of labels such as {"type": "verb", "band": "core"}.
+    Records keep their input order inside each shard (words.json is ordered by
+    commonness). A manifest (<dataset>.manifest.json) lists every shard,
+    sorted by file name, with its labels, record count and the smallest/largest
+    key_field value in it, so clients can fetch only the shards they need.
+    Returns the manifest.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest_path = os.path.join(output_dir, f"{dataset}.manifest.json")
+    remove_shards(manifest_path)
+
+    groups = {}
+    for record in records:
+        labels = partition(record)
+        groups.setdefault(tuple(labels.items()), []).append(record)
+
+    shards = []
+    for labels, group in groups.items():
+        for n, start in enumerate(range(0, len(group), shard_size)):
+            chunk = group[start:start + shard_size]
+            keys = [record.get(key_field) or "" for record in chunk]
+            filename = "-".join([dataset, *(value for _, value in labels), f"{n:03d}.json"])
+            with open(os.path.join(output_dir, filename), 'w', encoding='utf-8') as f:
+                json.dump(chunk, f, ensure_ascii=False, indent=2)
+            shards.append({
+                "file": filename,
+                **dict(labels),
+                "count": len(chunk),
+                "min_key": min(keys),
+                "max_key": max(keys),
+            })
+    shards.sort(key=lambda shard: shard["file"])
+
+    manifest = {
+        "dataset": dataset,
+        "key_field": key_field,
+        "partition": [name for name, _ in next(iter(groups), ())],
+        "total": len(records),
+        "shard_size": shard_size,
+        "shards": shards,
+    }
+    with open(manifest_path, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
@@ -0,0 +1,55 @@
+import json
+
+class JsonArrayWriter:
+    """Writes records to a JSON array one at a time.
+
+    The output is byte-for-byte what json.dump(records, f, ensure_ascii=False,
+    indent=2) would produce, without holding the list in memory.
+    """
+
+    def __init__(self, f, indent=2):
+        self.f = f
+        self.indent = indent
+        self.count = 0
+
+    def write(self, record):
+        text = json.dumps(record, ensure_ascii=False, indent=self.indent)
+        if self.indent is not None:
+            pad = " " * self.indent
+            text = pad + text.replace("\n", "\n" + pad)
+            self.f.write("[\n" if self.count == 0 else ",\n")
+        else:
+            self.f.write("[" if self.count == 0 else ", ")
+        self.f.write(text)
+        self.count += 1
+
+    def close(self):
+        if self.count == 0:
+            self.f.write("[]")
+        elif self.indent is not None:
+            self.f.write("\n]")
+        else:
+            self.f.write("]")
+
+class NdjsonWriter:
+    """Writes one compact JSON record per line."""
+
+    def __init__(self, f):
+        self.f = f
+        self.count = 0
+
+    def write(self, record):
+        self.f.write(json.dumps(record, ensure_ascii=False))
+        self.f.write("\n")
+        self.count += 1
+
+    def close(self):
+        pass
+
+def open_record_writer(f, output_format="json"):
+    """Returns a writer for the given format: "json" (indented array) or "ndjson"."""
+    if output_format == "ndjson":
+        return NdjsonWriter(f)
+    if output_format == "json":
+        return JsonArrayWriter(f)
+    raise ValueError(f"Unknown output format: {output_format}")
@@ -0,0 +1,97 @@
+-- Trigram search for the vocabulary table
+-- The frontend searches with japanese/english/furigana ILIKE '%term%'. A btree index cannot answer a
+-- substring match, so every search was a sequential scan. pg_trgm GIN indexes can.
+
+-- Supabase installs extensions into the "extensions" schema; create it on a plain Postgres too
+CREATE SCHEMA IF NOT EXISTS extensions;
+CREATE EXTENSION IF NOT EXISTS pg_trgm WITH SCHEMA extensions;
+
+-- Commonness from JMdict (lower = more common, see jmdict_processor.get_commonness_score).
+-- jmdict_json_parser.py writes it into vocabulary_final.json and both importers upload it, so apply
+-- this migration before importing. Rows imported from older files keep NULL, which search ranks like
+-- an uncommon word (1000), falling back to the JLPT level.
+ALTER TABLE public.verbs ADD COLUMN IF NOT EXISTS commonness_score INTEGER;
+COMMENT ON COLUMN public.verbs.commonness_score IS 'JMdict commonness score of the word; lower is more common.';
+
+-- Trigram indexes for ILIKE '%term%' and similarity() on each searched column.
+-- pg_trgm only builds trigrams from characters the database locale treats as letters or digits,
+-- and a term shorter than three characters has no complete trigram, so those still scan the index.
+CREATE INDEX IF NOT EXISTS idx_verbs_japanese_trgm ON public.verbs USING gin (japanese extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_verbs_furigana_trgm ON public.verbs USING gin (furigana extensions.gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_verbs_english_trgm ON public.verbs USING gin (english extensions.gin_trgm_ops);
+
+
+-- ILIKE wildcards (%, _) and the escape character in a search term match literally
+CREATE OR REPLACE FUNCTION public.escape_like(value TEXT)
+RETURNS TEXT
+LANGUAGE sql
+IMMUTABLE
+AS $$
+    SELECT replace(replace(replace(value, '\', '\\'), '%', '\%'), '_', '\_');
+$$;
+
+
+-- Ranked search with keyset pagination
+-- Rows match like the frontend's query: the term is a substring of japanese, furigana or english
+-- (case-insensitive), optionally filtered by part of speech. They are ordered by
+--   1. score: 1 for an exact japanese/furigana match, otherwise the best trigram similarity
+--   2. commonness_score (NULL = 1000), then JLPT level (N5 first), then id
+-- Instead of OFFSET, the next page passes the last row of the previous page as the cursor:
+--   select * from search_vocabulary('たべ');
+--   select * from search_vocabulary('たべ', null, 20, '{"score": 0.25, "commonness": 1000, "jlpt_rank": 5, "id": 812}');
+-- The cursor keys are the score, commonness, jlpt_rank and id columns of that row.
+CREATE OR REPLACE FUNCTION public.search_vocabulary(
+    term TEXT,
+    pos TEXT DEFAULT NULL,
+    result_limit INTEGER DEFAULT 50,
+    cursor JSONB DEFAULT NULL
+)
+RETURNS TABLE (
+    id BIGINT,
+    japanese TEXT,
+    english TEXT,
+    furigana TEXT,
+    part_of_speech TEXT,
+    jlpt_level VARCHAR(3),
+    score REAL,
+    commonness INTEGER,
+    jlpt_rank INTEGER
+)
+LANGUAGE sql
+STABLE
+SET search_path = public, extensions
+AS $$
+    WITH matches AS (
+        SELECT v.id, v.japanese, v.english, v.furigana, v.part_of_speech, v.jlpt_level,
+               CASE WHEN v.japanese = btrim(term) OR v.furigana = btrim(term) THEN 1::real
+                    ELSE greatest(similarity(v.japanese, btrim(term)),
+                                  similarity(coalesce(v.furigana, ''), btrim(term)),
+                                  word_similarity(btrim(term), v.english))
+               END AS score,
+               coalesce(v.commonness_score, 1000) AS commonness,
+               CASE upper(v.jlpt_level) WHEN 'N5' THEN 0 WHEN 'N4' THEN 1 WHEN 'N3' THEN 2
+                                        WHEN 'N2' THEN 3 WHEN 'N1' THEN 4 ELSE 5 END AS jlpt_rank
+        FROM public.verbs v
+        WHERE btrim(term) <> ''
+          -- 模式只依赖参数, 在执行时是常量, 三个 trigram 索引可以做 BitmapOr
+          AND (v.japanese ILIKE '%' || public.escape_like(btrim(term)) || '%'
+               OR v.furigana ILIKE '%' || public.escape_like(btrim(term)) || '%'
+               OR v.english ILIKE '%' || public.escape_like(btrim(term)) || '%')
+          AND (pos IS NULL OR pos = 'All' OR v.part_of_speech ILIKE '%' || public.escape_like(pos) || '%')
+    )
+    SELECT m.id, m.japanese, m.english, m.furigana, m.part_of_speech, m.jlpt_level, m.score, m.commonness,
+           m.jlpt_rank
+    FROM matches m
+    -- score 降序, 其余升序: 对 score 取负后可以用一个行比较
+    WHERE cursor IS NULL
+       OR (-m.score, m.commonness, m.jlpt_rank, m.id)
+          > (-(cursor->>'score')::real, (cursor->>'commonness')::integer, (cursor->>'jlpt_rank')::integer,
+             (cursor->>'id')::bigint)
+    ORDER BY m.score DESC, m.commonness, m.jlpt_rank, m.id
+    LIMIT least(greatest(coalesce(result_limit, 50), 1), 200);
+$$;
+
+COMMENT ON FUNCTION public.search_vocabulary(TEXT, TEXT, INTEGER, JSONB) IS 'Substring search over japanese/furigana/english ranked by trigram similarity and commonness, paginated with a keyset cursor.';
+
+-- Callable through PostgREST as /rest/v1/rpc/search_vocabulary; RLS on verbs still applies
+GRANT EXECUTE ON FUNCTION public.search_vocabulary(TEXT, TEXT, INTEGER, JSONB) TO anon, authenticated;
@@ -0,0 +1,246 @@
+"""Local PostgREST stand-in for testing supabase_importer.py without a Supabase project.
+
+Accepts the upserts the importer sends,
+
+    POST /rest/v1/verbs?on_conflict=japanese,furigana
+    Prefer: resolution=merge-duplicates,return=minimal
+
+and keeps the rows in memory, keyed by the on_conflict columns. Each
+request is one transaction, like in PostgREST. One bad row rejects the
+whole batch with the status and error body PostgREST would send:
+
+    400 PGRST102  rows with different keys
+    400 23502     NULL japanese/english (NOT NULL columns)
+    400 22001     jlpt_level longer than VARCHAR(3)
+    400 21000     the same conflict key twice in one batch
+    413           body larger than --max-body
+    414           request path (with the query) longer than --max-url
+
+It also answers the two other requests of the importer's delta mode:
+
+    GET /rest/v1/verbs?select=id,japanese,...&order=id.asc&id=gt.1000&limit=1000
+    DELETE /rest/v1/verbs?or=(and(japanese.eq."...",furigana.eq."..."),...)
+
+--latency and --row-latency add a fixed and a per-row delay to every
+request, so batch size affects throughput. --error-rate answers that share
+of requests with a 503.
+
+    python supabase/postgrest_standin.py --port 54321 --row-latency 0.0002 --error-rate 0.02
+    python supabase/supabase_importer.py --url http://127.0.0.1:54321 --key test
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+NOT_NULL_COLUMNS = ("japanese", "english")
+VARCHAR_LIMITS = {"jlpt_level": 3}
+
+def row_error(rows, conflict_columns):
+    """(code, message) of the first constraint the batch violates, or None."""
+    keys = set(rows[0])
+    seen = set()
+    for row in rows:
+        if set(row) != keys:
+            return "PGRST102", "All object keys must match"
+        for column in NOT_NULL_COLUMNS:
+            if row.get(column) is None:
+                return "23502", f'null value in column "{column}" of relation "verbs" violates not-null constraint'
+        for column, limit in VARCHAR_LIMITS.items():
+            value = row.get(column)
+            if isinstance(value, str) and len(value) > limit:
+                return "22001", f"value too long for type character varying({limit})"
+        key = tuple(row.get(column) for column in conflict_columns)
+        if key in seen:
+            return "21000", "ON CONFLICT DO UPDATE command cannot affect row a second time"
+        seen.add(key)
+    return None
+
+_KEY_CONDITION_RE = re.compile(r'and\(japanese\.eq\."((?:[^"\\]|\\.)*)",'
+                               r'furigana\.(?:eq\."((?:[^"\\]|\\.)*)"|(is\.null))\)')
+
+def parse_key_filter(value):
+    """(japanese, furigana) keys of an or=(and(japanese.eq."..",furigana.eq.".."),...) filter."""
+    def unquote(text):
+        return re.sub(r'\\(.)', r'\1', text)
+    return [(unquote(japanese), None if is_null else unquote(furigana))
+            for japanese, furigana, is_null in _KEY_CONDITION_RE.findall(value)]
+
+class StandInHandler(BaseHTTPRequestHandler):
+    server_version = "PostgRESTStandIn/1.0"
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+    def send_json(self, status, payload=None):
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        self.send_response(status)
+        if body:
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def check_request(self, parts):
+        """Counts the request; sends and returns an error status for a wrong path, key or a random 503."""
+        self.server.count("requests")
+        if not parts.path.startswith("/rest/v1/"):
+            self.send_json(404, {"message": "Not found"})
+            return 404
+        if self.server.max_url and len(self.path) > self.server.max_url:
+            self.server.count("too_large")
+            self.send_json(414, {"message": "URI Too Long"})
+            return 414
+        if self.server.key and self.headers.get("apikey") != self.server.key:
+            self.send_json(401, {"message": "Invalid API key"})
+            return 401
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self.server.count("errors")
+            self.send_json(503, {"message": "Service Unavailable"})
+            return 503
+        return None
+
+    def do_GET(self):
+        parts = urlsplit(self.path)
+        if self.check_request(parts):
+            return
+        query = parse_qs(parts.query)
+        columns = [column for column in query.get("select", ["*"])[0].split(",") if column]
+        after = int(query.get("id", ["gt.0"])[0].split(".", 1)[1])
+        limit = int(query.get("limit", ["1000"])[0])
+        rows = self.server.select(after, limit)
+        if columns != ["*"]:
+            rows = [{column: row.get(column) for column in columns} for row in rows]
+        self.send_json(200, rows)
+
+    def do_DELETE(self):
+        parts = urlsplit(self.path)
+        if self.check_request(parts):
+            return
+        keys = parse_key_filter(parse_qs(parts.query).get("or", [""])[0])
+        if not keys:
+            return self.send_json(400, {"code": "PGRST100", "message": "Filter required for DELETE"})
+        self.server.delete(keys)
+        self.send_json(204)
+
+    def do_POST(self):
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        if self.check_request(parts):
+            return
+        if self.server.max_body and length > self.server.max_body:
+            self.server.count("too_large")
+            return self.send_json(413, {"message": "Payload Too Large"})
+
+        try:
+            rows = json.loads(body)
+        except ValueError:
+            return self.send_json(400, {"code": "PGRST102", "message": "Empty or invalid json"})
+        if isinstance(rows, dict):
+            rows = [rows]
+        time.sleep(self.server.latency + self.server.row_latency * len(rows))
+
+        conflict = parse_qs(parts.query).get("on_conflict", [""])[0]
+        conflict_columns = [column for column in conflict.split(",") if column]
+        error = row_error(rows, conflict_columns) if rows else None
+        if error:
+            self.server.count("rejected")
+            code, message = error
+            return self.send_json(400, {"code": code, "details": None, "hint": None, "message": message})
+        self.server.upsert(rows, conflict_columns)
+        self.send_json(201)
+
+class PostgrestStandIn(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, key=None, latency=0.0, row_latency=0.0, max_body=None, error_rate=0.0,
+                 verbose=False, max_url=None):
+        super().__init__(address, StandInHandler)
+        self.key = key
+        self.latency = latency
+        self.row_latency = row_latency
+        self.max_body = max_body
+        self.max_url = max_url
+        self.error_rate = error_rate
+        self.verbose = verbose
+        self.rows = {}
+        self.stats = {"requests": 0, "rejected": 0, "too_large": 0, "errors": 0, "upserted": 0, "deleted": 0}
+        self._next_id = 1
+        self._lock = threading.Lock()
+
+    def count(self, name, n=1):
+        with self._lock:
+            self.stats[name] += n
+
+    def upsert(self, rows, conflict_columns):
+        with self._lock:
+            for row in rows:
+                key = tuple(row.get(column) for column in conflict_columns) or self._next_id
+                # resolution=merge-duplicates: 冲突时更新已有行, id 不变
+                existing = self.rows.get(key)
+                if existing is None:
+                    existing = {"id": self._next_id}
+                    self._next_id += 1
+                self.rows[key] = {**existing, **row}
+            self.stats["upserted"] += len(rows)
+
+    def select(self, after_id, limit):
+        """Rows with id > after_id in id order (dict order is insertion order, so id order)."""
+        with self._lock:
+            rows = [row for row in self.rows.values() if row["id"] > after_id]
+        return rows[:limit]
+
+    def delete(self, keys):
+        with self._lock:
+            for key in keys:
+                if self.rows.pop(key, None) is not None:
+                    self.stats["deleted"] += 1
+
+    def format_stats(self):
+        s = self.stats
+        return (f"{s['requests']} requests, {s['upserted']} rows upserted, {s['deleted']} deleted, "
+                f"{len(self.rows)} rows stored, "
+                f"{s['rejected']} batches rejected, {s['too_large']} too large, {s['errors']} errors (503).")
+
+    @property
+    def base_url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+def start_standin(port=0, **options):
+    """Starts a stand-in in a background thread. Returns it; call shutdown() when done."""
+    server = PostgrestStandIn(("127.0.0.1", port), **options)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve a PostgREST-compatible upsert endpoint for import tests.")
+    parser.add_argument("--port", type=int, default=54321)
+    parser.add_argument("--key", default=None, help="Require this apikey header")
+    parser.add_argument("--latency", type=float, default=0.02, help="Seconds added to every request")
+    parser.add_argument("--row-latency", type=float, default=0.0001, help="Seconds added per row")
+    parser.add_argument("--max-body", type=int, default=None, help="Answer 413 to larger request bodies (bytes)")
+    parser.add_argument("--max-url", type=int, default=8192, help="Answer 414 to longer request paths (bytes)")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    server = PostgrestStandIn(("127.0.0.1", args.port), args.key, args.latency, args.row_latency, args.max_body,
+                              args.error_rate, args.verbose, args.max_url)
+    print(f"PostgREST stand-in on {server.base_url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print(server.format_stats())
+
+if __name__ == '__main__':
+    main()
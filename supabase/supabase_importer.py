@@ -1,66 +1,625 @@
+"""Imports vocabulary_final.json into the Supabase 'verbs' table.
 
+Batches are upserted in parallel by a thread pool. The importer sends the
+request supabase-py's table().upsert() would send directly to PostgREST:
+POST /rest/v1/verbs?on_conflict=japanese,furigana with
+Prefer: resolution=merge-duplicates. Each worker thread keeps its own
+keep-alive session.
 
-import os
+* Batch size adapts to the observed latency and payload. It doubles while
+  batches finish in under half of --target-seconds, shrinks in proportion
+  when they take longer than 1.5x the target, and is capped so a request
+  body stays under --max-payload bytes.
+* 429, 5xx, timeouts and connection errors are retried with jittered
+  exponential backoff.
+* A batch rejected for its data (400/409, or 413 for its size) is split
+  in half until the bad rows are isolated. Only those rows fail.
+* A (japanese, furigana) key repeated in the input is sent once, with its
+  last record. A first pass over the input finds the last position of each
+  key. So no two batches touch the same row, and the result does not depend
+  on which worker finishes last.
+* The report (--report, import_report.json by default) has rows/sec, the
+  batch sizes used and every failed (japanese, furigana) key with its
+  error. The exit status is 1 when any row failed.
+* commonness_score is one of the uploaded columns. The table gets it from
+  03_add_vocabulary_search.sql, so apply that migration first.
+
+--delta only sends rows that are new or changed. Every row gets a content
+hash over its columns, keyed on (japanese, furigana), the
+verbs_japanese_furigana_unique constraint. The hashes of the rows already
+in the table come from a state file (--state, written after each delta
+run). If the state file is missing, belongs to another table or
+--refresh-state is given, they are fetched from the table with keyset
+pagination instead. Only the last record of a repeated key is hashed and
+compared. Rows with the same hash are skipped. With --delete-missing,
+keys that are no longer in the input are deleted. The keys go into the
+DELETE URL, so batches are cut at --max-url-length bytes, and a batch the
+server answers with 414 is split in half.
+
+    python supabase/postgrest_standin.py --port 54321
+    python supabase/supabase_importer.py --url http://127.0.0.1:54321 --key test --workers 8
+    python supabase/supabase_importer.py --url http://127.0.0.1:54321 --key test --delta --delete-missing
+"""
+import argparse
+import hashlib
 import json
-from supabase import create_client, Client
-from dotenv import load_dotenv
+import os
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from urllib.parse import quote_plus
+import ijson
+import requests
 
-# Load environment variables from .env file
-load_dotenv()
+DEFAULT_INPUT = 'vocabulary_final.json'
+DEFAULT_TABLE = 'verbs'
+DEFAULT_ON_CONFLICT = 'japanese,furigana'
+DEFAULT_REPORT = 'import_report.json'
+COLUMNS = ("japanese", "furigana", "english", "jlpt_level", "part_of_speech", "conjugations", "commonness_score")
+DEFAULT_WORKERS = 4
+DEFAULT_BATCH_SIZE = 100
+DEFAULT_MIN_BATCH_SIZE = 10
+DEFAULT_MAX_BATCH_SIZE = 5000
+DEFAULT_TARGET_SECONDS = 1.0
+DEFAULT_MAX_PAYLOAD = 2 * 1024 * 1024
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_TIMEOUT = 60
+DEFAULT_STATE = 'import_state.json'
+DEFAULT_PAGE_SIZE = 1000
+# DELETE 的键放在 URL 里; 常见代理的请求行上限是 8 KB
+DEFAULT_MAX_URL_LENGTH = 6000
 
-def get_supabase_client():
-    """Initializes and returns the Supabase client using credentials from .env."""
-    url = os.environ.get("SUPABASE_URL")
-    key = os.environ.get("SUPABASE_SERVICE_KEY") # Use the service role key for admin-level access
+def load_env():
+    """Loads the .env file into os.environ. Called by the scripts' main(), so importing them has no side effects."""
+    from dotenv import load_dotenv
+    load_dotenv()
+
+def get_supabase_credentials(url=None, key=None):
+    """The given URL/key, falling back to SUPABASE_URL and SUPABASE_SERVICE_KEY from the environment (.env)."""
+    url = url or os.environ.get("SUPABASE_URL")
+    key = key or os.environ.get("SUPABASE_SERVICE_KEY") # Use the service role key for admin-level access
 
     if not url or not key:
-        raise ValueError("Supabase URL and Service Key must be set in the .env file.")
+        raise ValueError("Supabase URL and Service Key must be set with --url/--key or in the .env file.")
+    return url, key
+
+def iter_vocabulary(path):
+    """Records of a JSON array (read incrementally with ijson) or NDJSON file."""
+    with open(path, 'rb') as f:
+        head = f.read(64).lstrip()
+        f.seek(0)
+        if head.startswith(b"["):
+            yield from ijson.items(f, 'item', use_float=True)
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+def to_row(record):
+    """Only the table columns, all present: PostgREST needs the same keys in every object of a batch."""
+    return {column: record.get(column) for column in COLUMNS}
+
+def row_key(row):
+    return (row["japanese"], row["furigana"])
+
+def latest_positions(path):
+    """{(japanese, furigana): position of the key's last record in the file}."""
+    latest = {}
+    for position, record in enumerate(iter_vocabulary(path)):
+        latest[row_key(to_row(record))] = position
+    return latest
+
+def iter_latest(path, latest):
+    """The records of the file, skipping every record that a later one with the same key replaces."""
+    for position, record in enumerate(iter_vocabulary(path)):
+        if latest[row_key(to_row(record))] == position:
+            yield record
+
+def key_condition(key):
+    """PostgREST filter for one (japanese, furigana) key: and(japanese.eq."..",furigana.eq."..")."""
+    def quote(value):
+        return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+    japanese, furigana = key
+    return (f"and(japanese.eq.{quote(japanese)},"
+            + ("furigana.is.null" if furigana is None else f"furigana.eq.{quote(furigana)}") + ")")
+
+def row_content_hash(row):
+    """Stable hash of a row's columns, independent of key order inside conjugations."""
+    canonical = json.dumps([row.get(column) for column in COLUMNS], ensure_ascii=False, sort_keys=True,
+                           separators=(",", ":"))
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+class BatchError(Exception):
+    """A batch the server did not accept. kind is "transient", "too_large" or "rows"."""
+
+    def __init__(self, kind, message, status=None, code=None, retry_after=None):
+        super().__init__(message)
+        self.kind = kind
+        self.status = status
+        self.code = code
+        self.retry_after = retry_after
+
+class PostgrestClient:
+    """Upserts JSON batches into one table. Thread-safe: every thread gets its own requests.Session."""
+
+    def __init__(self, url, key, table=DEFAULT_TABLE, on_conflict=DEFAULT_ON_CONFLICT, timeout=DEFAULT_TIMEOUT):
+        self.endpoint = f"{url.rstrip('/')}/rest/v1/{table}"
+        self.params = {"on_conflict": on_conflict}
+        self.headers = {
+            "apikey": key,
+            "Authorization": f"Bearer {key}",
+            "Content-Type": "application/json",
+            "Prefer": "resolution=merge-duplicates,return=minimal",
+        }
+        self.timeout = timeout
+        self._local = threading.local()
+        self._sessions = []
+        self._lock = threading.Lock()
+
+    def _session(self):
+        session = getattr(self._local, "session", None)
+        if session is None:
+            session = self._local.session = requests.Session()
+            session.headers.update(self.headers)
+            with self._lock:
+                self._sessions.append(session)
+        return session
+
+    def _request(self, method, params, **kwargs):
+        """Sends one request. Raises BatchError unless it succeeds."""
+        try:
+            response = self._session().request(method, self.endpoint, params=params, timeout=self.timeout, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            raise BatchError("transient", e.__class__.__name__) from e
+        if response.status_code < 300:
+            return response
+        try:
+            error = response.json()
+        except ValueError:
+            error = {}
+        message = error.get("message") or response.text[:200] or response.reason
+        status = response.status_code
+        if status in (413, 414):
+            kind = "too_large"
+        elif status in (408, 429) or status >= 500:
+            kind = "transient"
+        else:
+            kind = "rows"
+        retry_after = response.headers.get("Retry-After")
+        raise BatchError(kind, message, status, error.get("code"),
+                         float(retry_after) if retry_after and retry_after.isdigit() else None)
+
+    def upsert(self, body):
+        """Sends one batch (JSON bytes)."""
+        self._request("POST", self.params, data=body)
+
+    def fetch_page(self, after_id=0, columns=COLUMNS, page_size=DEFAULT_PAGE_SIZE):
+        """Up to page_size rows with id > after_id, in id order (keyset pagination)."""
+        params = {"select": ",".join(("id",) + tuple(columns)), "order": "id.asc", "id": f"gt.{after_id}",
+                  "limit": page_size}
+        return self._request("GET", params).json()
+
+    def delete_keys(self, keys):
+        """Deletes the rows with these (japanese, furigana) keys in one request."""
+        self._request("DELETE", {"or": "(" + ",".join(map(key_condition, keys)) + ")"},
+                      headers={"Prefer": "return=minimal"})
+
+    def delete_batches(self, keys, max_url_length=DEFAULT_MAX_URL_LENGTH):
+        """Splits keys into delete_keys() batches whose encoded URL stays under max_url_length."""
+        base = len(self.endpoint) + len("?or=%28%29")
+        batch, length = [], base
+        for key in keys:
+            # 每个条件之后还有一个编码后的逗号 (%2C)
+            size = len(quote_plus(key_condition(key))) + 3
+            if batch and length + size > max_url_length:
+                yield batch
+                batch, length = [], base
+            batch.append(key)
+            length += size
+        if batch:
+            yield batch
+
+    def close(self):
+        for session in self._sessions:
+            session.close()
+
+class BatchSizer:
+    """Adaptive batch size from observed request latency and bytes per row. Thread-safe."""
+
+    def __init__(self, size=DEFAULT_BATCH_SIZE, min_size=DEFAULT_MIN_BATCH_SIZE, max_size=DEFAULT_MAX_BATCH_SIZE,
+                 target_seconds=DEFAULT_TARGET_SECONDS, max_payload=DEFAULT_MAX_PAYLOAD):
+        self.size = size
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_seconds = target_seconds
+        self.max_payload = max_payload
+        self.row_bytes = None
+        self.smallest = self.largest = size
+        self._lock = threading.Lock()
+
+    def _set(self, size):
+        if self.row_bytes:
+            # 请求体不超过 max_payload
+            size = min(size, int(self.max_payload / self.row_bytes))
+        self.size = max(self.min_size, min(self.max_size, size))
+        self.smallest = min(self.smallest, self.size)
+        self.largest = max(self.largest, self.size)
+
+    def observe(self, rows, nbytes, seconds):
+        with self._lock:
+            per_row = nbytes / rows
+            self.row_bytes = per_row if self.row_bytes is None else 0.8 * self.row_bytes + 0.2 * per_row
+            # 只根据接近当前大小的批次调整 (二分出来的小批次不算)
+            if rows < self.size // 2:
+                self._set(self.size)
+            elif seconds < self.target_seconds / 2:
+                self._set(self.size * 2)
+            elif seconds > self.target_seconds * 1.5:
+                self._set(int(self.size * self.target_seconds / seconds))
+            else:
+                self._set(self.size)
+
+    def shrink(self, rejected_bytes=None):
+        """Timeouts and 413s: halve the batch size. A 413 also lowers max_payload below the rejected body."""
+        with self._lock:
+            if rejected_bytes:
+                self.max_payload = min(self.max_payload, int(rejected_bytes * 0.8))
+            self._set(self.size // 2)
+
+class SupabaseImporter:
+    def __init__(self, client, sizer=None, workers=DEFAULT_WORKERS, max_retries=DEFAULT_MAX_RETRIES,
+                 backoff_base=0.5, backoff_max=30.0):
+        self.client = client
+        self.sizer = sizer or BatchSizer()
+        self.workers = workers
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.stats = {"rows": 0, "imported": 0, "batches": 0, "requests": 0, "retries": 0, "bisections": 0,
+                      "bytes": 0}
+        self.failed = []
+        self._lock = threading.Lock()
 
-    supabase: Client = create_client(url, key)
-    return supabase
+    def _count(self, **counts):
+        with self._lock:
+            for name, n in counts.items():
+                self.stats[name] += n
 
-def import_vocabulary(supabase: Client, json_file_path: str):
-    """Reads vocabulary from a JSON file and inserts it into the Supabase 'verbs' table in batches."""
+    def _retrying(self, call, size):
+        """call() with retries for transient errors. Raises BatchError when it fails for good."""
+        attempt = 0
+        while True:
+            try:
+                self._count(requests=1)
+                return call()
+            except BatchError as e:
+                if e.kind != "transient" or attempt >= self.max_retries:
+                    raise
+                # 全抖动指数退避, 服务器给了 Retry-After 时至少等那么久
+                delay = max(e.retry_after or 0.0, random.uniform(0, min(self.backoff_max,
+                                                                           self.backoff_base * 2 ** attempt)))
+                print(f"  - {e.status or e} for a batch of {size}, retry {attempt + 1}/{self.max_retries} "
+                      f"in {delay:.1f}s")
+                self._count(retries=1)
+                time.sleep(delay)
+                attempt += 1
+
+    def _send(self, rows):
+        body = json.dumps(rows, ensure_ascii=False).encode("utf-8")
+
+        def upsert():
+            start = time.perf_counter()
+            try:
+                self.client.upsert(body)
+            except BatchError as e:
+                if e.kind == "too_large":
+                    self.sizer.shrink(len(body))
+                elif e.kind == "transient" and e.status is None:
+                    self.sizer.shrink()
+                raise
+            self.sizer.observe(len(rows), len(body), time.perf_counter() - start)
+
+        self._retrying(upsert, len(rows))
+        self._count(imported=len(rows), bytes=len(body))
+
+    def _fail(self, rows, error):
+        with self._lock:
+            for row in rows:
+                self.failed.append({"japanese": row.get("japanese"), "furigana": row.get("furigana"),
+                                    "status": error.status, "code": error.code, "error": str(error)})
+
+    def _import_batch(self, rows):
+        """Sends a batch; rows rejected for their data are bisected until the bad ones are isolated."""
+        try:
+            self._send(rows)
+        except BatchError as e:
+            if e.kind == "transient" or len(rows) == 1:
+                self._fail(rows, e)
+                return
+            self._count(bisections=1)
+            middle = len(rows) // 2
+            self._import_batch(rows[:middle])
+            self._import_batch(rows[middle:])
+
+    def fetch_hashes(self, page_size=DEFAULT_PAGE_SIZE):
+        """Content hashes of the rows already in the table. Pages are retried like upsert batches."""
+        hashes = {}
+        last_id = 0
+        while True:
+            rows = self._retrying(lambda: self.client.fetch_page(last_id, page_size=page_size), page_size)
+            for row in rows:
+                hashes[row_key(row)] = row_content_hash(row)
+            if len(rows) < page_size:
+                return hashes
+            last_id = rows[-1]["id"]
+            if len(hashes) % 50000 < page_size:
+                print(f"Fetched {len(hashes)} rows...")
+
+    def _delete_batch(self, keys):
+        """Deletes one batch; a URL the server finds too long (414) is split in half. Returns the failed keys."""
+        try:
+            self._retrying(lambda: self.client.delete_keys(keys), len(keys))
+        except BatchError as e:
+            if e.kind == "too_large" and len(keys) > 1:
+                self._count(bisections=1)
+                middle = len(keys) // 2
+                return self._delete_batch(keys[:middle]) + self._delete_batch(keys[middle:])
+            print(f"  - Could not delete {len(keys)} rows: {e.status} {e}")
+            return list(keys)
+        return []
+
+    def delete(self, keys, max_url_length=DEFAULT_MAX_URL_LENGTH):
+        """Deletes keys in batches sized by URL length (the keys go into the URL). Returns the keys that could not be deleted."""
+        failed = []
+        for batch in self.client.delete_batches(keys, max_url_length):
+            failed.extend(self._delete_batch(batch))
+        return failed
+
+    def run(self, records):
+        """Imports all records. Their keys must be unique (see iter_latest). Returns the report dict."""
+        start = time.perf_counter()
+        initial_size = self.sizer.size
+        futures = set()
+
+        def collect(done):
+            for future in done:
+                futures.discard(future)
+                future.result()
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            batch = []
+            for record in records:
+                batch.append(to_row(record))
+                if len(batch) >= self.sizer.size:
+                    # 最多 2 * workers 个批次在等待, 内存不随输入增长
+                    while len(futures) >= self.workers * 2:
+                        collect(wait(futures, return_when=FIRST_COMPLETED).done)
+                    futures.add(executor.submit(self._import_batch, batch))
+                    self._count(rows=len(batch), batches=1)
+                    if self.stats["batches"] % 50 == 0:
+                        print(f"Submitted {self.stats['rows']} rows, batch size {self.sizer.size}...")
+                    batch = []
+            if batch:
+                futures.add(executor.submit(self._import_batch, batch))
+                self._count(rows=len(batch), batches=1)
+            collect(wait(futures).done)
+
+        elapsed = time.perf_counter() - start
+        return {
+            "rows": self.stats["rows"],
+            "imported": self.stats["imported"],
+            "failed": len(self.failed),
+            "seconds": round(elapsed, 2),
+            "rows_per_second": round(self.stats["imported"] / elapsed, 1) if elapsed else None,
+            "workers": self.workers,
+            "batches": self.stats["batches"],
+            "requests": self.stats["requests"],
+            "retries": self.stats["retries"],
+            "bisections": self.stats["bisections"],
+            "duplicate_keys_merged": 0,
+            "megabytes_sent": round(self.stats["bytes"] / 1024 / 1024, 2),
+            "batch_size": {"initial": initial_size, "final": self.sizer.size,
+                           "smallest": self.sizer.smallest, "largest": self.sizer.largest},
+            "failed_keys": self.failed,
+        }
+
+def load_import_state(path, endpoint):
+    """{(japanese, furigana): content hash} saved by the last delta import into endpoint, or None."""
+    if not os.path.exists(path):
+        return None
+    with open(path, 'r', encoding='utf-8') as f:
+        state = json.load(f)
+    if state.get("endpoint") != endpoint:
+        return None
+    return {(japanese, furigana): digest for japanese, furigana, digest in state["rows"]}
+
+def save_import_state(path, endpoint, hashes):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({"endpoint": endpoint, "saved_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                   "rows": [[japanese, furigana, digest] for (japanese, furigana), digest in hashes.items()]},
+                  f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+class DeltaFilter:
+    """Passes on only the rows whose content hash differs from the table's, and remembers the keys it saw.
+
+    The records must be unique by key (iter_latest). Otherwise every earlier duplicate would count as
+    changed, and the hash saved for the key might not be that of the row the table ends up with.
+    """
+
+    def __init__(self, hashes):
+        self.hashes = hashes
+        self.pending = {}
+        self.seen = set()
+        self.stats = {"unchanged": 0, "inserted": 0, "changed": 0}
+
+    def filter(self, records):
+        for record in records:
+            row = to_row(record)
+            key = row_key(row)
+            if key in self.seen:
+                raise ValueError(f"Repeated key {key}: collapse the records with iter_latest first.")
+            digest = row_content_hash(row)
+            self.seen.add(key)
+            previous = self.hashes.get(key)
+            if previous == digest:
+                self.stats["unchanged"] += 1
+                continue
+            self.stats["inserted" if previous is None else "changed"] += 1
+            self.pending[key] = digest
+            yield row
+
+    def commit(self, failed_keys):
+        """Records the hashes of the rows that were upserted."""
+        for key, digest in self.pending.items():
+            if key not in failed_keys:
+                self.hashes[key] = digest
+        self.pending = {}
+
+    def missing(self):
+        return [key for key in self.hashes if key not in self.seen]
+
+def format_report(report):
+    sizes = report['batch_size']
+    text = (f"Imported {report['imported']}/{report['rows'] - report['duplicate_keys_merged']} rows "
+            f"in {report['seconds']}s ({report['rows_per_second']} rows/s, {report['workers']} workers), "
+            f"{report['failed']} failed.\n"
+            f"{report['batches']} batches, {report['requests']} requests, {report['retries']} retries, "
+            f"{report['bisections']} bisections, {report['duplicate_keys_merged']} duplicate keys merged; "
+            f"batch size {sizes['initial']} -> {sizes['final']} (range {sizes['smallest']}-{sizes['largest']}).")
+    delta = report.get("delta")
+    if delta:
+        text += (f"\nDelta ({delta['state_source']}): {delta['unchanged']} unchanged, {delta['inserted']} new, "
+                 f"{delta['changed']} changed, {delta['deleted']} deleted")
+        if delta['delete_failed']:
+            text += f", {delta['delete_failed']} could not be deleted"
+        text += "."
+    return text
+
+def import_vocabulary(client, json_file_path, report_path=DEFAULT_REPORT, sizer=None, workers=DEFAULT_WORKERS,
+                      max_retries=DEFAULT_MAX_RETRIES, delta=False, state_path=DEFAULT_STATE, refresh_state=False,
+                      delete_missing=False, max_url_length=DEFAULT_MAX_URL_LENGTH):
+    """Upserts the records of a JSON/NDJSON file into the table. Returns the report, or None if nothing was imported.
+
+    With delta=True only new and changed rows are sent (see the module docstring).
+    """
+    importer = SupabaseImporter(client, sizer, workers, max_retries)
     try:
-        with open(json_file_path, 'r', encoding='utf-8') as f:
-            words = json.load(f)
+        latest = latest_positions(json_file_path)
     except FileNotFoundError:
         print(f"Error: The file {json_file_path} was not found.")
-        return
-    except json.JSONDecodeError:
+        return None
+    except (ijson.JSONError, json.JSONDecodeError):
         print(f"Error: Could not decode JSON from the file {json_file_path}.")
-        return
+        return None
+    total_rows = max(latest.values(), default=-1) + 1
+    records = iter_latest(json_file_path, latest)
+    delta_filter = None
+    if delta:
+        hashes = None if refresh_state else load_import_state(state_path, client.endpoint)
+        state_source = "state file"
+        if hashes is None:
+            print(f"Fetching the content hashes of the rows in {client.endpoint}...")
+            state_source = "table"
+            try:
+                hashes = importer.fetch_hashes()
+            except BatchError as e:
+                print(f"Error: Could not read the table: {e.status} {e}")
+                return None
+        print(f"{len(hashes)} rows in the table ({state_source}).")
+        delta_filter = DeltaFilter(hashes)
+        records = delta_filter.filter(records)
 
-    print(f"Found {len(words)} words to import from {json_file_path}.")
+    duplicates = total_rows - len(latest)
+    print(f"Importing {json_file_path} with {importer.workers} workers "
+          f"({duplicates} records replaced by a later one with the same key)...")
+    report = importer.run(records)
+    # 重复键的记录没有进入 run(), 这里补上
+    report["rows"] += duplicates
+    report["duplicate_keys_merged"] = duplicates
+    report["input"] = json_file_path
 
-    batch_size = 100
-    for i in range(0, len(words), batch_size):
-        batch = words[i:i + batch_size]
-        print(f"Processing batch {i // batch_size + 1}/{(len(words) + batch_size - 1) // batch_size}...")
-        
-        try:
-            # Use upsert with on_conflict to avoid errors with duplicate data
-            # This will insert new words and ignore duplicates based on the (japanese, furigana) unique constraint.
-            data, error = supabase.table('verbs').upsert(batch, on_conflict="japanese,furigana").execute()
-            
-            if error:
-                # The library returns a tuple (data, error)
-                # We check the second element for errors.
-                print(f"Error inserting batch: {error}")
-            else:
-                print(f"Successfully inserted batch of {len(batch)} words.")
+    if delta_filter:
+        failed_keys = {(failure["japanese"], failure["furigana"]) for failure in importer.failed}
+        delta_filter.commit(failed_keys)
+        deleted, delete_failed = 0, []
+        if delete_missing:
+            missing = delta_filter.missing()
+            # 输入为空时多半是文件出了问题, 不删除整张表
+            if missing and not delta_filter.seen:
+                print(f"Not deleting {len(missing)} rows: the input has no rows.")
+            elif missing:
+                print(f"Deleting {len(missing)} rows that are no longer in the input...")
+                delete_failed = importer.delete(missing, max_url_length)
+                kept = set(delete_failed)
+                for key in missing:
+                    if key not in kept:
+                        del delta_filter.hashes[key]
+                deleted = len(missing) - len(delete_failed)
+                # DELETE 的请求, 重试和二分也计入报告
+                for name in ("requests", "retries", "bisections"):
+                    report[name] = importer.stats[name]
+        save_import_state(state_path, client.endpoint, delta_filter.hashes)
+        report["delta"] = {"state_source": state_source, **delta_filter.stats, "deleted": deleted,
+                           "delete_failed": len(delete_failed),
+                           "delete_failed_keys": [list(key) for key in delete_failed]}
 
-        except Exception as e:
-            print(f"An unexpected error occurred during insertion: {e}")
+    with open(report_path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, ensure_ascii=False, indent=2)
 
-    print("\nVocabulary import process finished.")
+    print("\n--- Import Report ---")
+    print(format_report(report))
+    for failure in report["failed_keys"][:10]:
+        print(f"  {failure['japanese']} [{failure['furigana']}]: {failure['status']} {failure['code']} "
+              f"{failure['error']}")
+    print(f"Report saved to {report_path}")
+    print("---------------------")
+    return report
 
 def main():
     """Main function to run the importer."""
-    supabase_client = get_supabase_client()
-    json_file = 'vocabulary_final.json'
-    import_vocabulary(supabase_client, json_file)
+    parser = argparse.ArgumentParser(description="Upsert vocabulary into the Supabase verbs table.")
+    parser.add_argument("--input", default=DEFAULT_INPUT, help="JSON array or NDJSON file")
+    parser.add_argument("--url", default=None, help="Supabase/PostgREST URL (default: SUPABASE_URL)")
+    parser.add_argument("--key", default=None, help="Service key (default: SUPABASE_SERVICE_KEY)")
+    parser.add_argument("--table", default=DEFAULT_TABLE)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Concurrent upsert requests")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Initial rows per batch")
+    parser.add_argument("--min-batch-size", type=int, default=DEFAULT_MIN_BATCH_SIZE)
+    parser.add_argument("--max-batch-size", type=int, default=DEFAULT_MAX_BATCH_SIZE)
+    parser.add_argument("--target-seconds", type=float, default=DEFAULT_TARGET_SECONDS,
+                        help="Request latency the batch size is tuned towards")
+    parser.add_argument("--max-payload", type=int, default=DEFAULT_MAX_PAYLOAD, help="Largest request body (bytes)")
+    parser.add_argument("--max-retries", type=int, default=DEFAULT_MAX_RETRIES)
+    parser.add_argument("--report", default=DEFAULT_REPORT, help="Import report (JSON)")
+    parser.add_argument("--delta", action="store_true", help="Only upsert rows that are new or changed")
+    parser.add_argument("--state", default=DEFAULT_STATE, help="Delta mode: content hashes of the imported rows")
+    parser.add_argument("--refresh-state", action="store_true",
+                        help="Delta mode: fetch the hashes from the table instead of the state file")
+    parser.add_argument("--delete-missing", action="store_true",
+                        help="Delta mode: delete rows whose key is no longer in the input")
+    parser.add_argument("--max-url-length", type=int, default=DEFAULT_MAX_URL_LENGTH,
+                        help="Delta mode: longest DELETE URL (bytes)")
+    args = parser.parse_args()
+
+    load_env()
+    try:
+        url, key = get_supabase_credentials(args.url, args.key)
+    except ValueError as e:
+        parser.error(str(e))
+    client = PostgrestClient(url, key, args.table)
+    sizer = BatchSizer(args.batch_size, args.min_batch_size, args.max_batch_size, args.target_seconds,
+                       args.max_payload)
+    try:
+        report = import_vocabulary(client, args.input, args.report, sizer, args.workers, args.max_retries,
+                                   args.delta, args.state, args.refresh_state, args.delete_missing,
+                                   args.max_url_length)
+    finally:
+        client.close()
+    if report is None or report["failed"] or report.get("delta", {}).get("delete_failed"):
+        raise SystemExit(1)
 
 if __name__ == '__main__':
     main()
-
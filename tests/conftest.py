@@ -0,0 +1,78 @@
+import json
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 脚本都在仓库根目录和 supabase/ 下, 以顶层模块的方式导入
+for path in (ROOT, os.path.join(ROOT, "supabase")):
+    if path not in sys.path:
+        sys.path.insert(0, path)
+
+def make_entry(i, kanji, kana, pos, glosses, misc=()):
+    entry = {"id": str(i), "kanji": [{"text": kanji}] if kanji else [], "kana": [{"text": kana}],
+             "sense": [{"partOfSpeech": list(pos), "gloss": [{"text": g} for g in glosses]}]}
+    if misc:
+        entry["misc"] = list(misc)
+    return entry
+
+# 小型 JMdict: 动词/形容词/名词, 含重复的 (japanese, furigana) 和没有释义的条目
+SMALL_JMDICT_ENTRIES = [
+    make_entry(1, "食べる", "たべる", ["v1", "vt"], ["to eat"], ["ichi"]),
+    make_entry(2, "書く", "かく", ["v5k", "vt"], ["to write"], ["news1"]),
+    make_entry(3, "高い", "たかい", ["adj-i"], ["high", "expensive"], ["ichi"]),
+    make_entry(4, "静か", "しずか", ["adj-na"], ["quiet"], ["spec1"]),
+    make_entry(5, "本", "ほん", ["n"], ["book"], ["ichi"]),
+    make_entry(6, "食べる", "たべる", ["v1"], ["to live on"]),
+    make_entry(7, None, "する", ["vs-i"], ["to do"], ["ichi"]),
+    make_entry(8, "来る", "くる", ["vk"], ["to come"], ["ichi"]),
+    make_entry(9, "空", "から", ["n"], []),
+    make_entry(10, "泳ぐ", "およぐ", ["v5g"], ["to swim"], ["nf05"]),
+]
+
+@pytest.fixture
+def small_jmdict(tmp_path):
+    path = tmp_path / "jmdict.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"version": "test", "words": SMALL_JMDICT_ENTRIES}, f, ensure_ascii=False)
+    return str(path)
+
+# supabase_importer 的测试共用本地 PostgREST 替身; 依赖在函数内导入, 其余测试不受影响
+@pytest.fixture
+def standin(request):
+    from postgrest_standin import start_standin
+    options = getattr(request, "param", {})
+    server = start_standin(latency=0.0, row_latency=0.0, **options)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.fixture
+def client(standin):
+    from supabase_importer import PostgrestClient
+    client = PostgrestClient(standin.base_url, "test")
+    yield client
+    client.close()
+
+def make_record(i, english=None):
+    return {"japanese": f"語{i}", "furigana": f"ご{i}", "english": english or f"word {i}", "jlpt_level": "N5",
+            "part_of_speech": "Noun", "conjugations": None}
+
+def write_ndjson(path, records):
+    with open(path, "w", encoding="utf-8") as f:
+        for record in records:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+    return str(path)
+
+def stored_rows(standin):
+    return {key: {column: value for column, value in row.items() if column != "id"}
+            for key, row in standin.rows.items()}
+
+def run_import(client, tmp_path, records, **options):
+    from supabase_importer import BatchSizer, import_vocabulary
+    options.setdefault("sizer", BatchSizer(size=16, min_size=1))
+    options.setdefault("workers", 2)
+    path = write_ndjson(tmp_path / "vocabulary.ndjson", records)
+    return import_vocabulary(client, path, str(tmp_path / "report.json"), state_path=str(tmp_path / "state.json"),
+                             **options)
@@ -0,0 +1,53 @@
+"""check_duplicates: key normalization, the fingerprint table and multi-file checks."""
+import json
+import random
+import pytest
+from check_duplicates import FingerprintTable, _pack, _unpack, check_duplicates, normalize_key, record_key
+
+@pytest.mark.parametrize("japanese, furigana, key", [
+    ("食べる", "た", ("食べる", "た")),
+    ("食べる", "たべる", ("食べる", "た")),
+    ("お茶", "おちゃ", ("お茶", "ちゃ")),
+    ("テレビ", "てれび", ("テレビ", "")),
+    ("ﾃﾚﾋﾞ", "", ("テレビ", "")),
+    (" 本 ", "ホン", ("本", "ほん")),
+])
+def test_normalize_key(japanese, furigana, key):
+    assert normalize_key(japanese, furigana) == key
+
+def test_record_key_for_every_dataset_layout():
+    assert record_key({"japanese": "食べる", "furigana": "た"}) == record_key({"word": "食べる", "reading": "たべる"})
+    assert record_key({"verb": "書く", "reading": "かく"}) == ("書く", "か")
+    assert record_key({"english": "no key"}) is None
+
+def test_fingerprint_table_matches_a_dict():
+    rng = random.Random(4)
+    table, reference = FingerprintTable(capacity=8), {}
+    for i in range(5000):
+        fingerprint = rng.choice([0, 1, rng.getrandbits(64), rng.getrandbits(8)])
+        value = _pack(i % 3, i)
+        # 0 是空槽标记, 表内把它当作 1
+        expected = reference.setdefault(fingerprint or 1, value)
+        assert table.setdefault(fingerprint, value) == expected
+    assert table.size == len(reference)
+    assert _unpack(_pack(2, 12345)) == (2, 12345)
+
+def test_check_across_json_and_ndjson(tmp_path, capsys):
+    first = [{"japanese": "食べる", "furigana": "た"}, {"japanese": "本", "furigana": "ほん"},
+             {"japanese": "本", "furigana": "ほん", "english": "dup"}, {"english": "no key"}]
+    second = [{"word": "食べる", "reading": "たべる"}, {"word": "犬", "reading": "いぬ"}]
+    (tmp_path / "a.json").write_text(json.dumps(first, ensure_ascii=False), encoding="utf-8")
+    (tmp_path / "b.ndjson").write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in second) + "\n",
+                                       encoding="utf-8")
+    paths = [str(tmp_path / "a.json"), str(tmp_path / "b.ndjson"), str(tmp_path / "missing.json")]
+    stats = check_duplicates(paths, str(tmp_path / "merged.json"))
+
+    assert stats[0] == {"records": 4, "no_key": 1, "unique": 2, "duplicates": 1}
+    assert stats[1] == {"records": 2, "no_key": 0, "unique": 1, "duplicates": 1}
+    assert stats[2]["records"] == 0
+    with open(tmp_path / "merged.json", encoding="utf-8") as f:
+        assert json.load(f) == [first[0], first[1], second[1]]
+    out = capsys.readouterr().out
+    assert f"{paths[0]} -> {paths[1]}: 1 (cross-file)" in out
+    assert f"{paths[0]} -> {paths[0]}: 1 (within file)" in out
+    assert f"The file {paths[2]} was not found" in out
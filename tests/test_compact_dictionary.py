@@ -0,0 +1,48 @@
+"""compact_dictionary: encode -> memory-mapped decode round trips."""
+import json
+import pytest
+import jmdict_processor
+from compact_dictionary import CompactDictionary, compact_to_json, encode_records, json_to_compact
+from jmdict_json_parser import parse_jmdict_json
+
+def test_words_and_vocabulary_round_trip(small_jmdict, tmp_path):
+    jmdict_processor.main(["--input", small_jmdict, "--output", str(tmp_path / "words.json"), "--limit", "0"])
+    parse_jmdict_json(small_jmdict, str(tmp_path / "vocabulary.json"))
+
+    for name in ("words", "vocabulary"):
+        source = tmp_path / f"{name}.json"
+        json_to_compact(str(source), str(tmp_path / f"{name}.kpdb"))
+        compact_to_json(str(tmp_path / f"{name}.kpdb"), str(tmp_path / f"{name}.decoded.json"))
+        assert (tmp_path / f"{name}.decoded.json").read_bytes() == source.read_bytes()
+
+def test_column_kinds_and_random_access(tmp_path):
+    records = [{"japanese": f"語{i}", "jlpt_level": [None, "N5", "N1"][i % 3], "commonness_score": [0, None, 1000][i % 3],
+                "forms": {"te_form": f"て{i}"} if i % 2 else None, "flag": i % 2 == 0} for i in range(50)]
+    path = tmp_path / "records.kpdb"
+    path.write_bytes(encode_records(records))
+
+    with CompactDictionary(str(path)) as dictionary:
+        kinds = {field["name"]: field["kind"] for field in dictionary.fields}
+        assert kinds == {"japanese": "string", "jlpt_level": "enum", "commonness_score": "int", "forms": "json",
+                         "flag": "json"}
+        assert len(dictionary) == 50
+        assert dictionary[-1] == records[-1]
+        assert dictionary[10:13] == records[10:13]
+        assert dictionary.get_field(7, "forms") == {"te_form": "て7"}
+        assert list(dictionary) == records
+        with pytest.raises(IndexError):
+            dictionary[50]
+
+def test_embedded_at_offset_and_empty(tmp_path):
+    path = tmp_path / "bundle.bin"
+    path.write_bytes(b"\0" * 16 + encode_records([]))
+    with CompactDictionary(str(path), base_offset=16) as dictionary:
+        assert list(dictionary) == []
+
+def test_rejects_bad_input(tmp_path):
+    with pytest.raises(ValueError):
+        encode_records([{"a": 1}, {"b": 2}])
+    path = tmp_path / "words.json"
+    path.write_text(json.dumps([]), encoding="utf-8")
+    with pytest.raises(ValueError):
+        CompactDictionary(str(path))
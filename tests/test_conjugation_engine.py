@@ -0,0 +1,52 @@
+"""conjugation_engine: table-driven forms against hand-written textbook forms."""
+import pytest
+from conjugation_engine import conjugate_adjective_native, conjugate_batch, conjugate_verb_native
+
+@pytest.mark.parametrize("verb, group, expected", [
+    ("食べる", "ichidan", {"masu_form": "食べます", "te_form": "食べて", "past_form": "食べた",
+                          "nai_form": "食べない", "volitional_form": "食べよう", "potential_form": "食べられる",
+                          "conditional_ba_form": "食べれば", "imperative_form": "食べろ"}),
+    ("書く", "godan", {"masu_form": "書きます", "te_form": "書いて", "past_form": "書いた", "nai_form": "書かない",
+                       "volitional_form": "書こう", "potential_form": "書ける", "passive_form": "書かれる",
+                       "causative_form": "書かせる", "imperative_form": "書け"}),
+    ("泳ぐ", "godan", {"te_form": "泳いで", "past_form": "泳いだ"}),
+    ("話す", "godan", {"te_form": "話して", "nai_form": "話さない"}),
+    ("待つ", "godan", {"te_form": "待って", "masu_form": "待ちます"}),
+    ("死ぬ", "godan", {"te_form": "死んで", "conditional_ba_form": "死ねば"}),
+    ("買う", "godan", {"te_form": "買って", "nai_form": "買わない"}),
+    ("行く", "godan", {"te_form": "行って", "past_form": "行った", "masu_form": "行きます"}),
+    ("ある", "godan", {"nai_form": "ない", "te_form": "あって"}),
+    ("する", "suru", {"masu_form": "します", "potential_form": "できる", "imperative_form": "しろ"}),
+    ("勉強", "suru", {"te_form": "勉強して", "nai_form": "勉強しない"}),
+    ("来る", "kuru", {"masu_form": "来ます", "nai_form": "来ない", "imperative_form": "来い"}),
+    ("くる", "kuru", {"masu_form": "きます", "nai_form": "こない", "conditional_ba_form": "くれば"}),
+])
+def test_verb_forms(verb, group, expected):
+    forms = conjugate_verb_native(verb, group)
+    assert forms["dictionary_form"] == verb
+    assert {key: forms[key] for key in expected} == expected
+
+def test_unknown_group_or_ending_gives_no_forms():
+    assert conjugate_verb_native("食べる", "Unknown") == {}
+    assert conjugate_verb_native("食べ", "ichidan") == {}
+
+@pytest.mark.parametrize("adjective, adj_type, expected", [
+    ("高い", "i-adjective", {"negative": "高くない", "past": "高かった", "te_form": "高くて",
+                              "conditional_ba": "高ければ"}),
+    ("いい", "i-adjective", {"negative": "よくない", "past": "よかった"}),
+    ("かわいい", "i-adjective", {"negative": "かわいくない"}),
+    ("静か", "na-adjective", {"plain_form": "静かだ", "negative": "静かではない", "te_form": "静かで"}),
+])
+def test_adjective_forms(adjective, adj_type, expected):
+    forms = conjugate_adjective_native(adjective, adj_type)
+    assert {key: forms[key] for key in expected} == expected
+
+def test_batch_matches_single_calls_and_copies_repeats():
+    pairs = [("食べる", "ichidan"), ("高い", "i-adjective"), ("食べる", "ichidan"), ("書く", "godan")]
+    results = conjugate_batch(pairs)
+
+    assert results[0] == results[2] == conjugate_verb_native("食べる", "ichidan")
+    assert results[1] == conjugate_adjective_native("高い", "i-adjective")
+    assert results[3] == conjugate_verb_native("書く", "godan")
+    results[0]["te_form"] = "changed"
+    assert results[2]["te_form"] == "食べて"
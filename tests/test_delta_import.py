@@ -0,0 +1,33 @@
+"""supabase_importer.py delta mode: content hashes, no-op reruns and deletes of missing keys."""
+import pytest
+from conftest import make_record, run_import, stored_rows
+
+def test_delta_noop_change_and_delete(standin, client, tmp_path):
+    records = [make_record(i) for i in range(30)]
+    report = run_import(client, tmp_path, records, delta=True)
+    assert report["delta"]["inserted"] == 30
+
+    upserted = standin.stats["upserted"]
+    report = run_import(client, tmp_path, records, delta=True, delete_missing=True)
+    assert report["delta"]["unchanged"] == 30 and report["delta"]["deleted"] == 0
+    assert report["imported"] == 0 and standin.stats["upserted"] == upserted
+
+    # 一行修改, 一行删除; 状态从表中重新读取
+    records[5] = make_record(5, "changed")
+    removed = records.pop(7)
+    report = run_import(client, tmp_path, records, delta=True, delete_missing=True, refresh_state=True)
+    assert report["delta"]["state_source"] == "table"
+    assert (report["delta"]["unchanged"], report["delta"]["changed"], report["delta"]["deleted"]) == (28, 1, 1)
+    assert report["imported"] == 1
+    assert stored_rows(standin)[("語5", "ご5")]["english"] == "changed"
+    assert (removed["japanese"], removed["furigana"]) not in standin.rows
+
+@pytest.mark.parametrize("standin", [{"max_url": 2000}], indirect=True)
+def test_delete_bisects_on_414(standin, client, tmp_path):
+    records = [make_record(i) for i in range(300)]
+    run_import(client, tmp_path, records, delta=True)
+    report = run_import(client, tmp_path, records[:10], delta=True, delete_missing=True, max_url_length=20000)
+
+    assert report["delta"]["deleted"] == 290 and report["delta"]["delete_failed"] == 0
+    assert report["bisections"] > 0 and standin.stats["too_large"] > 0
+    assert len(standin.rows) == 10
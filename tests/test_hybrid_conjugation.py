@@ -0,0 +1,81 @@
+"""hybrid_conjugation: sampling plan, verification report and the --hybrid scraper run."""
+import json
+import os
+import subprocess
+import sys
+import pytest
+from fixture_server import REFERENCE_VERBS, reference_record, start_fixture_server
+from hybrid_conjugation import VerificationReport, is_irregular_verb, load_verb_dictionary, plan_hybrid
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def dictionary_entry(group):
+    return {"reading": "", "meaning": "", "group": group, "jlpt_level": "N5"}
+
+def test_plan_verifies_a_fixed_sample_and_every_irregular_verb():
+    dictionary = {verb: dictionary_entry(group) for verb, group in [
+        ("食べる", "ichidan"), ("見る", "ichidan"), ("書く", "godan"), ("飲む", "godan"), ("待つ", "godan"),
+        ("する", "suru"), ("来る", "kuru"), ("行く", "godan"), ("問う", "godan"), ("ある", "godan")]}
+    verbs = list(dictionary) + ["未知"]
+    local, verify = plan_hybrid(verbs, dictionary, {}, sample_size=2, seed=5)
+
+    assert set(local) == set(dictionary)
+    irregular = {"する", "来る", "行く", "問う", "ある"}
+    assert irregular <= verify and len(verify - irregular) == 2
+    assert plan_hybrid(verbs, dictionary, {}, sample_size=2, seed=5)[1] == verify
+    assert all(is_irregular_verb(verb, dictionary[verb]["group"]) for verb in irregular)
+    assert local["食べる"]["forms"]["te_form"] == "食べて"
+
+def test_report_counts_mismatches_and_one_sided_forms():
+    report = VerificationReport()
+    local = {"verb": "書く", "group": "godan", "forms": {"te_form": "書いて", "past_form": "書いた", "nai_form": "書かない"}}
+    report.add(local, {"group": "godan", "forms": {"te_form": "書いて", "past_form": "書きた", "masu_stem": "書き"}})
+    report.add(local, None)
+    report.add({"verb": "来る", "group": "kuru", "forms": {"te_form": "来て"}}, {"group": "godan", "forms": {"x": "y"}})
+
+    state = VerificationReport(json.loads(json.dumps(report.state))).state
+    assert state["verified"] == 2 and state["unverified"] == ["書く"] and state["forms_compared"] == 2
+    assert [(m["verb"], m["field"]) for m in state["mismatches"]] == [("書く", "past_form"), ("来る", "group")]
+    assert state["missing_forms"] == {"nai_form": 1, "te_form": 1} and state["extra_forms"] == {"masu_stem": 1, "x": 1}
+    assert state["no_common_forms"] == ["来る"]
+    assert report.summary() == ({"past_form": 1, "group": 1}, {"godan": 1, "kuru": 1})
+
+def test_load_dictionary_from_words_and_verbs(tmp_path):
+    path = tmp_path / "words.json"
+    path.write_text(json.dumps([
+        {"word": "書く", "reading": "かく", "meaning": "to write", "type": "verb", "group": "godan"},
+        {"word": "書く", "reading": "かく", "meaning": "later duplicate", "type": "verb", "group": "godan"},
+        {"word": "本", "type": "noun", "group": ""},
+        {"verb": "来る", "reading": "くる", "meaning": "to come", "group": "kuru", "jlpt_level": "N5"},
+    ], ensure_ascii=False), encoding="utf-8")
+    dictionary = load_verb_dictionary(str(path))
+    assert sorted(dictionary) == ["書く", "来る"] and dictionary["書く"]["meaning"] == "to write"
+
+@pytest.fixture
+def fixture_server(tmp_path):
+    server = start_fixture_server(verbs_file=str(tmp_path / "no-verbs.json"))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_hybrid_scrape_fetches_only_the_verified_verbs(fixture_server, tmp_path):
+    (tmp_path / "japanese_verbs.txt").write_text("\n".join(REFERENCE_VERBS), encoding="utf-8")
+    (tmp_path / "public").mkdir()
+    dictionary = tmp_path / "dictionary.json"
+    dictionary.write_text(json.dumps([reference_record(verb) for verb in REFERENCE_VERBS], ensure_ascii=False),
+                          encoding="utf-8")
+    command = [sys.executable, os.path.join(ROOT, "conjugation_scraper.py"), "--base-url", fixture_server.base_url,
+               "--rate", "200", "--max-rate", "200", "--no-cache", "--hybrid", "--dictionary", str(dictionary),
+               "--sample", "2"]
+    result = subprocess.run(command, cwd=tmp_path, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+
+    with open(tmp_path / "public" / "verbs.json", encoding="utf-8") as f:
+        verbs = json.load(f)
+    with open(tmp_path / "public" / "verbs.json.verification.json", encoding="utf-8") as f:
+        report = json.load(f)
+    assert [record["verb"] for record in verbs] == list(REFERENCE_VERBS)
+    assert report["generated_locally"] == len(REFERENCE_VERBS)
+    assert fixture_server.requests == report["verified"] < len(REFERENCE_VERBS)
+    # 查表规则覆盖不到的特殊动词在报告里以不一致的形式出现
+    assert {m["verb"] for m in report["mismatches"]} == {"問う", "いらっしゃる"}
@@ -0,0 +1,119 @@
+"""incremental_build manifests and the --incremental mode of jmdict_processor."""
+import json
+import jmdict_processor
+from conftest import SMALL_JMDICT_ENTRIES
+from incremental_build import (changeset_path_for, diff_records, iter_incremental, load_manifest,
+                               manifest_path_for, write_manifest)
+
+def test_manifest_round_trip_and_version_mismatch(tmp_path):
+    path = str(tmp_path / "out.json.manifest.ndjson")
+    manifest = {"1": ("h1", {"word": "本"}), "2": ("h2", None)}
+    write_manifest(path, "v1", "digest", manifest)
+
+    assert load_manifest(path, "v1") == manifest
+    assert load_manifest(path, "v2") == {}
+    assert load_manifest(str(tmp_path / "missing"), "v1") == {}
+
+def test_iter_incremental_reuses_unchanged_entries():
+    entries = [{"id": 1, "text": "a"}, {"id": 2, "text": "b"}, {"id": 3, "text": "c"}]
+    calls = []
+    def derive(entry):
+        calls.append(entry["id"])
+        return {"text": entry["text"].upper()}
+
+    manifest = {}
+    assert list(iter_incremental(entries, {}, derive, manifest, {})) == [{"text": "A"}, {"text": "B"}, {"text": "C"}]
+    calls.clear()
+
+    edited = [{"id": 1, "text": "a"}, {"id": 2, "text": "B2"}, {"id": 4, "text": "d"}]
+    stats, new_manifest = {}, {}
+    derived = list(iter_incremental(edited, manifest, derive, new_manifest, stats))
+    assert derived == [{"text": "A"}, {"text": "B2"}, {"text": "D"}]
+    assert calls == [2, 4]
+    assert stats == {"added": 1, "changed": 1, "unchanged": 1, "deleted": 1}
+    assert sorted(new_manifest) == ["1", "2", "4"]
+
+def test_diff_records():
+    key = lambda record: (record["k"],)
+    old = [{"k": 1, "v": "a"}, {"k": 2, "v": "b"}, {"k": 3, "v": "c"}]
+    new = [{"k": 1, "v": "a"}, {"k": 2, "v": "B"}, {"k": 4, "v": "d"}]
+    assert diff_records(old, new, key) == {"added": [{"k": 4, "v": "d"}], "updated": [{"k": 2, "v": "B"}],
+                                           "deleted": [[3]]}
+
+def write_jmdict(path, entries):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump({"words": entries}, f, ensure_ascii=False)
+    return str(path)
+
+def build(input_path, output, *options):
+    jmdict_processor.main(["--input", input_path, "--output", output, "--limit", "0", "--incremental", *options])
+    with open(changeset_path_for(output), encoding="utf-8") as f:
+        return json.load(f)
+
+def test_incremental_build_matches_full_build(tmp_path, capsys):
+    release1 = write_jmdict(tmp_path / "r1.json", SMALL_JMDICT_ENTRIES)
+    entries = json.loads(json.dumps(SMALL_JMDICT_ENTRIES))
+    entries[4]["sense"][0]["gloss"][0]["text"] = "volume"
+    release2 = write_jmdict(tmp_path / "r2.json", entries)
+    output = str(tmp_path / "words.json")
+
+    assert len(build(release1, output)["added"]) == 10
+    capsys.readouterr()
+    assert build(release1, output) == {"added": [], "updated": [], "deleted": []}
+    assert "up to date" in capsys.readouterr().out
+
+    changeset = build(release2, output)
+    assert [w["meaning"] for w in changeset["added"]] == ["volume"]
+    assert [key[0] for key in changeset["deleted"]] == ["本"]
+    jmdict_processor.main(["--input", release2, "--output", str(tmp_path / "full.json"), "--limit", "0"])
+    with open(output, encoding="utf-8") as a, open(tmp_path / "full.json", encoding="utf-8") as b:
+        assert a.read() == b.read()
+
+def test_shard_options_are_part_of_the_version(small_jmdict, tmp_path, capsys):
+    output = str(tmp_path / "words.json")
+    build(small_jmdict, output, "--sharded", "--shard-size", "2")
+    capsys.readouterr()
+    build(small_jmdict, output, "--sharded", "--shard-size", "3")
+    assert "up to date" not in capsys.readouterr().out
+    with open(tmp_path / "words" / "words.manifest.json", encoding="utf-8") as f:
+        assert all(shard["count"] <= 3 for shard in json.load(f)["shards"])
+
+def test_library_mode_reuses_conjugations(small_jmdict, tmp_path, monkeypatch):
+    calls = []
+    def fake_conjugate(verb, group):
+        calls.append(verb)
+        return {"dictionary_form": verb}
+    monkeypatch.setattr(jmdict_processor, "_conjugate_verb_uncached", fake_conjugate)
+    output = str(tmp_path / "words.json")
+    options = ("--conjugator", "library", "--no-conjugation-cache")
+
+    build(small_jmdict, output, *options)
+    assert len(calls) == 6
+    calls.clear()
+
+    with open(small_jmdict, encoding="utf-8") as f:
+        data = json.load(f)
+    data["words"][1]["sense"][0]["gloss"][0]["text"] = "to draw"
+    write_jmdict(small_jmdict, data["words"])
+    build(small_jmdict, output, *options)
+    assert calls == ["書く"]
+    manifest = load_manifest(manifest_path_for(output), jmdict_processor.build_version("library", 0))
+    assert len(manifest) == len(SMALL_JMDICT_ENTRIES)
+
+def test_vocabulary_incremental_changeset(tmp_path, capsys):
+    from jmdict_json_parser import parse_jmdict_json, parse_jmdict_json_incremental
+    entries = json.loads(json.dumps(SMALL_JMDICT_ENTRIES))
+    release1 = write_jmdict(tmp_path / "r1.json", entries)
+    output = str(tmp_path / "vocabulary.json")
+    parse_jmdict_json_incremental(release1, output)
+    parse_jmdict_json_incremental(release1, output)
+    assert "up to date" in capsys.readouterr().out
+
+    del entries[2]
+    release2 = write_jmdict(tmp_path / "r2.json", entries)
+    parse_jmdict_json_incremental(release2, output)
+    with open(changeset_path_for(output), encoding="utf-8") as f:
+        assert json.load(f) == {"added": [], "updated": [], "deleted": [["高い", "たかい"]]}
+    parse_jmdict_json(release2, str(tmp_path / "full.json"))
+    with open(output, encoding="utf-8") as a, open(tmp_path / "full.json", encoding="utf-8") as b:
+        assert a.read() == b.read()
@@ -0,0 +1,42 @@
+"""Jisho JSON API records against the HTML search page records."""
+import pytest
+from benchmark_jisho_api import RECORD_FIELDS, compare_records, field_mismatches, ingest
+from fixture_server import start_fixture_server
+from html_backends import DEFAULT_PARSER_BACKEND
+from jisho_sources import jisho_api_record, kanji_furigana
+
+@pytest.fixture
+def fixture_server():
+    server = start_fixture_server(pages=2, per_page=10)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+@pytest.mark.parametrize("word, reading, furigana", [
+    ("食べる", "たべる", "た"), ("取り消す", "とりけす", "とけ"), ("お茶", "おちゃ", "ちゃ"), ("日本", "にほん", "にほん"),
+    ("コーヒー店", "コーヒーてん", "てん"), ("食べる", "のむ", "のむ"),
+])
+def test_kanji_furigana(word, reading, furigana):
+    assert kanji_furigana(word, reading) == furigana
+
+def test_api_record_fields():
+    entry = {"japanese": [{"word": "書く", "reading": "かく"}],
+             "senses": [{"english_definitions": ["to write", "to compose"], "parts_of_speech": ["Godan verb"]},
+                        {"english_definitions": ["to draw"], "parts_of_speech": []}]}
+    assert jisho_api_record(entry, "n5") == {"japanese": "書く", "furigana": "か", "english": "to write; to compose; to draw",
+                                             "jlpt_level": "N5", "part_of_speech": "Godan verb"}
+    kana_only = {"japanese": [{"reading": "ある"}], "senses": []}
+    assert jisho_api_record(kana_only, "n5")["furigana"] == ""
+
+def test_api_matches_html_except_part_of_speech(fixture_server):
+    levels = ["n5", "n1"]
+    html = ingest(fixture_server.base_url, "html", levels, 2, DEFAULT_PARSER_BACKEND)[0]
+    api = ingest(fixture_server.base_url, "api", levels, 2, DEFAULT_PARSER_BACKEND)[0]
+
+    assert len(html) == len(api) == 2 * 2 * 10
+    agreement = compare_records(html, api)
+    assert {field: agreement[field] for field in RECORD_FIELDS if field != "part_of_speech"} == \
+        {field: 100 for field in RECORD_FIELDS if field != "part_of_speech"}
+    # HTML 记录没有词性, API 记录有; 基准测试的输出列出这个差异
+    count, examples = field_mismatches(html, api, "part_of_speech")
+    assert count == len(html) and all(html_pos == "" and api_pos for html_pos, api_pos in examples)
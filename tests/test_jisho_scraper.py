@@ -0,0 +1,92 @@
+"""jisho_scraper.py modes against the in-process fixture server."""
+import json
+import os
+import subprocess
+import sys
+import pytest
+from fixture_server import start_fixture_server
+from http_fetch import Fetcher, OfflineCacheMiss
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+@pytest.fixture
+def fixture_server():
+    server = start_fixture_server(pages=3, per_page=10)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def scrape(tmp_path, base_url, output, *options):
+    """Runs the scraper CLI as the main script and returns the records it wrote."""
+    command = [sys.executable, os.path.join(ROOT, "jisho_scraper.py"), "--output", output, "--base-url", base_url,
+               "--rate", "200", "--max-rate", "200", "--cache-dir", str(tmp_path / "cache"), *options]
+    result = subprocess.run(command, cwd=tmp_path, capture_output=True, text=True, timeout=120)
+    assert result.returncode == 0, result.stdout + result.stderr
+    assert "Successfully scraped all levels" in result.stdout, result.stdout
+    with open(tmp_path / output, encoding="utf-8") as f:
+        return json.load(f)
+
+@pytest.mark.parametrize("source", ["html", "api"])
+def test_async_matches_sequential(fixture_server, tmp_path, source):
+    sequential = scrape(tmp_path, fixture_server.base_url, "sequential.json", "--no-cache", "--source", source)
+    crawled = scrape(tmp_path, fixture_server.base_url, "async.json", "--no-cache", "--source", source,
+                     "--async", "--max-in-flight", "4")
+
+    assert len(sequential) == 5 * 3 * 10
+    assert crawled == sequential
+
+@pytest.mark.parametrize("mode", [[], ["--async", "--max-in-flight", "4"]], ids=["sequential", "async"])
+def test_offline_replay_from_cache(fixture_server, tmp_path, mode):
+    online = scrape(tmp_path, fixture_server.base_url, "online.json", *mode)
+    fixture_server.shutdown()
+    requests_served = fixture_server.requests
+
+    offline = scrape(tmp_path, fixture_server.base_url, "offline.json", "--offline", *mode)
+    assert offline == online
+    assert fixture_server.requests == requests_served
+
+def test_cached_pages_are_revalidated(fixture_server, tmp_path):
+    url = fixture_server.base_url + "/search/%23jlpt-n5?page=1"
+    with Fetcher(cache_dir=str(tmp_path / "cache")) as fetcher:
+        first = fetcher.get(url)
+        second = fetcher.get(url)
+    assert first.status_code == second.status_code == 200
+    assert second.content == first.content
+    assert fetcher.stats["downloaded"] == 1 and fetcher.stats["not_modified"] == 1
+
+    with Fetcher(cache_dir=str(tmp_path / "cache"), offline=True) as fetcher:
+        assert fetcher.get(url).content == first.content
+        with pytest.raises(OfflineCacheMiss):
+            fetcher.get(url + "0")
+
+def test_pipelined_matches_sequential(fixture_server, tmp_path):
+    sequential = scrape(tmp_path, fixture_server.base_url, "sequential.json", "--no-cache")
+    pipelined = scrape(tmp_path, fixture_server.base_url, "pipelined.json", "--no-cache",
+                       "--fetch-workers", "4", "--parse-workers", "2", "--pages-ahead", "2")
+
+    assert pipelined == sequential
+
+def test_throttled_crawl_completes(tmp_path):
+    server = start_fixture_server(pages=2, per_page=5, throttle_rate=10, retry_after=1)
+    try:
+        crawled = scrape(tmp_path, server.base_url, "throttled.json", "--no-cache", "--rate", "80", "--max-rate", "80")
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert len(crawled) == 5 * 2 * 5
+    assert server.throttled > 0
+
+@pytest.mark.parametrize("mode", [[], ["--async"]], ids=["sequential", "async"])
+def test_incomplete_levels_keep_the_journal(fixture_server, tmp_path, mode):
+    output = tmp_path / "jisho.json"
+    output.write_text('["previous"]', encoding="utf-8")
+    fixture_server.error_rate = 1.0
+    command = [sys.executable, os.path.join(ROOT, "jisho_scraper.py"), "--output", str(output),
+               "--base-url", fixture_server.base_url, "--rate", "200", "--max-rate", "200", "--max-retries", "0",
+               "--no-cache", *mode]
+    result = subprocess.run(command, cwd=tmp_path, capture_output=True, text=True, timeout=120)
+
+    assert result.returncode == 1, result.stdout + result.stderr
+    assert "was not written" in result.stdout and "Successfully" not in result.stdout
+    assert output.read_text(encoding="utf-8") == '["previous"]'
+    assert os.path.exists(str(output) + ".cursor.json")
@@ -0,0 +1,61 @@
+"""jmdict_json_parser: streaming output against the in-memory parser."""
+import json
+import os
+import pytest
+import jmdict_json_parser
+from jmdict_json_parser import parse_jmdict_json, parse_jmdict_json_streaming
+
+def read_text(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def test_streaming_json_is_identical(small_jmdict, tmp_path):
+    parse_jmdict_json(small_jmdict, str(tmp_path / "full.json"))
+    parse_jmdict_json_streaming(small_jmdict, str(tmp_path / "stream.json"))
+
+    assert read_text(tmp_path / "stream.json") == read_text(tmp_path / "full.json")
+    assert not os.path.exists(tmp_path / "stream.json.tmp")
+
+def test_streaming_ndjson_has_the_same_records(small_jmdict, tmp_path):
+    parse_jmdict_json(small_jmdict, str(tmp_path / "full.json"))
+    parse_jmdict_json_streaming(small_jmdict, str(tmp_path / "stream.ndjson"), "ndjson")
+
+    records = [json.loads(line) for line in read_text(tmp_path / "stream.ndjson").splitlines()]
+    assert records == json.loads(read_text(tmp_path / "full.json"))
+
+def test_fingerprint_collisions_do_not_drop_words(small_jmdict, tmp_path, monkeypatch):
+    monkeypatch.setattr(jmdict_json_parser, "key_fingerprint", lambda key: 0)
+    parse_jmdict_json(small_jmdict, str(tmp_path / "full.json"))
+    parse_jmdict_json_streaming(small_jmdict, str(tmp_path / "stream.json"))
+
+    assert read_text(tmp_path / "stream.json") == read_text(tmp_path / "full.json")
+
+def test_failed_run_keeps_previous_output(small_jmdict, tmp_path, monkeypatch):
+    output = tmp_path / "stream.json"
+    output.write_text("previous", encoding="utf-8")
+
+    def broken_record(entry, key):
+        raise RuntimeError("boom")
+    monkeypatch.setattr(jmdict_json_parser, "build_vocabulary_record", broken_record)
+    with pytest.raises(RuntimeError):
+        parse_jmdict_json_streaming(small_jmdict, str(output))
+
+    assert read_text(output) == "previous"
+    assert not os.path.exists(str(output) + ".tmp")
+
+def test_missing_output_directory_is_not_reported_as_missing_input(small_jmdict, tmp_path, capsys):
+    output = tmp_path / "missing" / "stream.json"
+    parse_jmdict_json_streaming(small_jmdict, str(output))
+
+    out = capsys.readouterr().out
+    assert "Input file not found" not in out
+    assert str(output) + ".tmp" in out
+
+def test_records_carry_the_commonness_score(small_jmdict, tmp_path):
+    parse_jmdict_json_streaming(small_jmdict, str(tmp_path / "stream.json"))
+    scores = {(r["japanese"], r["furigana"]): r["commonness_score"]
+              for r in json.loads(read_text(tmp_path / "stream.json"))}
+
+    # 与 jmdict_processor.get_commonness_score 相同: ichi 0, news1 1, spec1 4, nf05 18, 无标签 1000
+    assert scores[("食べる", "たべる")] == 0 and scores[("書く", "かく")] == 1
+    assert scores[("静か", "しずか")] == 4 and scores[("泳ぐ", "およぐ")] == 18
@@ -0,0 +1,39 @@
+"""jmdict_pipeline: single-pass outputs match the standalone builders."""
+import os
+import pytest
+import jmdict_processor
+from jmdict_json_parser import parse_jmdict_json
+from jmdict_pipeline import JMdictSink, VocabularySink, WordsSink, run_pipeline
+
+def read_text(path):
+    with open(path, encoding="utf-8") as f:
+        return f.read()
+
+def test_pipeline_matches_standalone_builders(small_jmdict, tmp_path):
+    sinks = [WordsSink(str(tmp_path / "words.json"), limit=5), VocabularySink(str(tmp_path / "vocabulary.json"))]
+    total, _ = run_pipeline(small_jmdict, sinks)
+    assert total == 10
+
+    parse_jmdict_json(small_jmdict, str(tmp_path / "vocabulary_full.json"))
+    jmdict_processor.main(["--input", small_jmdict, "--output", str(tmp_path / "words_full.json"), "--limit", "5"])
+    assert read_text(tmp_path / "vocabulary.json") == read_text(tmp_path / "vocabulary_full.json")
+    assert read_text(tmp_path / "words.json") == read_text(tmp_path / "words_full.json")
+
+class BrokenSink(JMdictSink):
+    name = "broken"
+
+    def process(self, entry):
+        if entry["id"] == "5":
+            raise RuntimeError("boom")
+
+def test_failed_pipeline_keeps_previous_outputs(small_jmdict, tmp_path):
+    words, vocabulary = tmp_path / "words.json", tmp_path / "vocabulary.json"
+    words.write_text("previous words", encoding="utf-8")
+    vocabulary.write_text("previous vocabulary", encoding="utf-8")
+
+    with pytest.raises(RuntimeError):
+        run_pipeline(small_jmdict, [WordsSink(str(words)), VocabularySink(str(vocabulary)), BrokenSink()])
+
+    assert read_text(words) == "previous words"
+    assert read_text(vocabulary) == "previous vocabulary"
+    assert sorted(os.listdir(tmp_path)) == ["jmdict.json", "vocabulary.json", "words.json"]
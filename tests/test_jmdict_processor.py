@@ -0,0 +1,43 @@
+"""jmdict_processor: word selection and building without the conjugation library."""
+import random
+import pytest
+from jmdict_processor import TopWordsSelector, build_words, select_top_words
+
+def make_word(i, score):
+    return {"word": f"語{i}", "reading": f"ご{i}", "meaning": f"word {i}", "type": "noun", "group": "",
+            "forms": {}, "examples": [], "commonness_score": score}
+
+@pytest.mark.parametrize("limit", [None, 0, 1, 7, 100, 500])
+def test_top_words_equal_stable_sort_and_truncate(limit):
+    rng = random.Random(limit)
+    # 分数范围很小, 大量同分条目, 检查同分时保留出现顺序
+    words = [make_word(i, rng.choice([1, 2, 5, 34, 1000])) for i in range(300)]
+    expected = sorted(words, key=lambda w: w["commonness_score"])
+    if limit:
+        expected = expected[:limit]
+
+    selected, total = select_top_words(iter(words), limit)
+    assert total == 300
+    assert [w["word"] for w in selected] == [w["word"] for w in expected]
+
+def test_selector_keeps_only_limit_words():
+    selector = TopWordsSelector(3)
+    for i in range(50):
+        selector.add(make_word(i, 50 - i))
+        assert len(selector._heap) <= 3
+    assert [w["commonness_score"] for w in selector.result()] == [1, 2, 3]
+
+def test_build_words_conjugates_only_selected_words():
+    entries = []
+    for i, (kanji, kana, score_tag) in enumerate([("食べる", "たべる", "ichi"), ("書く", "かく", None),
+                                                  ("高い", "たかい", "news1")]):
+        pos = ["v1"] if kanji == "食べる" else ["v5k"] if kanji == "書く" else ["adj-i"]
+        entries.append({"id": str(i), "kanji": [{"text": kanji}], "kana": [{"text": kana}],
+                        "misc": [score_tag] if score_tag else [],
+                        "sense": [{"partOfSpeech": pos, "gloss": [{"text": f"gloss {i}"}]}]})
+
+    words, total = build_words(entries, limit=2)
+    assert total == 3
+    assert [w["word"] for w in words] == ["食べる", "高い"]
+    assert words[0]["forms"]["te_form"] == "食べて"
+    assert words[1]["forms"]["negative"] == "高くない"
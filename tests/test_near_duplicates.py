@@ -0,0 +1,70 @@
+"""near_duplicates: MinHash/LSH candidates, scoring and the two-pass report."""
+import json
+import random
+from near_duplicates import (NearDuplicateIndex, candidate_pairs, find_near_duplicates, gloss_shingles,
+                             make_shingle_hasher, minhash)
+
+def record(japanese, furigana, english):
+    return {"japanese": japanese, "furigana": furigana, "english": english}
+
+def test_minhash_estimates_jaccard():
+    shingle_hashes = make_shingle_hasher(256)
+    a = gloss_shingles("to handle; to treat; to deal with goods carefully")
+    b = gloss_shingles("to handle; to treat; to deal with")
+    exact = len(a & b) / len(a | b)
+    sig_a, sig_b = minhash(a, shingle_hashes), minhash(b, shingle_hashes)
+    estimate = sum(x == y for x, y in zip(sig_a, sig_b)) / 256
+    assert abs(estimate - exact) < 0.15
+    assert minhash(set(), shingle_hashes) is None
+
+def test_lsh_finds_similar_glosses():
+    rng = random.Random(7)
+    vocabulary = [f"word{i}" for i in range(2000)]
+    index = NearDuplicateIndex()
+    glosses = [" ".join(rng.sample(vocabulary, 8)) for _ in range(200)]
+    for i, english in enumerate(glosses):
+        index.add(record(f"語{i}", f"ご{i}", english), 0, i)
+    # 与前 20 条仅差一个词的改写; 相同键之外只能靠 LSH 找到
+    for i in range(20):
+        words = glosses[i].split()
+        index.add(record(f"別{i}", f"べつ{i}", " ".join(words[:-1] + ["reworded"])), 0, 200 + i)
+
+    candidates, stats = candidate_pairs(index)
+    found = {(i << 32) | (200 + i) in candidates for i in range(20)}
+    assert found == {True}
+    assert stats["key_candidates"] == 0
+    assert stats["candidates"] < 200 * 220 // 20
+
+def test_report_clusters_variants_only(tmp_path):
+    first = [record("テレビ", "てれび", "television; TV"), record("取り扱い", "とりあつかい", "handling; treatment"),
+             record("学校", "がっこう", "school"), record("上げる", "あげる", "to raise; to elevate")]
+    second = [record("ﾃﾚﾋﾞ", "", "television; TV set"), record("取扱い", "とりあつかい", "handling; treatment"),
+              record("スクール", "", "school"), record("上がる", "あがる", "to rise; to go up")]
+    (tmp_path / "a.json").write_text(json.dumps(first, ensure_ascii=False), encoding="utf-8")
+    (tmp_path / "b.ndjson").write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in second) + "\n",
+                                       encoding="utf-8")
+    report = find_near_duplicates([str(tmp_path / "a.json"), str(tmp_path / "b.ndjson")],
+                                  str(tmp_path / "report.json"), show=0)
+
+    clusters = {frozenset(member["japanese"] for member in cluster["members"]) for cluster in report["clusters"]}
+    assert clusters == {frozenset({"テレビ", "ﾃﾚﾋﾞ"}), frozenset({"取り扱い", "取扱い"})}
+    with open(tmp_path / "report.json", encoding="utf-8") as f:
+        assert json.load(f) == report
+
+def test_missing_and_broken_inputs_are_reported(tmp_path, capsys):
+    good = [record("テレビ", "てれび", "television; TV"), record("ﾃﾚﾋﾞ", "", "television; TV")]
+    (tmp_path / "good.json").write_text(json.dumps(good, ensure_ascii=False), encoding="utf-8")
+    # 第一条可读, 之后的 JSON 损坏
+    (tmp_path / "broken.ndjson").write_text(json.dumps(record("テレビ", "てれび", "television")) + "\n{oops\n",
+                                            encoding="utf-8")
+    paths = [str(tmp_path / "missing.json"), str(tmp_path / "broken.ndjson"), str(tmp_path / "good.json")]
+    report = find_near_duplicates(paths, str(tmp_path / "report.json"), show=0)
+
+    out = capsys.readouterr().out
+    assert f"The file {paths[0]} was not found" in out
+    assert f"Could not decode JSON from the file {paths[1]}" in out
+    assert report["entries"] == 3
+    [cluster] = report["clusters"]
+    assert [(member["source"], member["position"]) for member in cluster["members"]] == \
+        [(paths[1], 0), (paths[2], 0), (paths[2], 1)]
+    assert all(member["japanese"] for member in cluster["members"])
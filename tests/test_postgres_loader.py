@@ -0,0 +1,72 @@
+"""postgres_loader.py against a real database (set DATABASE_URL to a local/test Postgres)."""
+import json
+import os
+import pytest
+from conftest import ROOT, make_record, write_ndjson
+
+psycopg = pytest.importorskip("psycopg")
+if not os.environ.get("DATABASE_URL"):
+    pytest.skip("DATABASE_URL is not set", allow_module_level=True)
+
+from postgres_loader import load_vocabulary
+
+def migration(name):
+    with open(os.path.join(ROOT, "supabase", name), encoding="utf-8") as f:
+        return f.read()
+
+@pytest.fixture
+def table():
+    """public.verbs from 01_init_verbs_table.sql plus the commonness_score column of 03, in a throwaway schema."""
+    schema = f"loader_test_{os.getpid()}"
+    # 03 的其余部分需要 pg_trgm 和 Supabase 的角色, 这里只取加列的语句
+    add_column = next(line for line in migration("03_add_vocabulary_search.sql").splitlines()
+                      if line.startswith("ALTER TABLE public.verbs ADD COLUMN"))
+    ddl = (migration("01_init_verbs_table.sql") + "\n" + add_column).replace("public.verbs", f"{schema}.verbs")
+    with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as conn:
+        conn.execute(f"DROP SCHEMA IF EXISTS {schema} CASCADE")
+        conn.execute(f"CREATE SCHEMA {schema}")
+        conn.execute(ddl)
+    yield f"{schema}.verbs"
+    with psycopg.connect(os.environ["DATABASE_URL"], autocommit=True) as conn:
+        conn.execute(f"DROP SCHEMA {schema} CASCADE")
+
+def load(tmp_path, table, records):
+    path = write_ndjson(tmp_path / "vocabulary.ndjson", records)
+    return load_vocabulary(os.environ["DATABASE_URL"], path, table, str(tmp_path / "report.json"))
+
+def stored(table):
+    with psycopg.connect(os.environ["DATABASE_URL"]) as conn:
+        rows = conn.execute(f"SELECT japanese, furigana, english, conjugations, commonness_score FROM {table}")
+        return {(row[0], row[1]): row[2:] for row in rows}
+
+def test_load_counts_every_key_once(tmp_path, table):
+    records = [dict(make_record(i), commonness_score=i % 4) for i in range(50)]
+    records[3]["conjugations"] = {"te_form": "語3て"}
+    records.append(make_record(7, "word 7 again"))
+    rejected = [dict(make_record(100), english=None), dict(make_record(101), jlpt_level="N5-N4")]
+
+    report = load(tmp_path, table, records + rejected)
+    assert (report["rows"], report["inserted"], report["updated"], report["unchanged"]) == (53, 50, 0, 0)
+    assert report["duplicate_keys_merged"] == 1 and report["failed"] == 2
+    assert {failure["code"] for failure in report["failed_keys"]} == {"23502", "22001"}
+    rows = stored(table)
+    assert len(rows) == 50
+    assert rows[("語7", "ご7")][0] == "word 7 again"
+    assert rows[("語3", "ご3")][1:] == ({"te_form": "語3て"}, 3)
+
+    # 再次导入: 全部不变; 修改一行, 新增一行
+    report = load(tmp_path, table, records)
+    assert (report["inserted"], report["updated"], report["unchanged"]) == (0, 0, 50)
+    records[10]["commonness_score"] = 0
+    records.append(make_record(60))
+    report = load(tmp_path, table, records)
+    assert (report["inserted"], report["updated"], report["unchanged"]) == (1, 1, 49)
+    with open(tmp_path / "report.json", encoding="utf-8") as f:
+        assert json.load(f) == report
+    assert stored(table)[("語10", "ご10")][2] == 0
+
+def test_missing_input_leaves_the_table_alone(tmp_path, table):
+    load(tmp_path, table, [make_record(i) for i in range(5)])
+    assert load_vocabulary(os.environ["DATABASE_URL"], str(tmp_path / "missing.json"), table,
+                           str(tmp_path / "report.json")) is None
+    assert len(stored(table)) == 5
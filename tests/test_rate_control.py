@@ -0,0 +1,69 @@
+"""rate_control: AIMD pacing, Retry-After and the retrying fetcher."""
+import time
+from email.utils import formatdate
+import pytest
+from http_fetch import FetchResponse
+from rate_control import AdaptiveRateController, RetryingFetcher, parse_retry_after
+
+def test_parse_retry_after():
+    assert parse_retry_after("3") == 3.0
+    assert parse_retry_after(formatdate(1000.0 + 30, usegmt=True), now=1000.0) == pytest.approx(30.0)
+    assert parse_retry_after(formatdate(1000.0 - 30, usegmt=True), now=1000.0) == 0.0
+    assert parse_retry_after("soon") is None and parse_retry_after(None) is None
+
+def test_additive_increase_multiplicative_decrease():
+    controller = AdaptiveRateController(rate=2.0, max_rate=4.0, min_rate=0.5, increase=1.0)
+    for _ in range(100):
+        controller.on_success()
+    assert controller.rate == 4.0
+
+    controller.on_throttle()
+    controller.on_throttle()  # 同一波限流只减速一次
+    assert controller.rate == 2.0 and controller.stats["decreases"] == 1
+    for _ in range(10):
+        controller._last_decrease = 0.0
+        controller.on_throttle()
+    assert controller.rate == 0.5
+
+def test_retry_after_pauses_every_request():
+    controller = AdaptiveRateController(rate=1000.0, jitter=0.0)
+    controller.on_throttle(retry_after=0.5)
+    assert controller.reserve() == pytest.approx(0.5, abs=0.05)
+    assert controller.reserve() >= 0.5
+
+class ScriptedFetcher:
+    """Returns the scripted (status, headers) responses in order, then 200."""
+
+    offline = False
+    stats = {}
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.calls = 0
+
+    def get(self, url, timeout=None):
+        self.calls += 1
+        status, headers = self.script.pop(0) if self.script else (200, {})
+        return FetchResponse(url, status, b"ok", headers)
+
+def test_retrying_fetcher_waits_for_retry_after_and_returns_the_page():
+    fetcher = ScriptedFetcher([(429, {"Retry-After": "0"}), (503, {}), (429, {})])
+    retrying = RetryingFetcher(fetcher, AdaptiveRateController(rate=1000.0), max_retries=5,
+                               backoff_base=0.001, backoff_max=0.002)
+    assert retrying.get("http://x/1").status_code == 200
+    assert fetcher.calls == 4 and retrying.retries == 3
+    assert retrying.controller.stats["throttled"] == 3
+
+def test_retrying_fetcher_gives_up_with_the_last_response():
+    fetcher = ScriptedFetcher([(503, {})] * 10)
+    retrying = RetryingFetcher(fetcher, AdaptiveRateController(rate=1000.0), max_retries=2,
+                               backoff_base=0.001, backoff_max=0.002)
+    assert retrying.get("http://x/1").status_code == 503
+    assert fetcher.calls == 3
+
+def test_not_found_is_not_retried():
+    fetcher = ScriptedFetcher([(404, {})])
+    retrying = RetryingFetcher(fetcher, AdaptiveRateController(rate=1000.0), backoff_base=0.001)
+    start = time.monotonic()
+    assert retrying.get("http://x/1").status_code == 404
+    assert fetcher.calls == 1 and time.monotonic() - start < 0.5
@@ -0,0 +1,70 @@
+"""reconcile_jlpt: the hash join and the spilled sort-merge join give the same output."""
+import json
+import random
+import pytest
+from check_duplicates import iter_records
+from reconcile_jlpt import reconcile_jlpt
+
+POS = ["Noun", "Ichidan verb", "Godan verb", ""]
+
+def write_records(path, records, ndjson=False):
+    with open(path, "w", encoding="utf-8") as f:
+        if ndjson:
+            f.writelines(json.dumps(record, ensure_ascii=False) + "\n" for record in records)
+        else:
+            json.dump(records, f, ensure_ascii=False)
+    return str(path)
+
+@pytest.fixture
+def inputs(tmp_path):
+    rng = random.Random(3)
+    vocabulary = [{"japanese": f"語{i}る", "furigana": f"ご{i}る", "english": f"word {i}",
+                   "jlpt_level": rng.choice([None, None, "N3"]), "part_of_speech": rng.choice(POS)}
+                  for i in range(300)]
+    vocabulary.append({"english": "no key"})
+    # Jisho 的读音只有汉字部分, 同一个词可以有多个等级
+    jisho = [{"japanese": f"語{i}る", "furigana": f"ご{i}", "jlpt_level": rng.choice(["N5", "N4", "n2", "", "N1"]),
+              "part_of_speech": rng.choice(POS)} for i in rng.choices(range(400), k=500)]
+    return tmp_path, vocabulary, write_records(tmp_path / "jisho.json", jisho)
+
+@pytest.mark.parametrize("ndjson", [False, True], ids=["json", "ndjson"])
+def test_hash_join_matches_sort_merge(inputs, ndjson):
+    tmp_path, vocabulary, jisho = inputs
+    source = write_records(tmp_path / "vocabulary.in", vocabulary, ndjson)
+    hashed = reconcile_jlpt(source, jisho, str(tmp_path / "hash.out"))
+    spilled = reconcile_jlpt(source, jisho, str(tmp_path / "spill.out"), spill=True, run_size=37)
+    # 超过 index_limit 时自动切换到排序合并
+    switched = reconcile_jlpt(source, jisho, str(tmp_path / "switch.out"), index_limit=10)
+
+    assert vars(hashed) == vars(spilled) == vars(switched)
+    assert hashed.matched > 0 and hashed.filled_level > 0 and hashed.conflicts > 0
+    output = (tmp_path / "hash.out").read_text(encoding="utf-8")
+    assert (tmp_path / "spill.out").read_text(encoding="utf-8") == output
+    assert (tmp_path / "switch.out").read_text(encoding="utf-8") == output
+    # 输出格式默认与输入一致
+    assert output.lstrip().startswith("[") != ndjson
+    assert len(list(iter_records(str(tmp_path / "hash.out")))) == len(vocabulary)
+
+def test_easiest_level_wins_and_existing_levels_are_kept(tmp_path):
+    vocabulary = [{"japanese": "食べる", "furigana": "たべる", "jlpt_level": None, "part_of_speech": "Unknown"},
+                  {"japanese": "本", "furigana": "ほん", "jlpt_level": "N4", "part_of_speech": "Noun"}]
+    jisho = [{"japanese": "食べる", "furigana": "た", "jlpt_level": "N4", "part_of_speech": "Verb"},
+             {"japanese": "食べる", "furigana": "た", "jlpt_level": "N5", "part_of_speech": "Ichidan verb"},
+             {"japanese": "本", "furigana": "ほん", "jlpt_level": "N5", "part_of_speech": "Noun"}]
+    source = write_records(tmp_path / "vocabulary.ndjson", vocabulary, ndjson=True)
+    for spill in (False, True):
+        stats = reconcile_jlpt(source, write_records(tmp_path / "jisho.json", jisho), str(tmp_path / "out.json"),
+                               "json", spill=spill)
+        with open(tmp_path / "out.json", encoding="utf-8") as f:
+            first, second = json.load(f)
+        assert (first["jlpt_level"], first["part_of_speech"]) == ("N5", "Ichidan verb")
+        assert second["jlpt_level"] == "N4" and stats.conflicts == 1
+
+def test_missing_jisho_file_is_named(inputs, capsys):
+    tmp_path, vocabulary, _ = inputs
+    source = write_records(tmp_path / "vocabulary.json", vocabulary)
+    missing = str(tmp_path / "missing.json")
+    assert reconcile_jlpt(source, missing) is None
+    assert f"File not found at {missing}" in capsys.readouterr().out
+    assert not (tmp_path / "vocabulary.json.tmp").exists()
+    assert json.loads((tmp_path / "vocabulary.json").read_text(encoding="utf-8")) == vocabulary
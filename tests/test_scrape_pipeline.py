@@ -0,0 +1,56 @@
+"""scrape_pipeline: job order, max_ahead and error passing with a fake fetcher."""
+import itertools
+import random
+import threading
+import time
+from contextlib import closing
+import pytest
+import requests
+from http_fetch import FetchResponse
+from scrape_pipeline import FetchJob, FetchParsePipeline
+
+class FakeFetcher:
+    """Answers url "n" with body b"n" after a short random delay; 404 for not_found, ConnectionError for fail."""
+
+    def __init__(self, not_found=(), fail=()):
+        self.not_found = set(not_found)
+        self.fail = set(fail)
+        self.fetched = []
+        self._lock = threading.Lock()
+        self._rng = random.Random(3)
+
+    def get(self, url):
+        with self._lock:
+            self.fetched.append(url)
+            delay = self._rng.random() * 0.005
+        time.sleep(delay)
+        if url in self.fail:
+            raise requests.exceptions.ConnectionError(url)
+        status = 404 if url in self.not_found else 200
+        return FetchResponse(url, status, url.encode())
+
+def parse_number(content, scale):
+    return int(content) * scale
+
+@pytest.mark.parametrize("fetch_workers, parse_workers", [(1, 1), (4, 1), (4, 2)])
+def test_results_come_in_job_order(fetch_workers, parse_workers):
+    fetcher = FakeFetcher(not_found={"7"}, fail={"11"})
+    jobs = [FetchJob(str(i), (10,), i) for i in range(40)]
+    with FetchParsePipeline(fetcher, parse_number, fetch_workers, parse_workers, queue_size=4) as pipeline:
+        results = list(pipeline.run(jobs))
+
+    assert [job.key for job, _, _, _ in results] == list(range(40))
+    assert [result for _, _, _, result in results] == [None if i in (7, 11) else i * 10 for i in range(40)]
+    assert results[7][1].status_code == 404 and results[7][2] is None
+    assert results[11][1] is None and isinstance(results[11][2], requests.exceptions.ConnectionError)
+
+def test_open_ended_jobs_stop_within_max_ahead():
+    fetcher = FakeFetcher()
+    jobs = (FetchJob(str(i), (1,), i) for i in itertools.count())
+    with FetchParsePipeline(fetcher, parse_number, fetch_workers=4, max_ahead=3) as pipeline:
+        with closing(pipeline.run(jobs)) as pages:
+            for job, _, _, _ in pages:
+                if job.key == 5:
+                    break
+
+    assert len(fetcher.fetched) <= 6 + 3
@@ -0,0 +1,85 @@
+"""search_index: every query method against a brute-force scan of the ranked records."""
+import random
+import pytest
+from search_index import (INDEX_FIELDS, VocabularySearchIndex, build_search_index, load_commonness, record_rank,
+                          tokenize)
+
+KANA = "あいうかきくたてと"
+WORDS = ["eat", "eats", "eating", "write", "swim", "book", "high", "to", "the", "quiet"]
+
+def make_records(n=300, seed=7):
+    rng = random.Random(seed)
+    records = []
+    for i in range(n):
+        japanese = "".join(rng.choice(KANA) for _ in range(rng.randint(1, 9)))
+        furigana = "".join(rng.choice(KANA) for _ in range(rng.randint(0, 4)))
+        english = "; ".join(" ".join(rng.sample(WORDS, 2)) for _ in range(rng.randint(1, 2)))
+        records.append({"japanese": japanese, "furigana": furigana, "english": english,
+                        "jlpt_level": rng.choice([None, "N5", "N3", "N1"]),
+                        "part_of_speech": rng.choice(["v1", "n", "adj-i"]), "conjugations": None})
+    commonness = {(r["japanese"], r["furigana"]): rng.choice([0, 1, 16, 1000]) for r in records[::2]}
+    return records, commonness
+
+@pytest.fixture
+def index(tmp_path):
+    records, commonness = make_records()
+    path = tmp_path / "vocabulary.kpix"
+    path.write_bytes(build_search_index(records, commonness))
+    ranked = [{field: r.get(field) for field in INDEX_FIELDS}
+              for r in sorted(records, key=lambda r: record_rank(r, commonness))]
+    with VocabularySearchIndex(str(path)) as index:
+        yield index, ranked
+
+def texts(record):
+    return [t for t in (record["japanese"], record["furigana"]) if t]
+
+def english_match(record, term):
+    tokens, words = tokenize(term), tokenize(record["english"])
+    return bool(tokens) and all(t in words for t in tokens[:-1]) and any(w.startswith(tokens[-1]) for w in words)
+
+QUERIES = ["あ", "かき", "たてと", "あいうかきくた", "ない", "eat", "to", "eat s", "qu"]
+
+@pytest.mark.parametrize("term", QUERIES)
+@pytest.mark.parametrize("offset", [0, 3])
+def test_methods_match_brute_force(index, term, offset):
+    index, ranked = index
+    expect = {
+        "prefix": [r for r in ranked if any(t.startswith(term) for t in texts(r))],
+        "substring": [r for r in ranked if any(term in t for t in texts(r))],
+        "english": [r for r in ranked if english_match(r, term)],
+    }
+    for method, matches in expect.items():
+        assert getattr(index, method)(term, limit=5, offset=offset) == matches[offset:offset + 5], method
+        assert getattr(index, method)(term, limit=5, offset=offset, part_of_speech="v1") == \
+            [r for r in matches if r["part_of_speech"] == "v1"][offset:offset + 5], method
+
+@pytest.mark.parametrize("term", ["あ", "eat かき", "たてと quiet", "あいうかきくた"])
+def test_search_puts_exact_matches_first(index, term):
+    index, ranked = index
+    terms = term.split()
+    exact = [r for r in ranked if any(t in texts(r) for t in terms)]
+    rest = [r for r in ranked if r not in exact
+            and any(any(t in text for text in texts(r)) or english_match(r, t) for t in terms)]
+    assert index.search(term, limit=10) == (exact + rest)[:10]
+    assert index.search(term, limit=4, offset=2) == (exact + rest)[2:6]
+
+def test_empty_query_and_empty_index(index, tmp_path):
+    index, ranked = index
+    assert index.search("", limit=3) == ranked[:3]
+
+    path = tmp_path / "empty.kpix"
+    path.write_bytes(build_search_index([]))
+    with VocabularySearchIndex(str(path)) as empty:
+        assert empty.search("あ") == [] and empty.prefix("") == []
+
+def test_commonness_comes_from_jmdict(small_jmdict):
+    commonness = load_commonness(small_jmdict)
+    assert commonness[("食べる", "たべる")] == 0
+    assert commonness[("泳ぐ", "およぐ")] == 18
+    assert commonness[("する", "")] == 0
+
+def test_record_commonness_score_wins_over_jmdict():
+    record = {"japanese": "本", "furigana": "ほん", "jlpt_level": "N5", "commonness_score": 3}
+    assert record_rank(record, {("本", "ほん"): 0}) == (3, 0)
+    assert record_rank(dict(record, commonness_score=None), {("本", "ほん"): 0}) == (0, 0)
+    assert record_rank(dict(record, commonness_score=None), {}) == (1000, 0)
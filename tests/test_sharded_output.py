@@ -0,0 +1,43 @@
+"""sharded_output: shard contents, ordering and the shard manifest."""
+import json
+import os
+from sharded_output import verbs_partition, words_partition, write_sharded
+
+def load(path):
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+def make_word(word, word_type, score):
+    return {"word": word, "type": word_type, "commonness_score": score}
+
+def test_shards_keep_input_order_and_cover_all_records(tmp_path):
+    # 按常见度排好的输入, 单词本身不是按字典序排列的
+    words = [make_word(w, t, s) for w, t, s in [
+        ("食べる", "verb", 0), ("本", "noun", 0), ("書く", "verb", 1), ("犬", "noun", 2), ("泳ぐ", "verb", 16),
+        ("行く", "verb", 3), ("水", "noun", 1000), ("あう", "verb", 4), ("猫", "noun", 3), ("見る", "verb", None)]]
+    manifest = write_sharded(words, str(tmp_path), "words", "word", words_partition, shard_size=2)
+
+    assert manifest["partition"] == ["type", "band"] and manifest["total"] == 10
+    assert [shard["file"] for shard in manifest["shards"]] == sorted(shard["file"] for shard in manifest["shards"])
+    restored = []
+    for shard in manifest["shards"]:
+        chunk = load(tmp_path / shard["file"])
+        assert len(chunk) == shard["count"] <= 2
+        assert all(words_partition(word) == {"type": shard["type"], "band": shard["band"]} for word in chunk)
+        assert shard["min_key"] == min(w["word"] for w in chunk) and shard["max_key"] == max(w["word"] for w in chunk)
+        restored.extend(chunk)
+    assert sorted(restored, key=words.index) == words
+
+    core_verbs = [w for shard in manifest["shards"] if shard["file"].startswith("words-verb-core-")
+                  for w in load(tmp_path / shard["file"])]
+    assert [w["word"] for w in core_verbs] == ["食べる", "書く", "行く", "あう"]
+    assert load(tmp_path / "words.manifest.json") == manifest
+
+def test_rewrite_removes_stale_shards(tmp_path):
+    verbs = [{"verb": f"v{i}", "group": "Godan" if i % 2 else "Ichidan"} for i in range(10)]
+    write_sharded(verbs, str(tmp_path), "verbs", "verb", verbs_partition, shard_size=1)
+    manifest = write_sharded(verbs, str(tmp_path), "verbs", "verb", verbs_partition, shard_size=5)
+
+    assert sorted(os.listdir(tmp_path)) == sorted([shard["file"] for shard in manifest["shards"]]
+                                                  + ["verbs.manifest.json"])
+    assert {shard["group"] for shard in manifest["shards"]} == {"godan", "ichidan"}
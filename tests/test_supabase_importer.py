@@ -0,0 +1,66 @@
+"""supabase_importer.py against the in-process PostgREST stand-in."""
+import random
+import sys
+import pytest
+import supabase_importer
+from conftest import make_record, run_import, stored_rows, write_ndjson
+from supabase_importer import BatchSizer, SupabaseImporter
+
+def test_bad_row_is_bisected_out(standin, client, tmp_path):
+    records = [make_record(i) for i in range(40)]
+    records[23]["english"] = None  # NOT NULL: the whole batch is rejected with 23502
+    report = run_import(client, tmp_path, records, sizer=BatchSizer(size=40, min_size=1), workers=1)
+
+    assert report["failed"] == 1
+    assert report["failed_keys"][0]["japanese"] == "語23"
+    assert report["failed_keys"][0]["code"] == "23502"
+    assert report["bisections"] > 0
+    assert len(standin.rows) == 39 and ("語23", "ご23") not in standin.rows
+
+def test_commonness_score_is_uploaded(standin, client, tmp_path):
+    records = [dict(make_record(i), commonness_score=i) for i in range(3)]
+    run_import(client, tmp_path, records)
+    assert {key: row["commonness_score"] for key, row in stored_rows(standin).items()} == \
+        {("語0", "ご0"): 0, ("語1", "ご1"): 1, ("語2", "ご2"): 2}
+
+@pytest.mark.parametrize("standin", [{"error_rate": 0.3}], indirect=True)
+def test_503_is_retried(standin, client):
+    random.seed(1)
+    importer = SupabaseImporter(client, BatchSizer(size=10, min_size=10, max_size=10), workers=4, max_retries=30,
+                                backoff_base=0.001, backoff_max=0.01)
+    report = importer.run(make_record(i) for i in range(200))
+
+    assert report["failed"] == 0
+    assert report["retries"] == standin.stats["errors"] > 0
+    assert len(standin.rows) == 200
+
+def test_repeated_keys_keep_the_last_record(standin, client, tmp_path):
+    records = []
+    for version in range(4):
+        records.extend(make_record(i, f"word {i} v{version}") for i in range(50))
+    for _ in range(3):
+        report = run_import(client, tmp_path, records, sizer=BatchSizer(size=2, min_size=1, max_size=4), workers=8)
+        assert report["failed"] == 0 and report["duplicate_keys_merged"] == 150
+        assert {row["english"] for row in stored_rows(standin).values()} == {f"word {i} v3" for i in range(50)}
+
+@pytest.mark.parametrize("argv", [["--url", "http://localhost:1"], ["--key", "secret"], []],
+                         ids=["url-only", "key-only", "neither"])
+def test_missing_credentials_are_a_usage_error(monkeypatch, capsys, argv):
+    monkeypatch.setattr(supabase_importer, "load_env", lambda: None)
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.delenv("SUPABASE_SERVICE_KEY", raising=False)
+    monkeypatch.setattr(sys, "argv", ["supabase_importer.py", *argv])
+    with pytest.raises(SystemExit) as exit_info:
+        supabase_importer.main()
+    assert exit_info.value.code == 2
+    assert "--url/--key" in capsys.readouterr().err
+
+def test_url_from_the_command_line_and_key_from_the_environment(standin, monkeypatch, tmp_path):
+    monkeypatch.setattr(supabase_importer, "load_env", lambda: None)
+    monkeypatch.delenv("SUPABASE_URL", raising=False)
+    monkeypatch.setenv("SUPABASE_SERVICE_KEY", "from-env")
+    path = write_ndjson(tmp_path / "vocabulary.ndjson", [make_record(i) for i in range(5)])
+    monkeypatch.setattr(sys, "argv", ["supabase_importer.py", "--url", standin.base_url, "--input", path,
+                                      "--report", str(tmp_path / "report.json")])
+    supabase_importer.main()
+    assert len(standin.rows) == 5
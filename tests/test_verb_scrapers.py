@@ -0,0 +1,54 @@
+"""conjugation_scraper.py / advanced_scraper.py: stopping on transient errors and resuming."""
+import json
+import os
+import subprocess
+import sys
+import pytest
+from fixture_server import REFERENCE_VERBS, start_fixture_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+FAST = ["--rate", "200", "--max-rate", "200", "--max-retries", "0", "--no-cache"]
+
+@pytest.fixture
+def fixture_server(tmp_path):
+    server = start_fixture_server(verbs_file=str(tmp_path / "no-verbs.json"))
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def run_script(tmp_path, script, base_url, *options):
+    command = [sys.executable, os.path.join(ROOT, script), "--base-url", base_url, *FAST, *options]
+    return subprocess.run(command, cwd=tmp_path, capture_output=True, text=True, timeout=120)
+
+def test_conjugation_scraper_keeps_output_when_stopped(fixture_server, tmp_path):
+    (tmp_path / "japanese_verbs.txt").write_text("\n".join(REFERENCE_VERBS), encoding="utf-8")
+    (tmp_path / "public").mkdir()
+    output = tmp_path / "public" / "verbs.json"
+    output.write_text('["previous"]', encoding="utf-8")
+
+    fixture_server.error_rate = 1.0
+    result = run_script(tmp_path, "conjugation_scraper.py", fixture_server.base_url, "--sharded")
+    assert result.returncode == 1, result.stdout + result.stderr
+    assert "All Done" not in result.stdout and "was not written" in result.stdout
+    assert output.read_text(encoding="utf-8") == '["previous"]'
+    assert not (tmp_path / "public" / "verbs").exists()
+    assert os.path.exists(str(output) + ".cursor.json")
+
+    fixture_server.error_rate = 0.0
+    result = run_script(tmp_path, "conjugation_scraper.py", fixture_server.base_url, "--sharded")
+    assert result.returncode == 0, result.stdout + result.stderr
+    with open(output, encoding="utf-8") as f:
+        assert [record["verb"] for record in json.load(f)] == list(REFERENCE_VERBS)
+    assert not os.path.exists(str(output) + ".cursor.json")
+    assert (tmp_path / "public" / "verbs" / "verbs.manifest.json").exists()
+
+def test_advanced_scraper_keeps_output_when_stopped(fixture_server, tmp_path):
+    output = tmp_path / "verbs_full.json"
+    output.write_text('["previous"]', encoding="utf-8")
+
+    fixture_server.error_rate = 1.0
+    result = run_script(tmp_path, "advanced_scraper.py", fixture_server.base_url)
+    assert result.returncode == 1, result.stdout + result.stderr
+    assert "All Done" not in result.stdout
+    assert output.read_text(encoding="utf-8") == '["previous"]'
+    assert os.path.exists(str(output) + ".journal.ndjson")